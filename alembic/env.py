@@ -7,7 +7,7 @@ from sqlalchemy import pool
 
 from alembic import context
 
-from src.core.database import Base
+from src.core.database import DATABASE_URL, Base
 from src.core import models  # noqa: F401
 
 # --- LINHAS ADICIONADAS PARA CORRIGIR O CAMINHO DE IMPORTAÇÃO ---
@@ -19,6 +19,9 @@ sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), ".."
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
+# Migra o mesmo banco que a aplicação usa (DATABASE_URL, com o padrão de
+# src/core/database.py), e não o `sqlalchemy.url` fixo do alembic.ini
+config.set_main_option("sqlalchemy.url", DATABASE_URL.replace("%", "%%"))
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
@@ -0,0 +1,40 @@
+"""Add book query indexes
+
+Revision ID: 4f8a1c2e6b9d
+Revises: 9c4e2b7d1a3f
+Create Date: 2026-10-19 14:03:27.512930
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "4f8a1c2e6b9d"
+down_revision: Union[str, Sequence[str], None] = "9c4e2b7d1a3f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_books_category_price", "books", ["category", "price"], unique=False
+    )
+    op.create_index(op.f("ix_books_price"), "books", ["price"], unique=False)
+    op.create_index(op.f("ix_books_rating"), "books", ["rating"], unique=False)
+    op.create_index(
+        op.f("ix_books_number_of_reviews"),
+        "books",
+        ["number_of_reviews"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_books_number_of_reviews"), table_name="books")
+    op.drop_index(op.f("ix_books_rating"), table_name="books")
+    op.drop_index(op.f("ix_books_price"), table_name="books")
+    op.drop_index("ix_books_category_price", table_name="books")
@@ -0,0 +1,73 @@
+"""Create book_changes table
+
+Revision ID: a4c1e8f07b26
+Revises: f3b8d2c6a417
+Create Date: 2026-10-19 20:02:44.190385
+
+"""
+
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "a4c1e8f07b26"
+down_revision: Union[str, Sequence[str], None] = "f3b8d2c6a417"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "book_changes",
+        sa.Column("seq", sa.Integer(), nullable=False),
+        sa.Column("book_id", sa.Integer(), nullable=False),
+        sa.Column("change", sa.String(length=10), nullable=False),
+        sa.Column("data_version", sa.Integer(), nullable=False),
+        sa.Column("changed_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("seq"),
+        sqlite_autoincrement=True,
+    )
+
+    # Os livros já carregados entram no feed como inserções de uma nova versão
+    # dos dados: um espelho que comece do seq 0 recebe o catálogo inteiro, e o
+    # poll por versão (/books/changes/stream) percebe a mudança
+    connection = op.get_bind()
+    if not connection.execute(sa.text("SELECT COUNT(*) FROM books")).scalar():
+        return
+    now = datetime.now(timezone.utc)
+    current = connection.execute(
+        sa.text("SELECT data_version FROM catalog_state WHERE id = 1")
+    ).scalar()
+    version = (current or 0) + 1
+    if current is None:
+        connection.execute(
+            sa.text(
+                "INSERT INTO catalog_state (id, data_version, updated_at) "
+                "VALUES (1, :version, :now)"
+            ),
+            {"version": version, "now": now},
+        )
+    else:
+        connection.execute(
+            sa.text(
+                "UPDATE catalog_state SET data_version = :version, updated_at = :now "
+                "WHERE id = 1"
+            ),
+            {"version": version, "now": now},
+        )
+    connection.execute(
+        sa.text(
+            "INSERT INTO book_changes (book_id, change, data_version, changed_at) "
+            "SELECT id, 'insert', :version, :now FROM books ORDER BY id"
+        ),
+        {"version": version, "now": now},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("book_changes")
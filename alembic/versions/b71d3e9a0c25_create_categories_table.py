@@ -0,0 +1,112 @@
+"""Create categories table
+
+Revision ID: b71d3e9a0c25
+Revises: 4f8a1c2e6b9d
+Create Date: 2026-10-19 15:21:08.334702
+
+"""
+
+import re
+import unicodedata
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "b71d3e9a0c25"
+down_revision: Union[str, Sequence[str], None] = "4f8a1c2e6b9d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _slugify(name: str) -> str:
+    ascii_name = (
+        unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    )
+    return re.sub(r"[^a-z0-9]+", "-", ascii_name.lower()).strip("-")
+
+
+def _unique_slug(name: str, taken: set) -> str:
+    # Nomes diferentes podem gerar o mesmo slug ("Science Fiction" e
+    # "Science-Fiction"), e nomes sem ASCII geram um slug vazio
+    base = _slugify(name) or "categoria"
+    slug, suffix = base, 2
+    while slug in taken:
+        slug = f"{base}-{suffix}"
+        suffix += 1
+    taken.add(slug)
+    return slug
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "categories",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("slug", sa.String(length=120), nullable=False),
+        sa.Column("book_count", sa.Integer(), nullable=False),
+        sa.Column("price_total", sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column("avg_price", sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column("min_price", sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column("max_price", sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column("total_stock", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("name"),
+        sa.UniqueConstraint("slug"),
+    )
+    op.create_index(op.f("ix_categories_id"), "categories", ["id"], unique=False)
+    with op.batch_alter_table("books") as batch_op:
+        batch_op.add_column(sa.Column("category_id", sa.Integer(), nullable=True))
+        batch_op.create_index(
+            batch_op.f("ix_books_category_id"), ["category_id"], unique=False
+        )
+        batch_op.create_foreign_key(
+            "fk_books_category_id_categories", "categories", ["category_id"], ["id"]
+        )
+
+    # Preenche as categorias e os agregados a partir dos livros existentes
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.text(
+            "SELECT category, COUNT(id), SUM(price), MIN(price), MAX(price), "
+            "COALESCE(SUM(quantity), 0) FROM books WHERE category IS NOT NULL "
+            "GROUP BY category ORDER BY category"
+        )
+    ).all()
+    taken = set()
+    for name, count, total, min_price, max_price, stock in rows:
+        connection.execute(
+            sa.text(
+                "INSERT INTO categories (name, slug, book_count, price_total, "
+                "avg_price, min_price, max_price, total_stock) VALUES (:name, :slug, "
+                ":count, :total, :avg, :min, :max, :stock)"
+            ),
+            {
+                "name": name,
+                "slug": _unique_slug(name, taken),
+                "count": count,
+                "total": round(total, 2),
+                "avg": round(total / count, 2),
+                "min": min_price,
+                "max": max_price,
+                "stock": stock,
+            },
+        )
+    connection.execute(
+        sa.text(
+            "UPDATE books SET category_id = "
+            "(SELECT id FROM categories WHERE categories.name = books.category)"
+        )
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("books") as batch_op:
+        batch_op.drop_constraint("fk_books_category_id_categories", type_="foreignkey")
+        batch_op.drop_index(batch_op.f("ix_books_category_id"))
+        batch_op.drop_column("category_id")
+    op.drop_index(op.f("ix_categories_id"), table_name="categories")
+    op.drop_table("categories")
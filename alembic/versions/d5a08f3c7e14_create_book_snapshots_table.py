@@ -0,0 +1,65 @@
+"""Create book_snapshots table
+
+Revision ID: d5a08f3c7e14
+Revises: b71d3e9a0c25
+Create Date: 2026-10-19 16:47:52.904118
+
+"""
+
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "d5a08f3c7e14"
+down_revision: Union[str, Sequence[str], None] = "b71d3e9a0c25"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "book_snapshots",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("book_id", sa.Integer(), nullable=False),
+        sa.Column("captured_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("price", sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("rating", sa.Integer(), nullable=True),
+        sa.Column("previous_price", sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column("previous_quantity", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["book_id"], ["books.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_book_snapshots_book_id_captured_at",
+        "book_snapshots",
+        ["book_id", "captured_at"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_book_snapshots_captured_at"),
+        "book_snapshots",
+        ["captured_at"],
+        unique=False,
+    )
+
+    # Ponto de partida do histórico: o estado atual de cada livro
+    op.get_bind().execute(
+        sa.text(
+            "INSERT INTO book_snapshots "
+            "(book_id, captured_at, price, quantity, rating) "
+            "SELECT id, :now, price, quantity, rating FROM books"
+        ).bindparams(sa.bindparam("now", type_=sa.DateTime(timezone=True))),
+        {"now": datetime.now(timezone.utc)},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_book_snapshots_captured_at"), table_name="book_snapshots")
+    op.drop_index("ix_book_snapshots_book_id_captured_at", table_name="book_snapshots")
+    op.drop_table("book_snapshots")
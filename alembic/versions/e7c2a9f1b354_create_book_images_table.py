@@ -0,0 +1,43 @@
+"""Create book_images table
+
+Revision ID: e7c2a9f1b354
+Revises: d5a08f3c7e14
+Create Date: 2026-10-19 18:12:40.511203
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "e7c2a9f1b354"
+down_revision: Union[str, Sequence[str], None] = "d5a08f3c7e14"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "book_images",
+        sa.Column("source_url", sa.String(length=255), nullable=False),
+        sa.Column("content_hash", sa.String(length=64), nullable=False),
+        sa.Column("content_type", sa.String(length=50), nullable=False),
+        sa.Column("size_bytes", sa.Integer(), nullable=False),
+        sa.Column("fetched_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("source_url"),
+    )
+    op.create_index(
+        op.f("ix_book_images_content_hash"),
+        "book_images",
+        ["content_hash"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_book_images_content_hash"), table_name="book_images")
+    op.drop_table("book_images")
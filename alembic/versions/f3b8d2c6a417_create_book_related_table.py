@@ -0,0 +1,44 @@
+"""Create book_related table
+
+Revision ID: f3b8d2c6a417
+Revises: e7c2a9f1b354
+Create Date: 2026-10-19 19:05:17.283946
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "f3b8d2c6a417"
+down_revision: Union[str, Sequence[str], None] = "e7c2a9f1b354"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "book_related",
+        sa.Column("book_id", sa.Integer(), nullable=False),
+        sa.Column("rank", sa.Integer(), nullable=False),
+        sa.Column("related_book_id", sa.Integer(), nullable=False),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(["book_id"], ["books.id"]),
+        sa.ForeignKeyConstraint(["related_book_id"], ["books.id"]),
+        sa.PrimaryKeyConstraint("book_id", "rank"),
+    )
+    op.create_index(
+        op.f("ix_book_related_related_book_id"),
+        "book_related",
+        ["related_book_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_book_related_related_book_id"), table_name="book_related")
+    op.drop_table("book_related")
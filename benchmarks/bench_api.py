@@ -0,0 +1,336 @@
+import argparse
+import asyncio
+import contextlib
+import itertools
+import logging
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from benchmarks.common import (
+    configure_environment,
+    make_workdir,
+    summarize,
+    write_results,
+)
+
+logger = logging.getLogger(__name__)
+
+# Cada rota (método, template) aponta para uma função que recebe o contexto do
+# benchmark e retorna os argumentos da requisição (url + kwargs do httpx).
+# Rotas novas em `src/api/` devem ganhar um cenário aqui; as que ficarem sem
+# cenário são listadas em `uncovered_routes` no resultado.
+_user_counter = itertools.count()
+
+SCENARIOS: Dict[Tuple[str, str], Callable[[Dict], Dict]] = {
+    ("GET", "/"): lambda ctx: {"url": "/"},
+    ("GET", "/api/v1/health"): lambda ctx: {"url": "/api/v1/health"},
+    ("GET", "/api/v1/books"): lambda ctx: {"url": "/api/v1/books?skip=0&limit=20"},
+    ("GET", "/api/v1/books/search"): lambda ctx: {
+        "url": "/api/v1/books/search?title=secret&category=poetry"
+    },
+    ("GET", "/api/v1/books/top-rated"): lambda ctx: {
+        "url": "/api/v1/books/top-rated?limit=10"
+    },
+    ("GET", "/api/v1/books/price-range"): lambda ctx: {
+        "url": "/api/v1/books/price-range?min_price=10&max_price=10.5"
+    },
+    ("GET", "/api/v1/books/query"): lambda ctx: {
+        "url": "/api/v1/books/query?category=Fantasy&max_price=20&min_rating=4"
+        "&sort=-reviews&limit=20"
+    },
+    ("POST", "/api/v1/books/batch"): lambda ctx: {
+        "url": "/api/v1/books/batch",
+        "json": {"ids": list(range(ctx["book_id"], ctx["book_id"] + 50))},
+    },
+    ("GET", "/api/v1/books/{book_id}"): lambda ctx: {
+        "url": f"/api/v1/books/{ctx['book_id']}"
+    },
+    ("GET", "/api/v1/books/{book_id}/history"): lambda ctx: {
+        "url": f"/api/v1/books/{ctx['book_id']}/history"
+    },
+    ("GET", "/api/v1/books/changes"): lambda ctx: {
+        "url": "/api/v1/books/changes?since=0&limit=100"
+    },
+    ("GET", "/api/v1/books/{book_id}/related"): lambda ctx: {
+        "url": f"/api/v1/books/{ctx['book_id']}/related"
+    },
+    ("GET", "/api/v1/categories"): lambda ctx: {"url": "/api/v1/categories"},
+    ("GET", "/api/v1/stats/overview"): lambda ctx: {"url": "/api/v1/stats/overview"},
+    ("GET", "/api/v1/stats/categories"): lambda ctx: {
+        "url": "/api/v1/stats/categories"
+    },
+    ("GET", "/api/v1/stats/price-movements"): lambda ctx: {
+        "url": "/api/v1/stats/price-movements?days=30&limit=10"
+    },
+    ("POST", "/api/v1/auth/users"): lambda ctx: {
+        "url": "/api/v1/auth/users",
+        "json": {
+            "username": f"bench-{ctx['run_id']}-{next(_user_counter)}",
+            "password": "bench-password",
+        },
+    },
+    ("POST", "/api/v1/auth/login"): lambda ctx: {
+        "url": "/api/v1/auth/login",
+        "data": {"username": ctx["username"], "password": "bench-password"},
+    },
+    ("GET", "/api/v1/auth/users/me"): lambda ctx: {
+        "url": "/api/v1/auth/users/me",
+        "headers": {"Authorization": f"Bearer {ctx['token']}"},
+    },
+}
+
+# Rotas que não fazem sentido medir (ex.: dependem de flags de diagnóstico ou
+# são streams que não terminam)
+EXCLUDED_ROUTES = {
+    ("GET", "/api/v1/debug/queries"),
+    ("DELETE", "/api/v1/debug/queries"),
+    ("GET", "/api/v1/books/changes/stream"),
+}
+
+
+async def list_api_routes(client) -> List[Tuple[str, str]]:
+    """Lista (método, template) de todas as rotas, a partir do schema OpenAPI."""
+    response = await client.get("/openapi.json")
+    response.raise_for_status()
+    return [
+        (method.upper(), path)
+        for path, operations in response.json()["paths"].items()
+        for method in operations
+    ]
+
+
+async def _prepare_context(client, run_id: str) -> Dict:
+    ctx = {"run_id": run_id, "book_id": 1}
+    response = await client.get("/api/v1/books?limit=1")
+    if response.status_code == 200 and response.json():
+        ctx["book_id"] = response.json()[0]["id"]
+    ctx["username"] = f"bench-{run_id}-login"
+    await client.post(
+        "/api/v1/auth/users",
+        json={"username": ctx["username"], "password": "bench-password"},
+    )
+    response = await client.post(
+        "/api/v1/auth/login",
+        data={"username": ctx["username"], "password": "bench-password"},
+    )
+    ctx["token"] = response.json().get("access_token", "")
+    return ctx
+
+
+async def _timed_request(client, method: str, spec: Dict) -> float:
+    kwargs = dict(spec)
+    url = kwargs.pop("url")
+    start = time.perf_counter()
+    response = await client.request(method, url, **kwargs)
+    elapsed = (time.perf_counter() - start) * 1000
+    if response.status_code >= 400:
+        raise RuntimeError(f"{method} {url} retornou {response.status_code}")
+    return elapsed
+
+
+async def run_latency(client, routes, ctx, repeat: int) -> Dict:
+    """Mede a latência sequencial de cada rota."""
+    results = {}
+    for method, path in routes:
+        scenario = SCENARIOS[(method, path)]
+        await _timed_request(client, method, scenario(ctx))  # aquecimento
+        timings = [
+            await _timed_request(client, method, scenario(ctx)) for _ in range(repeat)
+        ]
+        results[f"latency:{method} {path}"] = summarize(timings)
+    return results
+
+
+async def run_load(client, routes, ctx, concurrency: int, requests: int) -> Dict:
+    """Dispara `requests` requisições de leitura com `concurrency` em paralelo."""
+    read_routes = [r for r in routes if r[0] == "GET"]
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait(read_routes[i % len(read_routes)])
+    timings: List[float] = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            method, path = queue.get_nowait()
+            try:
+                timings.append(
+                    await _timed_request(client, method, SCENARIOS[(method, path)](ctx))
+                )
+            except Exception:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    result = summarize(timings) if timings else {}
+    result.update(
+        {
+            "concurrency": concurrency,
+            "requests": requests,
+            "errors": errors,
+            "throughput_rps": round(len(timings) / elapsed, 2),
+        }
+    )
+    return {f"load:c{concurrency}": result}
+
+
+async def run_reload(client, app) -> Dict:
+    """
+    Primeira requisição a cada caminho de WARMUP_PATHS logo depois de uma nova
+    versão dos dados: servida de imediato (caches frios) ou só depois do
+    aquecimento do `CacheWarmer`.
+    """
+    from src.api.responses import get_data_version_tracker
+    from src.api.warmup import CacheWarmer
+    from src.core.config import get_settings
+    from src.core.crud import bump_data_version
+    from src.core.database import SessionLocal
+
+    paths = get_settings().WARMUP_PATHS
+    tracker = get_data_version_tracker()
+    warmer = CacheWarmer(app, tracker, paths)
+    results = {}
+    for name in ("cold", "warmed"):
+        with SessionLocal() as db:
+            version = bump_data_version(db)
+            db.commit()
+        start = time.perf_counter()
+        if name == "warmed":
+            await warmer.warm(version)
+        else:
+            tracker.promote(version)
+        switch_ms = (time.perf_counter() - start) * 1000
+        timings = [await _timed_request(client, "GET", {"url": p}) for p in paths]
+        result = summarize(timings)
+        result["first_requests_ms"] = round(sum(timings), 3)
+        result["warmup_ms"] = round(switch_ms, 3)
+        results[f"reload:{name}"] = result
+    return results
+
+
+def _write_snapshot(path: str):
+    os.environ["SERVING_MODE"] = "snapshot"
+    os.environ["CATALOG_SNAPSHOT_PATH"] = path
+    from src.core.database import SessionLocal
+    from src.core.snapshot import write_snapshot
+
+    with SessionLocal() as db:
+        write_snapshot(db, path)
+
+
+async def run_async(
+    books: int,
+    repeat: int,
+    concurrency: List[int],
+    load_requests: int,
+    base_url: Optional[str],
+    serving_mode: str = "database",
+) -> Dict:
+    import httpx
+
+    stack = contextlib.AsyncExitStack()
+    if base_url:
+        # Servidor externo (ex.: uvicorn com vários workers)
+        client = httpx.AsyncClient(base_url=base_url, timeout=60.0)
+    else:
+        workdir = make_workdir()
+        database_url = configure_environment(workdir)
+        from benchmarks.synthetic import create_catalogue_db
+
+        create_catalogue_db(database_url, books)
+        if serving_mode == "snapshot":
+            _write_snapshot(os.path.join(workdir, "catalog.snapshot"))
+        from main_api import create_app
+
+        app = create_app()
+        # O transporte ASGI não dispara o lifespan; executa-o explicitamente
+        await stack.enter_async_context(app.router.lifespan_context(app))
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://bench",
+            timeout=60.0,
+        )
+
+    async with stack, client:
+        all_routes = await list_api_routes(client)
+        routes = [r for r in all_routes if r in SCENARIOS]
+        uncovered = [
+            f"{m} {p}"
+            for m, p in all_routes
+            if (m, p) not in SCENARIOS and (m, p) not in EXCLUDED_ROUTES
+        ]
+        if uncovered:
+            logger.warning(f"Rotas sem cenário de benchmark: {uncovered}")
+
+        ctx = await _prepare_context(client, str(int(time.time())))
+        results = await run_latency(client, routes, ctx, repeat)
+        for level in concurrency:
+            results.update(await run_load(client, routes, ctx, level, load_requests))
+        if not base_url:
+            results.update(await run_reload(client, app))
+    results["uncovered_routes"] = uncovered
+    return results
+
+
+def run(
+    books: int,
+    repeat: int = 20,
+    concurrency: Optional[List[int]] = None,
+    load_requests: int = 500,
+    base_url: Optional[str] = None,
+    serving_mode: str = "database",
+) -> Dict:
+    return asyncio.run(
+        run_async(
+            books,
+            repeat,
+            concurrency or [1, 8, 32],
+            load_requests,
+            base_url,
+            serving_mode,
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Latência e vazão de todas as rotas da API (in-process via "
+        "ASGI ou contra um servidor em execução)."
+    )
+    parser.add_argument("--books", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--load_requests", type=int, default=500)
+    parser.add_argument(
+        "--base_url", help="Mede um servidor externo em vez da aplicação in-process."
+    )
+    parser.add_argument(
+        "--serving_mode",
+        choices=("database", "snapshot"),
+        default="database",
+        help="Modo de leitura da aplicação in-process (veja SERVING_MODE).",
+    )
+    parser.add_argument("--output", help="Arquivo JSON para salvar os resultados.")
+    args = parser.parse_args()
+
+    results = run(
+        args.books,
+        args.repeat,
+        [int(c) for c in args.concurrency.split(",")],
+        args.load_requests,
+        args.base_url,
+        args.serving_mode,
+    )
+    for name, stats in results.items():
+        if isinstance(stats, dict):
+            extra = (
+                f"  {stats['throughput_rps']:>9} req/s"
+                if "throughput_rps" in stats
+                else ""
+            )
+            print(f"{name:<50} p50 {stats.get('p50_ms', 0):>9.2f} ms{extra}")
+    if args.output:
+        write_results(args.output, results)
@@ -0,0 +1,436 @@
+import argparse
+import csv
+import logging
+import os
+import time
+from typing import Dict
+
+from benchmarks.common import (
+    configure_environment,
+    make_workdir,
+    summarize,
+    write_results,
+)
+from benchmarks.synthetic import parse_size
+
+
+def bench_loader(workdir: str, books: int) -> Dict:
+    """Mede `load_data_from_csv` em uma carga inicial e em uma recarga completa."""
+    from benchmarks.synthetic import write_catalogue_csv
+    from scripts.csv_to_books_db import load_data_from_csv
+    from src.core.database import SessionLocal, engine
+    from src.core.models import Base
+
+    Base.metadata.create_all(bind=engine)
+    csv_path = os.path.join(workdir, "catalogue.csv")
+    write_catalogue_csv(csv_path, books)
+
+    results = {}
+    for name, clear_table in (("loader:initial", False), ("loader:reload", True)):
+        with SessionLocal() as db:
+            start = time.perf_counter()
+            load_data_from_csv(db, csv_path, clear_table)
+            elapsed = time.perf_counter() - start
+        results[name] = {
+            "books": books,
+            "seconds": round(elapsed, 4),
+            "rows_per_second": round(books / elapsed),
+        }
+    return results
+
+
+def bench_storage(workdir: str, books: int) -> Dict:
+    """
+    Compara o CSV com o formato colunar (`.bkcol`): tamanho do arquivo, leitura
+    tipada de todos os livros (`iter_book_rows`) e o estado do modo append.
+    """
+    from benchmarks.synthetic import write_catalogue_csv
+    from scripts.csv_to_books_db import iter_book_rows
+    from scripts.scrape_books import load_scrape_state
+    from src.core.columnar import convert_csv
+
+    csv_path = os.path.join(workdir, "storage.csv")
+    columnar_path = os.path.join(workdir, "storage.bkcol")
+    write_catalogue_csv(csv_path, books)
+    convert_csv(csv_path, columnar_path)
+
+    results = {}
+    for name, path in (("csv", csv_path), ("columnar", columnar_path)):
+        start = time.perf_counter()
+        rows = sum(1 for _ in iter_book_rows(path))
+        read_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        load_scrape_state(path)
+        results[f"storage:{name}"] = {
+            "books": rows,
+            "bytes": os.path.getsize(path),
+            "read_seconds": round(read_seconds, 4),
+            "rows_per_second": round(rows / read_seconds),
+            "append_state_seconds": round(time.perf_counter() - start, 4),
+        }
+    return results
+
+
+# Defeitos injetados no CSV do benchmark de validação (1 linha a cada 1000)
+INVALID_VALUES = (
+    ("price", "12,50"),
+    ("rating", "9"),
+    ("quantity", "-1"),
+    ("availability", "maybe"),
+    ("upc", ""),
+    ("currency", "GBPX"),
+)
+
+
+def _write_validation_csv(path: str, rows: int):
+    from benchmarks.synthetic import CSV_HEADERS, generate_books
+
+    with open(path, "w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=CSV_HEADERS)
+        writer.writeheader()
+        for i, book in enumerate(generate_books(rows)):
+            if i % 1000 == 999:
+                field, value = INVALID_VALUES[(i // 1000) % len(INVALID_VALUES)]
+                book[field] = value
+            writer.writerow(book)
+
+
+def _parse_row_by_row(path: str) -> int:
+    """Referência: conversão linha a linha, como o carregador fazia antes."""
+    from decimal import Decimal, InvalidOperation
+
+    rows = 0
+    with open(path, newline="", encoding="utf-8") as csvfile:
+        for row in csv.DictReader(csvfile):
+            try:
+                {
+                    "upc": row.get("upc"),
+                    "book_name": row.get("book_name"),
+                    "currency": row.get("currency"),
+                    "price": Decimal(row.get("price", "0.00")),
+                    "quantity": int(row.get("quantity", 0)),
+                    "availability": row.get("availability", "False").lower() == "true",
+                    "rating": int(row.get("rating", 0)),
+                    "number_of_reviews": int(row.get("number_of_reviews", 0)),
+                    "category": row.get("category"),
+                    "description": row.get("description"),
+                    "image_url": row.get("image_url"),
+                    "source_page": int(row.get("source_page", 0)),
+                }
+            except (ValueError, InvalidOperation, TypeError):
+                continue
+            rows += 1
+    return rows
+
+
+def bench_validation(workdir: str, rows: int) -> Dict:
+    """
+    Vazão da etapa de validação (`BatchValidator`) contra a conversão linha a
+    linha, sobre um CSV sintético com 0,1% de linhas inválidas.
+    """
+    from src.core.validation import BatchValidator
+
+    csv_path = os.path.join(workdir, "validation.csv")
+    rejects_path = os.path.join(workdir, "validation_rejects.csv")
+    _write_validation_csv(csv_path, rows)
+
+    start = time.perf_counter()
+    _parse_row_by_row(csv_path)
+    row_seconds = time.perf_counter() - start
+
+    validator = BatchValidator(rejects_path)
+    start = time.perf_counter()
+    valid = sum(len(batch) for batch in validator.batches(csv_path))
+    batch_seconds = time.perf_counter() - start
+    return {
+        "validation:row-by-row": {
+            "rows": rows,
+            "seconds": round(row_seconds, 4),
+            "rows_per_second": round(rows / row_seconds),
+        },
+        "validation:batch": {
+            "rows": rows,
+            "valid": valid,
+            "rejected": validator.rejected_rows,
+            "seconds": round(batch_seconds, 4),
+            "rows_per_second": round(rows / batch_seconds),
+        },
+    }
+
+
+def bench_parser(pages: int) -> Dict:
+    """Mede `parse_book_details` sobre as páginas de livro das fixtures."""
+    from benchmarks.fixture_server import BOOKS_PER_PAGE, FixtureCatalogue
+    from scripts.scrape_books import parse_book_details
+
+    catalogue = FixtureCatalogue(pages)
+    html_pages = [catalogue.book_page(i) for i in range(pages * BOOKS_PER_PAGE)]
+    timings = []
+    for html in html_pages:
+        start = time.perf_counter()
+        parse_book_details(html, 1)
+        timings.append((time.perf_counter() - start) * 1000)
+    result = summarize(timings)
+    result["pages_per_second"] = round(1000 / result["mean_ms"], 2)
+    return {"scraper:parse": result}
+
+
+def _crawl(workdir: str, pages: int, workers: int = 1, **faults) -> Dict:
+    import httpx
+
+    from benchmarks.fixture_server import BOOKS_PER_PAGE, FixtureServer
+    from benchmarks.synthetic import CSV_HEADERS
+    from scripts import scrape_books
+    from scripts.request_scheduler import RequestScheduler
+
+    csv_path = os.path.join(workdir, "crawl.csv")
+    with FixtureServer(pages=pages, **faults) as server:
+        scrape_books.configure_base_url(server.base_url)
+        with (
+            httpx.Client(timeout=20.0, follow_redirects=True) as client,
+            open(csv_path, "w", newline="", encoding="utf-8") as csvfile,
+        ):
+            writer = csv.DictWriter(csvfile, fieldnames=CSV_HEADERS)
+            writer.writeheader()
+            # Sem limite de taxa efetivo: mede o scraper, não o espaçamento
+            scheduler = RequestScheduler(
+                client,
+                max_concurrency=workers,
+                requests_per_second=10_000,
+                backoff_base=0.01,
+            )
+            start = time.perf_counter()
+            scrape_books.run_scraper(
+                writer, scheduler, range(1, pages + 1), set(), workers
+            )
+            elapsed = time.perf_counter() - start
+        requests = server.requests
+
+    with open(csv_path, encoding="utf-8") as f:
+        books = sum(1 for _ in f) - 1
+    # Com falhas injetadas, nenhum livro pode se perder (as retentativas cobrem)
+    if books + len(scheduler.dead_letters) < pages * BOOKS_PER_PAGE:
+        raise AssertionError(
+            f"Crawl perdeu livros: {books} capturados, "
+            f"{len(scheduler.dead_letters)} dead letters, "
+            f"{pages * BOOKS_PER_PAGE} esperados."
+        )
+    return {
+        "pages": pages,
+        "books": books,
+        "requests": requests,
+        "retries": scheduler.stats["retries"],
+        "dead_letters": len(scheduler.dead_letters),
+        "seconds": round(elapsed, 4),
+        "books_per_second": round(books / elapsed, 2),
+    }
+
+
+def bench_crawl(workdir: str, pages: int) -> Dict:
+    """
+    Executa o scraper completo contra o servidor local de fixtures: sequencial,
+    com 4 workers e com 503/429 injetados (10% e 5% das requisições).
+    """
+    return {
+        "scraper:crawl": _crawl(workdir, pages),
+        "scraper:crawl-4-workers": _crawl(workdir, pages, workers=4),
+        "scraper:crawl-faults": _crawl(
+            workdir, pages, workers=4, error_rate=0.1, throttle_rate=0.05
+        ),
+    }
+
+
+def bench_refresh(workdir: str, pages: int) -> Dict:
+    """
+    Crawls de atualização depois de um crawl completo, com 5% dos livros
+    alterados na origem a cada vez: `--delta` (compara o hash de cada página de
+    livro) e `--mode listing` (só as páginas de catálogo e os livros alterados).
+    """
+    from benchmarks.fixture_server import FixtureServer
+
+    from scripts import scrape_books
+
+    csv_path = os.path.join(workdir, "refresh.csv")
+    delta_path = os.path.join(workdir, "refresh-delta.csv")
+    results = {"pages": pages}
+    runs = (("full", None, "full"), ("delta", delta_path, "full"))
+    runs += (("listing", delta_path, "listing"),)
+    with FixtureServer(pages=pages) as server:
+        scrape_books.configure_base_url(server.base_url)
+        for run_number, (name, delta, mode) in enumerate(runs):
+            if delta:
+                for book in server.catalogue.books[run_number::20]:
+                    book["price"] = "99.99"
+            requests = server.requests
+            start = time.perf_counter()
+            scrape_books.main(
+                "all",
+                False,
+                csv_path,
+                requests_per_second=10_000,
+                delta_file=delta,
+                mode=mode,
+            )
+            results[f"{name}_seconds"] = round(time.perf_counter() - start, 4)
+            results[f"{name}_requests"] = server.requests - requests
+            if delta:
+                with open(delta_path, encoding="utf-8") as f:
+                    results[f"{name}_changed_books"] = sum(1 for _ in f) - 1
+    return {"scraper:refresh": results}
+
+
+def bench_images(workdir: str, pages: int) -> Dict:
+    """
+    `fetch_covers` contra as capas do servidor de fixtures (PNGs repetidos por
+    categoria): capas/s, arquivos gravados após a deduplicação e miniaturas.
+    """
+    import httpx
+
+    from benchmarks.fixture_server import BOOKS_PER_PAGE, FixtureServer
+    from scripts.fetch_covers import build_thumbnails, fetch_covers
+    from scripts.request_scheduler import RequestScheduler
+    from src.core.database import SessionLocal
+    from src.core.images import ImageStore
+
+    store = ImageStore(os.path.join(workdir, "images"))
+    with (
+        FixtureServer(pages=pages) as server,
+        httpx.Client(timeout=20.0) as client,
+        SessionLocal() as db,
+    ):
+        urls = [
+            f"{server.base_url}media/cache/{i % 256:02x}/{i:08x}.jpg"
+            for i in range(pages * BOOKS_PER_PAGE)
+        ]
+        scheduler = RequestScheduler(
+            client, max_concurrency=8, requests_per_second=10_000
+        )
+        start = time.perf_counter()
+        counts = fetch_covers(db, scheduler, store, urls, workers=8)
+        elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        thumbnails = build_thumbnails(db, store, 200)
+        thumbnail_seconds = time.perf_counter() - start
+    return {
+        "images:fetch": {
+            "covers": len(urls),
+            "files": counts["new_files"],
+            "duplicates": counts["duplicates"],
+            "failed": counts["failed"],
+            "seconds": round(elapsed, 4),
+            "covers_per_second": round(len(urls) / elapsed, 2),
+            "thumbnails": thumbnails,
+            "thumbnail_seconds": round(thumbnail_seconds, 4),
+        }
+    }
+
+
+def bench_related(workdir: str, books: int) -> Dict:
+    """
+    Livros parecidos: cálculo completo, atualização incremental depois de uma
+    carga com 1% de livros novos e 1% com preço alterado, e quanto das listas
+    incrementais coincide com um cálculo completo feito em seguida.
+    """
+    from decimal import Decimal
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+
+    from benchmarks.synthetic import create_catalogue_db, generate_books
+    from src.core.models import Book, BookRelated
+    from src.core.related import RelatedIndex, update_related
+
+    url = f"sqlite:///{os.path.join(workdir, 'related.db')}"
+    create_catalogue_db(url, books)
+    engine = create_engine(url)
+    with Session(engine) as db:
+        start = time.perf_counter()
+        update_related(db)
+        db.commit()
+        full_seconds = time.perf_counter() - start
+
+        step = 100
+        changed = [book_id for (book_id,) in db.query(Book.id)][::step]
+        db.bulk_update_mappings(
+            Book, [{"id": i, "price": Decimal(i % 50 + 10)} for i in changed]
+        )
+        new_books = []
+        for data in generate_books(max(1, books // step), seed=7):
+            data["upc"] = "new-" + data["upc"]
+            data["price"] = Decimal(data["price"])
+            new_books.append(Book(**data))
+        db.add_all(new_books)
+        db.flush()
+        start = time.perf_counter()
+        lists = update_related(db, changed + [book.id for book in new_books])
+        db.commit()
+        incremental_seconds = time.perf_counter() - start
+
+        stored: Dict[int, set] = {}
+        for book_id, related_id in db.query(
+            BookRelated.book_id, BookRelated.related_book_id
+        ):
+            stored.setdefault(book_id, set()).add(related_id)
+        index = RelatedIndex.from_db(db)
+        overlap = [
+            len(
+                stored.get(book_id, set())
+                & {i for _, i in index.neighbours(book_id, 10)}
+            )
+            / 10
+            for book_id in list(index.books)[::step]
+        ]
+    engine.dispose()
+    return {
+        "related:full": {
+            "books": books,
+            "seconds": round(full_seconds, 4),
+            "books_per_second": round(books / full_seconds),
+        },
+        "related:incremental": {
+            "books": len(changed) + len(new_books),
+            "lists_written": lists,
+            "seconds": round(incremental_seconds, 4),
+            "agreement_with_full": round(sum(overlap) / len(overlap), 4),
+        },
+    }
+
+
+def run(books: int, pages: int, validation_rows: int = 1_000_000) -> Dict:
+    workdir = make_workdir()
+    configure_environment(workdir)
+    # Os logs por livro do pipeline distorceriam as medições
+    logging.disable(logging.INFO)
+    results = bench_loader(workdir, books)
+    results.update(bench_storage(workdir, books))
+    results.update(bench_related(workdir, books))
+    if validation_rows:
+        results.update(bench_validation(workdir, validation_rows))
+    results.update(bench_parser(pages))
+    results.update(bench_crawl(workdir, pages))
+    results.update(bench_refresh(workdir, pages))
+    results.update(bench_images(workdir, pages))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmarks do pipeline: carregador do CSV, validação em lotes, "
+        "formato colunar, livros parecidos, scraper e capas contra um servidor "
+        "local de fixtures."
+    )
+    parser.add_argument("--books", type=int, default=1000)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument(
+        "--validation_rows",
+        default="1m",
+        help="Linhas do CSV do benchmark de validação (0 para pular).",
+    )
+    parser.add_argument("--output", help="Arquivo JSON para salvar os resultados.")
+    args = parser.parse_args()
+
+    results = run(args.books, args.pages, parse_size(args.validation_rows))
+    for name, stats in results.items():
+        print(f"{name:<20} {stats}")
+    if args.output:
+        write_results(args.output, results)
@@ -0,0 +1,144 @@
+import argparse
+import os
+import random
+from decimal import Decimal
+
+from benchmarks.common import (
+    configure_environment,
+    make_workdir,
+    measure,
+    write_results,
+)
+
+# Consultas medidas: (nome, parâmetros de BookQuery)
+QUERIES = {
+    "top-rated": {"sort": "-rating", "limit": 5},
+    "price-range": {
+        "min_price": Decimal("10"),
+        "max_price": Decimal("20"),
+        "sort": "price",
+        "limit": None,
+    },
+    "category+price+rating": {
+        "category": "Fantasy",
+        "max_price": Decimal("20"),
+        "min_rating": 4,
+        "sort": "-reviews",
+        "limit": 20,
+    },
+    "cheapest-available": {"available": True, "sort": "price", "limit": 50},
+}
+
+
+def _sql_query(db, query):
+    """Mesma consulta pelo caminho SQL (`crud.query_books`)."""
+    from dataclasses import asdict
+
+    from src.core import crud
+
+    return [row.id for row in crud.query_books(db, **asdict(query))]
+
+
+def _random_query(rng: random.Random, categories):
+    from src.core.query_engine import SORT_COLUMNS, BookQuery
+
+    query = BookQuery(
+        sort=rng.choice(["", "-"]) + rng.choice(sorted(SORT_COLUMNS)),
+        skip=rng.choice([0, 0, 7]),
+        limit=rng.choice([None, 1, 5, 20, 100]),
+    )
+    if rng.random() < 0.5:
+        query.category = rng.choice(categories)
+    if rng.random() < 0.2:
+        query.title = rng.choice(["the", "secret", "of", "zz"])
+    if rng.random() < 0.5:
+        query.min_price = Decimal(rng.randint(0, 5000)) / 100
+    if rng.random() < 0.5:
+        query.max_price = Decimal(rng.randint(1000, 6000)) / 100
+    if rng.random() < 0.5:
+        query.min_rating = rng.randint(1, 5)
+    if rng.random() < 0.3:
+        query.max_rating = rng.randint(1, 5)
+    if rng.random() < 0.3:
+        query.available = rng.random() < 0.5
+    return query
+
+
+def cross_check(engine, db, queries: int, seed: int = 42) -> int:
+    """
+    Executa consultas aleatórias no motor (NumPy e Python puro) e no SQL e
+    falha se algum resultado divergir. Retorna o número de consultas checadas.
+    """
+    from src.core import query_engine
+
+    rng = random.Random(seed)
+    ids = engine.snapshot.columns["id"]
+    numpy_module = query_engine.np
+    for _ in range(queries):
+        query = _random_query(rng, engine.snapshot.categories)
+        expected = _sql_query(db, query)
+        for np_module in {numpy_module, None}:
+            query_engine.np = np_module
+            try:
+                checked = query_engine.ColumnarQueryEngine(engine.snapshot)
+                got = [ids[i] for i in checked.select(query)]
+            finally:
+                query_engine.np = numpy_module
+            if got != expected:
+                raise AssertionError(
+                    f"Divergência para {query} (numpy={np_module is not None}): "
+                    f"motor {got[:10]}..., SQL {expected[:10]}..."
+                )
+    return queries
+
+
+def run(books: int, repeat: int, checks: int) -> dict:
+    """Compara o motor colunar com as consultas SQL equivalentes."""
+    workdir = make_workdir()
+    database_url = configure_environment(workdir)
+
+    from benchmarks.synthetic import create_catalogue_db
+    from src.core.database import SessionLocal
+    from src.core.query_engine import BookQuery, ColumnarQueryEngine
+    from src.core.snapshot import CatalogSnapshot, write_snapshot
+
+    create_catalogue_db(database_url, books)
+    path = os.path.join(workdir, "catalog.snapshot")
+    results = {}
+    with SessionLocal() as db:
+        write_snapshot(db, path)
+        engine = ColumnarQueryEngine(CatalogSnapshot(path))
+        results["cross_checked_queries"] = cross_check(engine, db, checks)
+
+        for name, params in QUERIES.items():
+            query = BookQuery(**params)
+            results[f"query:{name}:sql"] = measure(
+                lambda q=query: _sql_query(db, q), repeat
+            )
+            results[f"query:{name}:engine"] = measure(
+                lambda q=query: engine.query(q), repeat
+            )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Latência do motor de consultas colunar (SERVING_MODE=snapshot) "
+        "contra o SQL equivalente, com verificação cruzada dos resultados."
+    )
+    parser.add_argument("--books", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument(
+        "--checks", type=int, default=200, help="Consultas aleatórias verificadas."
+    )
+    parser.add_argument("--output", help="Arquivo JSON para salvar os resultados.")
+    args = parser.parse_args()
+
+    results = run(args.books, args.repeat, args.checks)
+    for name, stats in results.items():
+        if isinstance(stats, dict):
+            print(f"{name:<40} p50 {stats['p50_ms']:>9.3f} ms")
+        else:
+            print(f"{name:<40} {stats}")
+    if args.output:
+        write_results(args.output, results)
@@ -0,0 +1,88 @@
+import argparse
+import json
+
+from benchmarks.common import (
+    configure_environment,
+    make_workdir,
+    measure,
+    write_results,
+)
+
+
+def run(rows: int, repeat: int) -> dict:
+    """Compara o caminho ORM + Pydantic com o caminho rápido de serialização."""
+    database_url = configure_environment(make_workdir())
+
+    from typing import List
+
+    from fastapi.testclient import TestClient
+    from pydantic import TypeAdapter
+
+    from benchmarks.synthetic import create_catalogue_db
+    from main_api import app
+    from src.core import crud, schemas
+    from src.core.config import get_settings
+    from src.core.database import SessionLocal
+    from src.core.serialization import book_rows_to_dicts, dumps
+
+    create_catalogue_db(database_url, rows)
+    adapter = TypeAdapter(List[schemas.BookSchema])
+
+    def serialize_baseline():
+        with SessionLocal() as db:
+            books = crud.get_books(db, limit=rows)
+            content = adapter.dump_python(
+                adapter.validate_python(books, from_attributes=True), mode="json"
+            )
+            json.dumps(content, ensure_ascii=False, separators=(",", ":"))
+
+    def serialize_fast():
+        with SessionLocal() as db:
+            dumps(book_rows_to_dicts(crud.get_book_rows(db, limit=rows)))
+
+    results = {
+        "serialize:baseline": measure(serialize_baseline, repeat),
+        "serialize:fast": measure(serialize_fast, repeat),
+    }
+
+    client = TestClient(app)
+    # /books pagina em no máximo 100 livros; a busca sem filtros traz todos
+    page = min(rows, 100)
+    paths = {
+        "/api/v1/books": (f"/api/v1/books?limit={page}", page),
+        "/api/v1/books/search": ("/api/v1/books/search", rows),
+    }
+    row_counts = {name: rows for name in results}
+    for fast in (False, True):
+        get_settings().FAST_JSON_RESPONSES = fast
+        mode = "fast" if fast else "baseline"
+        for name, (url, count) in paths.items():
+            key = f"endpoint:{name}:{mode}"
+            results[key] = measure(
+                lambda url=url: client.get(url).raise_for_status(), repeat
+            )
+            row_counts[key] = count
+
+    for name, stats in results.items():
+        stats["rows_per_second"] = round(row_counts[name] / (stats["mean_ms"] / 1000))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Mede linhas/s serializadas nas listas de livros, "
+        "com e sem FAST_JSON_RESPONSES."
+    )
+    parser.add_argument("--rows", type=int, default=500, help="Linhas por resposta.")
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--output", help="Arquivo JSON para salvar os resultados.")
+    args = parser.parse_args()
+
+    results = run(args.rows, args.repeat)
+    for name, stats in results.items():
+        print(
+            f"{name:<40} {stats['mean_ms']:>9.2f} ms  "
+            f"{stats['rows_per_second']:>10} linhas/s"
+        )
+    if args.output:
+        write_results(args.output, results)
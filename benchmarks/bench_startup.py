@@ -0,0 +1,80 @@
+import argparse
+import json
+import subprocess
+import sys
+
+from benchmarks.common import (
+    configure_environment,
+    make_workdir,
+    summarize,
+    write_results,
+)
+
+# Executado em um interpretador novo a cada amostra, para medir o custo de uma
+# inicialização a frio (como um novo worker do uvicorn)
+PROBE = """
+import asyncio, json, time
+t0 = time.perf_counter()
+import main_api
+t1 = time.perf_counter()
+app = main_api.create_app()
+t2 = time.perf_counter()
+
+async def startup():
+    import httpx
+    async with app.router.lifespan_context(app):
+        t3 = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://s") as c:
+            await c.get("/api/v1/books?limit=20")
+        return t3, time.perf_counter()
+
+t3, t4 = asyncio.run(startup())
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "create_app_ms": (t2 - t1) * 1000,
+    "lifespan_ms": (t3 - t2) * 1000,
+    "first_request_ms": (t4 - t3) * 1000,
+    "total_ms": (t4 - t0) * 1000,
+}))
+"""
+
+
+def run(repeat: int, books: int) -> dict:
+    """Mede, em processos novos, cada etapa da inicialização da aplicação."""
+    database_url = configure_environment(make_workdir())
+    from benchmarks.synthetic import create_catalogue_db
+
+    create_catalogue_db(database_url, books)
+
+    samples = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    return {
+        f"startup:{stage}": summarize([sample[stage] for sample in samples])
+        for stage in samples[0]
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Mede o tempo de inicialização a frio da aplicação "
+        "(importação, create_app, lifespan e primeira requisição)."
+    )
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--books", type=int, default=1000)
+    parser.add_argument("--output", help="Arquivo JSON para salvar os resultados.")
+    args = parser.parse_args()
+
+    results = run(args.repeat, args.books)
+    for name, stats in results.items():
+        print(f"{name:<28} p50 {stats['p50_ms']:>9.2f} ms")
+    if args.output:
+        write_results(args.output, results)
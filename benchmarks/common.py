@@ -0,0 +1,64 @@
+import json
+import os
+import statistics
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+
+def configure_environment(workdir: str) -> str:
+    """
+    Aponta a aplicação para um banco SQLite descartável em `workdir`.
+
+    Deve ser chamada antes de importar qualquer módulo de `src`, pois a URL do
+    banco e as configurações são lidas na importação.
+    """
+    db_path = os.path.join(workdir, "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    # Valores padrão apenas para que o Settings possa ser instanciado
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    os.environ.setdefault("ACCESS_TOKEN_EXPIRE_SECONDS", "1800")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("ACCESS_LOG_SAMPLE_RATE", "0")
+    # O banco sintético é criado com create_all, sem versão do Alembic
+    os.environ.setdefault("DB_SCHEMA_STARTUP", "none")
+    return os.environ["DATABASE_URL"]
+
+
+def make_workdir() -> str:
+    return tempfile.mkdtemp(prefix="book-bench-")
+
+
+def summarize(timings: List[float]) -> Dict:
+    """Resume uma lista de latências (em ms)."""
+    timings = sorted(timings)
+
+    def percentile(p: float) -> float:
+        return round(timings[min(len(timings) - 1, int(len(timings) * p))], 4)
+
+    return {
+        "repeat": len(timings),
+        "mean_ms": round(statistics.fmean(timings), 4),
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "min_ms": round(timings[0], 4),
+    }
+
+
+def measure(fn: Callable[[], object], repeat: int, warmup: int = 2) -> Dict:
+    """Executa `fn` `repeat` vezes e retorna estatísticas de latência em ms."""
+    for _ in range(warmup):
+        fn()
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return summarize(timings)
+
+
+def write_results(path: str, results: Dict):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
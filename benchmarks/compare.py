@@ -0,0 +1,64 @@
+import argparse
+import json
+import sys
+from typing import Dict, Iterator, Tuple
+
+# Métricas em que valores menores são melhores; as demais listadas em
+# HIGHER_IS_BETTER são vazões
+LOWER_IS_BETTER = ("mean_ms", "p95_ms", "seconds")
+HIGHER_IS_BETTER = (
+    "throughput_rps",
+    "rows_per_second",
+    "pages_per_second",
+    "books_per_second",
+)
+
+
+def iter_metrics(report: Dict) -> Iterator[Tuple[str, str, float]]:
+    for suite, scenarios in report["results"].items():
+        for scenario, stats in scenarios.items():
+            if not isinstance(stats, dict):
+                continue
+            for metric in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+                if metric in stats:
+                    yield f"{suite} {scenario}", metric, stats[metric]
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> int:
+    """Imprime a variação de cada métrica e retorna o número de regressões."""
+    base = {(name, metric): value for name, metric, value in iter_metrics(baseline)}
+    regressions = 0
+    for name, metric, value in iter_metrics(current):
+        old = base.get((name, metric))
+        if not old:
+            continue
+        change = (value - old) / old * 100
+        worse = change > threshold if metric in LOWER_IS_BETTER else -change > threshold
+        flag = "REGRESSÃO" if worse else ""
+        regressions += worse
+        print(
+            f"{name:<60} {metric:<18} {old:>12.3f} -> {value:>12.3f} "
+            f"({change:+.1f}%) {flag}"
+        )
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compara dois resultados de benchmarks.run."
+    )
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument(
+        "--threshold", type=float, default=10.0, help="Variação tolerada em %%."
+    )
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+
+    regressions = compare(baseline, current, args.threshold)
+    print(f"{regressions} regressão(ões) acima de {args.threshold}%.")
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,254 @@
+import argparse
+import hashlib
+import os
+import random
+import re
+import struct
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from string import Template
+from typing import Dict, List, Optional
+
+from benchmarks.synthetic import generate_books
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+RATING_WORDS = {1: "One", 2: "Two", 3: "Three", 4: "Four", 5: "Five"}
+BOOKS_PER_PAGE = 20
+
+PAGE_RE = re.compile(r"^/catalogue/page-(\d+)\.html$")
+BOOK_RE = re.compile(r"^/catalogue/[a-z0-9-]+_(\d+)/index\.html$")
+IMAGE_RE = re.compile(r"^/media/cache/[0-9a-f]{2}/([0-9a-f]{8})\.jpg$")
+COVER_SIZE = (200, 300)
+
+
+def _load_template(name: str) -> Template:
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return Template(f.read())
+
+
+def _slugify(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+
+def _png(width: int, height: int, rgb: bytes) -> bytes:
+    """PNG de uma cor só (sem depender do Pillow)."""
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    pixels = (b"\x00" + rgb * width) * height
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(pixels))
+        + chunk(b"IEND", b"")
+    )
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    # A fila padrão (5) transborda com vários workers conectando ao mesmo
+    # tempo, e o SYN descartado só é reenviado ~1 s depois
+    request_queue_size = 128
+
+
+class FixtureCatalogue:
+    """Renderiza páginas no formato do books.toscrape.com a partir das fixtures."""
+
+    def __init__(self, pages: int = 50, seed: int = 42):
+        self.pages = pages
+        self.books: List[Dict] = list(generate_books(pages * BOOKS_PER_PAGE, seed))
+        self.page_template = _load_template("catalogue_page.html")
+        self.item_template = _load_template("catalogue_item.html")
+        self.book_template = _load_template("book_page.html")
+        self._covers: Dict[str, bytes] = {}
+
+    def _book_fields(self, index: int) -> Dict:
+        book = self.books[index]
+        title = book["book_name"]
+        quantity = book["quantity"]
+        return {
+            "title": title,
+            "short_title": title if len(title) < 40 else title[:37] + "...",
+            "slug": f"{_slugify(title)}_{index}",
+            "upc": book["upc"],
+            "price": book["price"],
+            "rating_word": RATING_WORDS[book["rating"]],
+            "availability_class": "instock" if quantity else "outofstock",
+            "availability_text": (
+                f"In stock ({quantity} available)" if quantity else "Out of stock"
+            ),
+            "number_of_reviews": book["number_of_reviews"],
+            "category": book["category"],
+            "category_slug": f"{_slugify(book['category'])}_2",
+            "description": book["description"],
+            "description_head": book["description"][:120],
+            "image_path": f"{index % 256:02x}/{index:08x}.jpg",
+        }
+
+    def catalogue_page(self, page: int) -> Optional[str]:
+        if not 1 <= page <= self.pages:
+            return None
+        first = (page - 1) * BOOKS_PER_PAGE
+        items = "".join(
+            self.item_template.substitute(self._book_fields(i))
+            for i in range(first, first + BOOKS_PER_PAGE)
+        )
+        next_link = (
+            f'<li class="next"><a href="page-{page + 1}.html">next</a></li>'
+            if page < self.pages
+            else ""
+        )
+        return self.page_template.substitute(
+            items=items,
+            page=page,
+            pages=self.pages,
+            total_books=len(self.books),
+            first=first + 1,
+            last=first + BOOKS_PER_PAGE,
+            next_link=next_link,
+        )
+
+    def book_page(self, index: int) -> Optional[str]:
+        if not 0 <= index < len(self.books):
+            return None
+        return self.book_template.substitute(self._book_fields(index))
+
+    def cover_image(self, index: int) -> Optional[bytes]:
+        """
+        Capa do livro: um PNG com a cor da categoria, então livros da mesma
+        categoria têm capas idênticas (para exercitar a deduplicação).
+        """
+        if not 0 <= index < len(self.books):
+            return None
+        category = self.books[index]["category"]
+        if category not in self._covers:
+            color = hashlib.sha256(category.encode()).digest()[:3]
+            self._covers[category] = _png(*COVER_SIZE, color)
+        return self._covers[category]
+
+
+class FixtureServer:
+    """
+    Servidor HTTP local que imita o books.toscrape.com, para benchmarks e
+    execuções do scraper sem acesso à internet.
+
+    Serve também as capas dos livros (`/media/cache/...`, veja `cover_image`).
+    Para exercitar retentativas e controle de taxa, pode injetar falhas: uma
+    fração `error_rate` das requisições recebe 503, `throttle_rate` recebe 429
+    (com `Retry-After: 0`) e todas esperam `latency` segundos.
+
+    Uso:
+        with FixtureServer(pages=5) as server:
+            scrape_books.configure_base_url(server.base_url)
+    """
+
+    def __init__(
+        self,
+        pages: int = 50,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        latency: float = 0.0,
+        seed: int = 42,
+    ):
+        self.catalogue = FixtureCatalogue(pages)
+        self.requests = 0
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.injected = {"503": 0, "429": 0}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        server_ref = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if latency:
+                    time.sleep(latency)
+                fault = server_ref._injected_fault()
+                if fault:
+                    self.send_response(fault)
+                    self.send_header("Retry-After", "0")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                data, content_type = server_ref._render(self.path)
+                if data is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = _HTTPServer((host, port), Handler)
+        self.base_url = f"http://{host}:{self.httpd.server_address[1]}/"
+        self._thread: Optional[threading.Thread] = None
+
+    def _render(self, path: str) -> tuple[Optional[bytes], str]:
+        """Corpo e Content-Type da página de catálogo, do livro ou da capa."""
+        body = None
+        match = PAGE_RE.match(path)
+        if match:
+            body = self.catalogue.catalogue_page(int(match.group(1)))
+        match = BOOK_RE.match(path)
+        if match:
+            body = self.catalogue.book_page(int(match.group(1)))
+        match = IMAGE_RE.match(path)
+        if match:
+            return self.catalogue.cover_image(int(match.group(1), 16)), "image/png"
+        if body is None:
+            return None, ""
+        return body.encode("utf-8"), "text/html; charset=utf-8"
+
+    def _injected_fault(self) -> int:
+        """Conta a requisição e sorteia a falha injetada (0 = nenhuma)."""
+        with self._lock:
+            self.requests += 1
+            draw = self._rng.random()
+            if draw < self.throttle_rate:
+                self.injected["429"] += 1
+                return 429
+            if draw < self.throttle_rate + self.error_rate:
+                self.injected["503"] += 1
+                return 503
+        return 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Servidor local que imita o books.toscrape.com."
+    )
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--port", type=int, default=8001)
+    args = parser.parse_args()
+
+    server = FixtureServer(pages=args.pages, port=args.port)
+    print(f"Servindo {args.pages} páginas em {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,112 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from benchmarks.common import write_results
+from benchmarks.synthetic import parse_size
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+SUITES = ("api", "pipeline", "serialization", "startup", "query_engine")
+# Suítes que não dependem do tamanho do catálogo rodam uma vez só
+FIXED_SIZE_SUITES = {"serialization": "500", "startup": "1k"}
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _suite_command(suite: str, books: int, args, output: str) -> List[str]:
+    command = [sys.executable, "-m", f"benchmarks.bench_{suite}", "--output", output]
+    if suite == "api":
+        command += [
+            "--books",
+            str(books),
+            "--repeat",
+            str(args.repeat),
+            "--concurrency",
+            args.concurrency,
+        ]
+    elif suite == "pipeline":
+        command += ["--books", str(books), "--pages", str(args.pages)]
+    elif suite == "serialization":
+        command += ["--repeat", str(args.repeat)]
+    elif suite == "startup":
+        command += ["--books", str(books)]
+    elif suite == "query_engine":
+        command += ["--books", str(books), "--repeat", str(args.repeat)]
+    return command
+
+
+def run_suites(args) -> Dict:
+    """
+    Executa cada suíte/tamanho em um subprocesso próprio, já que a URL do banco
+    é fixada na importação da aplicação.
+    """
+    results = {}
+    for suite in args.suites.split(","):
+        if suite in FIXED_SIZE_SUITES:
+            sizes = [FIXED_SIZE_SUITES[suite]]
+        else:
+            sizes = args.sizes.split(",")
+        for size in sizes:
+            books = parse_size(size)
+            with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as tmp:
+                output = tmp.name
+            print(f"Executando {suite} com {books} livros...", flush=True)
+            subprocess.run(_suite_command(suite, books, args, output), check=True)
+            with open(output, encoding="utf-8") as f:
+                results[f"{suite}@{books}"] = json.load(f)
+            os.remove(output)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Executa as suítes de benchmark e grava um JSON comparável "
+        "entre commits (veja benchmarks.compare)."
+    )
+    parser.add_argument("--suites", default=",".join(SUITES))
+    parser.add_argument(
+        "--sizes", default="1k,100k", help="Tamanhos do catálogo (ex.: 1k,100k,1m)."
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--output", help="Arquivo de saída (padrão: results/).")
+    args = parser.parse_args()
+
+    now = datetime.now(timezone.utc)
+    commit = _git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": now.isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "results": run_suites(args),
+    }
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(
+            RESULTS_DIR, f"{now.strftime('%Y%m%d-%H%M%S')}-{commit}.json"
+        )
+    write_results(output, report)
+    print(f"Resultados salvos em '{output}'.")
@@ -0,0 +1,184 @@
+import argparse
+import csv
+import random
+from typing import Dict, Iterator
+
+CATEGORIES = [
+    "Travel",
+    "Mystery",
+    "Historical Fiction",
+    "Sequential Art",
+    "Classics",
+    "Philosophy",
+    "Romance",
+    "Womens Fiction",
+    "Fiction",
+    "Childrens",
+    "Religion",
+    "Nonfiction",
+    "Music",
+    "Science Fiction",
+    "Sports and Games",
+    "Fantasy",
+    "New Adult",
+    "Young Adult",
+    "Science",
+    "Poetry",
+    "Paranormal",
+    "Art",
+    "Psychology",
+    "Autobiography",
+    "Parenting",
+    "Adult Fiction",
+    "Humor",
+    "Horror",
+    "History",
+    "Food and Drink",
+    "Christian Fiction",
+    "Business",
+    "Biography",
+    "Thriller",
+    "Contemporary",
+    "Spirituality",
+    "Academic",
+    "Self Help",
+    "Historical",
+    "Christian",
+    "Suspense",
+    "Short Stories",
+    "Novels",
+    "Health",
+    "Politics",
+    "Cultural",
+    "Erotica",
+    "Crime",
+    "Add a comment",
+    "Default",
+]
+
+WORDS = (
+    "the of and a to in is you that it he was for on are as with his they at be "
+    "this have from or one had by word but not what all were we when your can said "
+    "there use an each which she do how their if will up other about out many then "
+    "them these so some her would make like him into time has look two more write "
+    "go see number no way could people my than first water been call who oil its "
+    "now find long down day did get come made may part night light house garden "
+    "river mountain secret letter winter summer journey kingdom shadow stone fire"
+).split()
+
+CSV_HEADERS = [
+    "upc",
+    "book_name",
+    "currency",
+    "price",
+    "quantity",
+    "availability",
+    "rating",
+    "number_of_reviews",
+    "category",
+    "description",
+    "image_url",
+    "source_page",
+]
+
+
+def generate_books(count: int, seed: int = 42) -> Iterator[Dict]:
+    """Gera `count` livros sintéticos, de forma determinística para a `seed`."""
+    rng = random.Random(seed)
+    for i in range(count):
+        quantity = rng.randint(0, 22)
+        title_words = rng.choices(WORDS, k=rng.randint(2, 7))
+        description_words = rng.choices(WORDS, k=rng.randint(40, 120))
+        yield {
+            "upc": f"{seed:04x}{i:012x}",
+            "book_name": " ".join(title_words).title(),
+            "currency": "GBP",
+            "price": f"{rng.uniform(10, 60):.2f}",
+            "quantity": quantity,
+            "availability": quantity > 0,
+            "rating": rng.randint(1, 5),
+            "number_of_reviews": rng.randint(0, 50),
+            "category": rng.choice(CATEGORIES),
+            "description": " ".join(description_words).capitalize() + ".",
+            "image_url": f"https://books.toscrape.com/media/cache/{i:08x}.jpg",
+            "source_page": i // 20 + 1,
+        }
+
+
+def write_catalogue_csv(path: str, count: int, seed: int = 42):
+    """Escreve um catálogo sintético no formato do scraper."""
+    with open(path, "w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=CSV_HEADERS)
+        writer.writeheader()
+        writer.writerows(generate_books(count, seed))
+
+
+def create_catalogue_db(
+    database_url: str, count: int, seed: int = 42, batch_size: int = 10_000
+):
+    """Cria o schema e insere um catálogo sintético no banco informado."""
+    from datetime import datetime, timezone
+    from decimal import Decimal
+
+    from sqlalchemy import create_engine, insert, literal, select
+    from sqlalchemy.orm import Session
+
+    from src.core.crud import rebuild_categories
+    from src.core.models import Base, Book, BookSnapshot
+
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    batch = []
+    with engine.begin() as conn:
+        for book in generate_books(count, seed):
+            book["price"] = Decimal(book["price"])
+            batch.append(book)
+            if len(batch) >= batch_size:
+                conn.execute(insert(Book.__table__), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(Book.__table__), batch)
+    with Session(engine) as db:
+        rebuild_categories(db)
+        # Primeiro registro do histórico de cada livro, como faz o carregador
+        columns = ["book_id", "captured_at", "price", "quantity", "rating"]
+        db.execute(
+            insert(BookSnapshot).from_select(
+                columns,
+                select(
+                    Book.id,
+                    literal(datetime.now(timezone.utc), BookSnapshot.captured_at.type),
+                    Book.price,
+                    Book.quantity,
+                    Book.rating,
+                ),
+            )
+        )
+        db.commit()
+    engine.dispose()
+
+
+def parse_size(value: str) -> int:
+    """Converte tamanhos como '1k', '100k' ou '1m' em número de livros."""
+    value = value.strip().lower()
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+    if multiplier > 1:
+        value = value[:-1]
+    return int(float(value) * multiplier)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Gera um catálogo sintético de livros (SQLite e/ou CSV)."
+    )
+    parser.add_argument("--books", default="1k", help="Ex.: 1k, 100k, 1m.")
+    parser.add_argument("--db", help="Caminho do arquivo SQLite a ser criado.")
+    parser.add_argument("--csv", help="Caminho do CSV a ser criado.")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    count = parse_size(args.books)
+    if args.db:
+        create_catalogue_db(f"sqlite:///{args.db}", count, args.seed)
+    if args.csv:
+        write_catalogue_csv(args.csv, count, args.seed)
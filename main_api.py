@@ -1,27 +1,155 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from src.api import books, utils, stats, auth  # Importa os novos módulos de rota
+from src.api import (
+    books,
+    changes,
+    images,
+    utils,
+    stats,
+    auth,
+)  # Importa os novos módulos de rota
+from src.api.middleware import (
+    AccessLogMiddleware,
+    CompressionMiddleware,
+    QueryProfilingMiddleware,
+    RecentPathsMiddleware,
+)
+from src.api.responses import get_data_version_tracker
+from src.api.warmup import CacheWarmer, RecentPaths
 from src.core import models
-from src.core.database import engine
-from src.core.logging_config import setup_api_logging
+from src.core.config import get_settings
+from src.core.database import (
+    check_schema_revision,
+    engine,
+    replica_engines,
+    warm_connection_pool,
+)
+from src.core.logging_config import setup_api_logging, stop_api_logging
+from src.core.query_profiler import QueryProfiler
+from src.core.snapshot import get_catalog_snapshot
 
-setup_api_logging()
+logger = logging.getLogger(__name__)
 
-models.Base.metadata.create_all(bind=engine)
 
-app = FastAPI(
-    title="Book Data API",
-    description="Uma API para consulta de dados de livros extraídos "
-    "do site books.toscrape.com",
-    version="1.0.0",
-)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Inicialização e encerramento da aplicação. Todo o trabalho com arquivos e
+    banco acontece aqui, e não na importação do módulo.
+    """
+    settings = get_settings()
+    start = time.perf_counter()
+    setup_api_logging(
+        json_logs=settings.LOG_FORMAT.lower() == "json",
+        use_queue=settings.LOG_QUEUE,
+        level=settings.LOG_LEVEL.upper(),
+        access_middleware=True,
+    )
+
+    schema_mode = settings.DB_SCHEMA_STARTUP.lower()
+    if schema_mode == "create":
+        models.Base.metadata.create_all(bind=engine)
+    elif schema_mode == "check" and not check_schema_revision():
+        raise RuntimeError(
+            "Schema do banco desatualizado. Execute 'alembic upgrade head' "
+            "(ou use DB_SCHEMA_STARTUP=create em desenvolvimento)."
+        )
+
+    if settings.SERVING_MODE.lower() == "snapshot" and get_catalog_snapshot() is None:
+        logger.warning(
+            f"Snapshot '{settings.CATALOG_SNAPSHOT_PATH}' não encontrado; servindo "
+            "do banco até o carregador gerar um (--snapshot)."
+        )
+
+    if settings.DB_POOL_WARM_CONNECTIONS > 0:
+        warm_connection_pool(settings.DB_POOL_WARM_CONNECTIONS)
+    warmer = CacheWarmer(
+        app,
+        get_data_version_tracker(),
+        settings.WARMUP_PATHS,
+        getattr(app.state, "recent_paths", None),
+        settings.WARMUP_HOT_PATHS,
+        settings.DATA_VERSION_CHECK_SECONDS,
+    )
+    if settings.WARM_CACHES_ON_STARTUP:
+        await warmer.warm()
+    # A cada nova carga, a nova versão só é servida depois de aquecida
+    warmer_task = (
+        asyncio.create_task(warmer.run()) if settings.WARM_CACHES_ON_RELOAD else None
+    )
+
+    logger.info(f"Aplicação iniciada em {(time.perf_counter() - start) * 1000:.1f} ms.")
+    yield
+    if warmer_task is not None:
+        warmer_task.cancel()
+    engine.dispose()
+    for replica in replica_engines:
+        replica.dispose()
+    stop_api_logging()
+
+
+def create_app() -> FastAPI:
+    """Cria e configura a aplicação FastAPI."""
+    settings = get_settings()
+    app = FastAPI(
+        title="Book Data API",
+        description="Uma API para consulta de dados de livros extraídos "
+        "do site books.toscrape.com",
+        version="1.0.0",
+        lifespan=lifespan,
+    )
+
+    if settings.QUERY_PROFILING:
+        query_profiler = QueryProfiler(
+            slow_query_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+            max_statements=settings.MAX_QUERIES_PER_REQUEST,
+            log_params=settings.SLOW_QUERY_LOG_PARAMS,
+        )
+        for profiled_engine in [engine, *replica_engines]:
+            query_profiler.install(profiled_engine)
+        app.state.query_profiler = query_profiler
+        app.add_middleware(QueryProfilingMiddleware, profiler=query_profiler)
+
+    if settings.COMPRESSION_ENABLED:
+        app.add_middleware(
+            CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE
+        )
+
+    if settings.WARM_CACHES_ON_RELOAD and settings.WARMUP_HOT_PATHS > 0:
+        app.state.recent_paths = RecentPaths(settings.WARMUP_RECENT_REQUESTS)
+        app.add_middleware(RecentPathsMiddleware, recent=app.state.recent_paths)
+
+    app.add_middleware(
+        AccessLogMiddleware,
+        sample_rate=settings.ACCESS_LOG_SAMPLE_RATE,
+        slow_request_ms=settings.ACCESS_LOG_SLOW_MS,
+    )
+
+    # Inclui os roteadores na aplicação principal
+    app.include_router(utils.router)
+    # Antes de `books`: /books/changes não pode cair em /books/{book_id}
+    app.include_router(changes.router)
+    app.include_router(books.router)
+    app.include_router(stats.router)
+    app.include_router(auth.router)
+    app.include_router(images.router)
+
+    @app.get("/", tags=["Root"])
+    def read_root():
+        return {"message": "Bem-vindo à Book Data API!"}
 
-# Inclui os roteadores na aplicação principal
-app.include_router(utils.router)
-app.include_router(books.router)
-app.include_router(stats.router)
-app.include_router(auth.router)
+    return app
 
 
-@app.get("/", tags=["Root"])
-def read_root():
-    return {"message": "Bem-vindo à Book Data API!"}
+def __getattr__(name: str):
+    # `uvicorn main_api:app` continua funcionando: a aplicação só é criada no
+    # primeiro acesso a `main_api.app` (prefira `--factory main_api:create_app`)
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,43 @@
+import argparse
+import logging
+import time
+
+from src.core.config import get_settings
+from src.core.database import SessionLocal
+from src.core.logging_config import setup_pipeline_logging
+from src.core.related import update_related
+
+
+def main(top_k: int):
+    """Recalcula do zero os livros parecidos de todo o catálogo."""
+    setup_pipeline_logging()
+    logger = logging.getLogger(__name__)
+
+    db = None
+    try:
+        db = SessionLocal()
+        start = time.perf_counter()
+        lists = update_related(db, top_k=top_k)
+        db.commit()
+        logger.info(
+            f"Livros parecidos: {lists} listas de até {top_k} livros gravadas em "
+            f"{time.perf_counter() - start:.2f}s."
+        )
+    finally:
+        if db:
+            db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Recalcula a tabela de livros parecidos (book_related) de todo "
+        "o catálogo. O carregador já a atualiza de forma incremental a cada carga."
+    )
+    parser.add_argument(
+        "--top_k",
+        type=int,
+        default=get_settings().RELATED_BOOKS_TOP_K,
+        help="Livros parecidos guardados por livro.",
+    )
+    args = parser.parse_args()
+    main(args.top_k)
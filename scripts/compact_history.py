@@ -0,0 +1,48 @@
+import argparse
+import logging
+from datetime import datetime, timedelta, timezone
+
+from src.core.crud import HISTORY_BUCKETS, compact_book_history
+from src.core.database import SessionLocal
+from src.core.logging_config import setup_pipeline_logging
+
+
+def main(older_than_days: int, bucket: str):
+    """Compacta o histórico de preço/estoque mais antigo que `older_than_days`."""
+    setup_pipeline_logging()
+    logger = logging.getLogger(__name__)
+
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    db = None
+    try:
+        db = SessionLocal()
+        removed = compact_book_history(db, older_than=cutoff, bucket=bucket)
+        db.commit()
+        logger.info(
+            f"Histórico anterior a {cutoff:%Y-%m-%d} compactado por '{bucket}': "
+            f"{removed} registros removidos."
+        )
+    finally:
+        if db:
+            db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Reduz o histórico antigo de preço/estoque (book_snapshots) a "
+        "um registro por livro por período."
+    )
+    parser.add_argument(
+        "--older_than_days",
+        type=int,
+        default=90,
+        help="Só compacta registros mais antigos que esse número de dias.",
+    )
+    parser.add_argument(
+        "--bucket",
+        choices=sorted(HISTORY_BUCKETS),
+        default="day",
+        help="Período de agrupamento: mantém o último registro de cada período.",
+    )
+    args = parser.parse_args()
+    main(args.older_than_days, args.bucket)
@@ -0,0 +1,204 @@
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    page INTEGER PRIMARY KEY,
+    status TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    page INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    content_hash TEXT,
+    listing_hash TEXT,
+    upc TEXT,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_urls_page_status ON urls (page, status);
+"""
+
+# Estados de uma URL: descoberta na página de catálogo, capturada (linha já
+# gravada no CSV, ou conteúdo igual ao do crawl anterior), desistida (foi para
+# as dead letters) ou ainda não revisitada no crawl de atualização atual
+PENDING, DONE, FAILED, STALE = "pending", "done", "failed", "stale"
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class CrawlFrontier:
+    """
+    Estado durável de um crawl em um pequeno arquivo SQLite: o status de cada
+    página de catálogo e de cada URL de livro (com o hash do conteúdo e o UPC).
+
+    Cada URL é marcada como concluída logo depois que sua linha é gravada no
+    CSV, então um crawl interrompido (inclusive no meio de uma página, com
+    vários workers) recomeça exatamente nas URLs que faltavam, sem reler o CSV
+    nem baixar de novo o que já foi capturado.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+        columns = {
+            row[1] for row in self._connection.execute("PRAGMA table_info(urls)")
+        }
+        if "listing_hash" not in columns:
+            # Frontiers criados antes do modo listing
+            self._connection.execute("ALTER TABLE urls ADD COLUMN listing_hash TEXT")
+        self._lock = threading.Lock()
+
+    @classmethod
+    def reset(cls, path: str) -> "CrawlFrontier":
+        """Apaga o estado anterior (crawl do zero) e abre um frontier vazio."""
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        return cls(path)
+
+    def close(self):
+        self._connection.close()
+
+    def _execute(self, sql: str, params: Iterable = ()):
+        with self._lock:
+            return self._connection.execute(sql, tuple(params)).fetchall()
+
+    def page_status(self, page: int) -> Optional[str]:
+        rows = self._execute("SELECT status FROM pages WHERE page = ?", (page,))
+        return rows[0][0] if rows else None
+
+    def completed_pages(self) -> Set[int]:
+        rows = self._execute("SELECT page FROM pages WHERE status = ?", (DONE,))
+        return {row[0] for row in rows}
+
+    def pending_urls(self, page: int) -> list:
+        """URLs da página que ainda não foram capturadas nem desistidas."""
+        return [
+            row[0]
+            for row in self._execute(
+                "SELECT url FROM urls WHERE page = ? AND status = ? ORDER BY rowid",
+                (page, PENDING),
+            )
+        ]
+
+    def add_page_links(self, page: int, urls: Iterable[str]):
+        """
+        Registra as URLs descobertas na página. URLs já resolvidas neste crawl
+        são mantidas; as do crawl anterior (STALE) voltam a ficar pendentes.
+        """
+        now = _now()
+        with self._lock, self._connection:
+            self._connection.execute("BEGIN")
+            self._connection.executemany(
+                "INSERT INTO urls (url, page, status, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (url) DO UPDATE SET page = excluded.page, "
+                "status = excluded.status, updated_at = excluded.updated_at "
+                f"WHERE urls.status = '{STALE}'",
+                [(url, page, PENDING, now) for url in urls],
+            )
+            self._connection.execute(
+                "INSERT OR REPLACE INTO pages (page, status, updated_at) "
+                "VALUES (?, ?, ?)",
+                (page, PENDING, now),
+            )
+
+    def mark_done(
+        self,
+        url: str,
+        content_hash: Optional[str],
+        upc: Optional[str],
+        listing_hash: Optional[str] = None,
+    ):
+        # O hash da listagem só é gravado quando a URL é resolvida, para que um
+        # crawl interrompido ainda compare as pendentes com o do crawl anterior
+        self._execute(
+            "UPDATE urls SET status = ?, content_hash = ?, upc = ?, "
+            "listing_hash = COALESCE(?, listing_hash), updated_at = ? WHERE url = ?",
+            (DONE, content_hash, upc, listing_hash, _now(), url),
+        )
+
+    def mark_unchanged(self, url: str, listing_hash: Optional[str] = None):
+        """Conteúdo igual ao do crawl anterior: resolvida, mantendo hash e UPC."""
+        self._execute(
+            "UPDATE urls SET status = ?, listing_hash = COALESCE(?, listing_hash), "
+            "updated_at = ? WHERE url = ?",
+            (DONE, listing_hash, _now(), url),
+        )
+
+    def mark_failed(self, url: str):
+        # Sem o hash da listagem, o modo listing visita a página de novo
+        self._execute(
+            "UPDATE urls SET status = ?, listing_hash = NULL, updated_at = ? "
+            "WHERE url = ?",
+            (FAILED, _now(), url),
+        )
+
+    def mark_page_done(self, page: int):
+        self._execute(
+            "UPDATE pages SET status = ?, updated_at = ? WHERE page = ?",
+            (DONE, _now(), page),
+        )
+
+    def scraped_upcs(self) -> Set[str]:
+        return {
+            row[0]
+            for row in self._execute(
+                "SELECT upc FROM urls WHERE status = ? AND upc IS NOT NULL", (DONE,)
+            )
+        }
+
+    def content_hashes(self) -> Dict[str, str]:
+        """Hash do último conteúdo capturado de cada URL."""
+        return dict(
+            self._execute(
+                "SELECT url, content_hash FROM urls WHERE content_hash IS NOT NULL"
+            )
+        )
+
+    def listing_hashes(self) -> Dict[str, str]:
+        """Hash dos dados de listagem de cada URL no último crawl."""
+        return dict(
+            self._execute(
+                "SELECT url, listing_hash FROM urls WHERE listing_hash IS NOT NULL"
+            )
+        )
+
+    def start_refresh(self):
+        """
+        Começa um crawl de atualização: todas as páginas voltam a ser visitadas
+        e as URLs conhecidas ficam STALE até serem revisitadas (os hashes do
+        crawl anterior são mantidos para a comparação).
+        """
+        with self._lock, self._connection:
+            self._connection.execute("BEGIN")
+            self._connection.execute("DELETE FROM pages")
+            self._connection.execute(
+                "UPDATE urls SET status = ?, updated_at = ?", (STALE, _now())
+            )
+
+    def stale_count(self) -> int:
+        """URLs do crawl anterior que não apareceram mais nas listagens."""
+        rows = self._execute("SELECT COUNT(*) FROM urls WHERE status = ?", (STALE,))
+        return rows[0][0]
+
+    def first_incomplete_page(self) -> int:
+        """Primeira página sem todas as URLs resolvidas (1 se nada foi feito)."""
+        completed = self.completed_pages()
+        page = 1
+        while page in completed:
+            page += 1
+        return page
@@ -1,18 +1,51 @@
-import csv
 import argparse
 import logging
 import os
-from decimal import Decimal, InvalidOperation
+import time
+from datetime import datetime, timezone
+from typing import Iterator, Optional
 
+from sqlalchemy import create_engine
 from sqlalchemy.orm import Session
-from src.core.database import SessionLocal
-from src.core.models import Book
+from src.core.config import get_settings
+from src.core.crud import (
+    TRACKED_FIELDS,
+    add_books_to_categories,
+    bump_data_version,
+    delete_book_history,
+    get_data_version,
+    rebuild_categories,
+    record_book_changes,
+    record_book_snapshots,
+    record_catalog_changes,
+    record_new_books,
+    update_categories_for_changes,
+)
+from src.core.database import SessionLocal, engine
+from src.core.models import Book, BookRelated
 from src.core.logging_config import setup_pipeline_logging
+from src.core.related import update_related
+from src.core.reload import (
+    catalog_checksum,
+    create_shadow_copy,
+    sqlite_path,
+    swap_database,
+    validate_shadow,
+)
+from src.core.snapshot import write_snapshot
+from src.core.validation import BatchValidator
 
 
-def load_data_from_csv(db: Session, csv_filename: str, clear_table: bool):
+def load_data_from_csv(
+    db: Session,
+    csv_filename: str,
+    clear_table: bool,
+    rejects_file: Optional[str] = None,
+):
     """
     Lê um arquivo CSV e carrega os dados para a tabela de livros no banco de dados.
+    Linhas com campos inválidos são puladas e, com `rejects_file`, descritas
+    campo a campo nesse arquivo.
     """
     logger = logging.getLogger(__name__)
 
@@ -20,69 +53,278 @@ def load_data_from_csv(db: Session, csv_filename: str, clear_table: bool):
         logger.error(f"Arquivo CSV não encontrado em: {csv_filename}")
         return
 
+    # Com --clear_table, o estado de cada livro antes da limpeza: os que
+    # voltarem no CSV são reinseridos com o mesmo id e mantêm o histórico
+    previous = {}
     if clear_table:
         logger.info("A flag --clear_table foi usada. Limpando a tabela 'books'...")
+        delete_book_history(db)
+        previous = {
+            book.upc: book
+            for book in db.query(
+                Book.id, Book.upc, Book.price, Book.quantity, Book.rating
+            ).all()
+        }
+        removed = [book.id for book in previous.values()]
+        db.query(BookRelated).delete()
         db.query(Book).delete()
+        rebuild_categories(db)
+        version = bump_data_version(db)
+        record_catalog_changes(db, version, datetime.now(timezone.utc), deleted=removed)
         db.commit()
         logger.info("Tabela 'books' limpa com sucesso.")
 
-    existing_upcs = {book.upc for book in db.query(Book.upc).all()}
+    # Estado atual de cada livro, para detectar mudanças de preço/estoque/nota
+    # (e a categoria, para ajustar os agregados só com a diferença)
+    existing = {
+        book.upc: book
+        for book in db.query(
+            Book.id, Book.upc, Book.price, Book.quantity, Book.rating, Book.category_id
+        ).all()
+    }
     logger.info(
-        f"Encontrados {len(existing_upcs)} livros existentes no banco de dados. "
-        "Pulando duplicatas."
+        f"Encontrados {len(existing)} livros existentes no banco de dados. "
+        "Livros sem mudanças serão pulados."
     )
 
-    books_to_add = []
-    with open(csv_filename, "r", newline="", encoding="utf-8") as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            upc = row.get("upc")
-            if upc in existing_upcs:
-                logger.debug(f"Pulando livro com UPC já existente: {upc}")
-                continue
-
-            try:
-                book_data = {
-                    "upc": upc,
-                    "book_name": row.get("book_name"),
-                    "currency": row.get("currency"),
-                    "price": Decimal(row.get("price", "0.00")),
-                    "quantity": int(row.get("quantity", 0)),
-                    "availability": row.get("availability", "False").lower() == "true",
-                    "rating": int(row.get("rating", 0)),
-                    "number_of_reviews": int(row.get("number_of_reviews", 0)),
-                    "category": row.get("category"),
-                    "description": row.get("description"),
-                    "image_url": row.get("image_url"),
-                    "source_page": int(row.get("source_page", 0)),
-                }
-                books_to_add.append(Book(**book_data))
-                existing_upcs.add(upc)
-            except (ValueError, InvalidOperation, TypeError) as e:
-                logger.error(
-                    f"Erro ao processar linha com UPC {upc}: {e} - Linha ignorada."
-                )
+    validator = BatchValidator(rejects_file)
+    books_to_add, changes = read_csv_changes(csv_filename, existing, validator)
+    validator.log_summary()
+    restored_changes = []
+    removed_ids = []
+    if clear_table:
+        restored_changes = restore_book_ids(books_to_add, previous)
+        restored = {book.id for book in books_to_add if book.id is not None}
+        # Livros que saíram do catálogo levam o histórico junto
+        removed_ids = [book.id for book in previous.values() if book.id not in restored]
+        delete_book_history(db, removed_ids)
+        logger.info(
+            f"{len(restored)} livros recarregados com o id anterior "
+            f"({len(restored_changes)} com preço/estoque alterado)."
+        )
 
+    if not books_to_add and not changes:
+        logger.info("Nenhum livro novo ou alterado para adicionar.")
+        # Com --clear_table, ainda há o histórico dos livros removidos a apagar
+        db.commit()
+        return
+
+    captured_at = datetime.now(timezone.utc)
     if books_to_add:
         logger.info(
             f"Adicionando {len(books_to_add)} novos livros ao banco de dados..."
         )
+        # Agregados por categoria atualizados só com os livros novos (antes do
+        # add_all, para que os livros já sejam inseridos com o category_id)
+        add_books_to_categories(db, books_to_add)
+        # Os livros com id anterior vão primeiro: o SQLite numera os demais a
+        # partir do maior id já presente, sem colidir com eles
+        books_to_add.sort(key=lambda book: book.id is None)
+        new_books = [book for book in books_to_add if book.id is None]
         db.add_all(books_to_add)
-        db.commit()
-        logger.info("Novos livros adicionados com sucesso.")
-    else:
-        logger.info("Nenhum livro novo para adicionar.")
+        db.flush()
+        # Histórico: primeiro registro dos livros novos e, dos recarregados, só
+        # os que mudaram
+        record_new_books(db, new_books, captured_at)
+        record_book_snapshots(db, restored_changes, captured_at)
+    if changes:
+        logger.info(f"Atualizando {len(changes)} livros com preço/estoque alterado...")
+        record_book_changes(db, changes, captured_at)
+        update_categories_for_changes(db, changes)
+    refresh_related_books(
+        db,
+        [book.id for book in books_to_add]
+        + [
+            current.id for current, data in changes if affects_similarity(current, data)
+        ],
+        removed_ids,
+    )
+    version = bump_data_version(db)
+    # Feed de mudanças (/api/v1/books/changes) no mesmo commit da nova versão
+    record_catalog_changes(
+        db,
+        version,
+        captured_at,
+        inserted=[book.id for book in books_to_add],
+        updated=[current.id for current, _ in changes],
+    )
+    db.commit()
+    logger.info(
+        f"Carga concluída: {len(books_to_add)} novos, {len(changes)} alterados "
+        f"(versão {version})."
+    )
+
+
+def restore_book_ids(books: list, previous: dict) -> list:
+    """
+    Devolve aos livros recarregados depois do `--clear_table` o id que tinham
+    (`previous`, por UPC). Retorna [(estado anterior, novos dados)] dos que
+    voltaram com preço, estoque ou avaliação diferente.
+    """
+    changed = []
+    for book in books:
+        current = previous.get(book.upc)
+        if current is None:
+            continue
+        book.id = current.id
+        data = {field: getattr(book, field) for field in TRACKED_FIELDS}
+        if any(data[f] != getattr(current, f) for f in TRACKED_FIELDS):
+            changed.append((current, data))
+    return changed
+
+
+def affects_similarity(current, data: dict) -> bool:
+    # O estoque não entra na similaridade dos livros parecidos
+    return data["price"] != current.price or data["rating"] != current.rating
+
+
+def refresh_related_books(
+    db: Session, book_ids: list, removed_ids: Optional[list] = None
+):
+    """
+    Atualiza os livros parecidos (`book_related`) dos livros novos ou
+    alterados e dos vizinhos afetados, e tira os livros removidos
+    (`removed_ids`) das listas. Não faz commit.
+    """
+    logger = logging.getLogger(__name__)
+    top_k = get_settings().RELATED_BOOKS_TOP_K
+    if not top_k or not (book_ids or removed_ids):
+        return
+    start = time.perf_counter()
+    lists = update_related(db, book_ids, top_k, removed_ids or ())
+    logger.info(
+        f"Livros parecidos: {lists} listas gravadas em "
+        f"{time.perf_counter() - start:.2f}s."
+    )
+
+
+def read_csv_changes(
+    csv_filename: str, existing: dict, validator: Optional[BatchValidator] = None
+):
+    """
+    Lê o CSV e separa os livros novos dos já existentes cujo preço, estoque ou
+    avaliação mudou. Retorna (livros novos, [(estado atual, novos dados)]).
+    """
+    logger = logging.getLogger(__name__)
+    books_to_add = []
+    changes = []
+    seen_upcs = set()
+    for book_data in iter_book_rows(csv_filename, validator):
+        upc = book_data["upc"]
+        if upc in seen_upcs:
+            logger.debug(f"Pulando UPC repetido no CSV: {upc}")
+            continue
+        seen_upcs.add(upc)
 
+        current = existing.get(upc)
+        if current is None:
+            books_to_add.append(Book(**book_data))
+        elif any(book_data[f] != getattr(current, f) for f in TRACKED_FIELDS):
+            changes.append((current, book_data))
+    return books_to_add, changes
 
-def main(csv_filename: str, clear_table: bool):
+
+def iter_book_rows(
+    filename: str, validator: Optional[BatchValidator] = None
+) -> Iterator[dict]:
+    """
+    Os livros válidos do arquivo (CSV ou `.bkcol`, formato colunar do
+    scraper), já com os campos de `Book` tipados. A conversão e a validação
+    são feitas em lotes por `BatchValidator`; linhas com algum campo inválido
+    ficam de fora (e vão para o arquivo de rejeitados do `validator`).
+    """
+    validator = validator or BatchValidator()
+    for batch in validator.batches(filename):
+        yield from batch
+
+
+def expected_catalog(csv_filename: str, existing_rows) -> tuple:
+    """
+    Contagem e checksum (`reload.catalog_checksum`) que o catálogo deve ter
+    depois da carga, calculados de forma independente a partir do CSV e dos
+    livros existentes, com as mesmas regras de `read_csv_changes`.
+    """
+    state = {row[0]: tuple(row) for row in existing_rows}
+    seen_upcs = set()
+    for data in iter_book_rows(csv_filename):
+        upc = data["upc"]
+        if upc in seen_upcs:
+            continue
+        seen_upcs.add(upc)
+        state[upc] = (upc, data["price"], data["quantity"], data["rating"])
+    return catalog_checksum(state.values())
+
+
+def reload_atomically(
+    csv_filename: str, clear_table: bool, rejects_file: Optional[str] = None
+) -> bool:
+    """
+    Carrega o CSV em uma cópia de trabalho do banco, valida a cópia e a coloca
+    no lugar do banco em uso de uma vez. Durante a carga a API continua lendo
+    o banco antigo sem bloqueios; se algo falhar, o banco em uso não muda.
+    Retorna True se o banco foi substituído.
+    """
+    logger = logging.getLogger(__name__)
+    live_path = sqlite_path(engine.url)
+    shadow_path = f"{live_path}.reload"
+    logger.info(f"Recarga atômica: copiando '{live_path}' para '{shadow_path}'...")
+    create_shadow_copy(live_path, shadow_path)
+
+    shadow_engine = create_engine(f"sqlite:///{shadow_path}")
+    try:
+        with Session(bind=shadow_engine) as db:
+            existing = (
+                []
+                if clear_table
+                else db.query(Book.upc, Book.price, Book.quantity, Book.rating).all()
+            )
+            expected = expected_catalog(csv_filename, existing)
+            version = get_data_version(db)
+            load_data_from_csv(db, csv_filename, clear_table, rejects_file)
+            changed = get_data_version(db) != version
+        if changed:
+            validate_shadow(shadow_engine, expected)
+    except Exception:
+        os.remove(shadow_path)
+        raise
+    finally:
+        shadow_engine.dispose()
+
+    if not changed:
+        os.remove(shadow_path)
+        logger.info("Nada mudou; o banco em uso foi mantido.")
+        return False
+    swap_database(shadow_path, live_path)
+    return True
+
+
+def main(
+    csv_filename: str,
+    clear_table: bool,
+    build_snapshot: bool = False,
+    atomic: bool = False,
+    rejects_file: Optional[str] = None,
+):
     """Função principal para carregar dados do CSV para o banco."""
     setup_pipeline_logging()
     logger = logging.getLogger(__name__)
 
+    if atomic and not os.path.exists(csv_filename):
+        logger.error(f"Arquivo CSV não encontrado em: {csv_filename}")
+        return
+
     db = None
     try:
+        if atomic:
+            reload_atomically(csv_filename, clear_table, rejects_file)
         db = SessionLocal()
-        load_data_from_csv(db, csv_filename, clear_table)
+        if not atomic:
+            load_data_from_csv(db, csv_filename, clear_table, rejects_file)
+        settings = get_settings()
+        # O snapshot é regravado só depois do commit, e a troca do arquivo é
+        # atômica: os workers passam a servir a nova versão de uma vez
+        if build_snapshot or settings.SERVING_MODE.lower() == "snapshot":
+            write_snapshot(db, settings.CATALOG_SNAPSHOT_PATH)
     finally:
         if db:
             db.close()
@@ -96,7 +338,8 @@ if __name__ == "__main__":
     parser.add_argument(
         "--csv_name",
         default="books_data_detailed.csv",
-        help="Caminho para o arquivo CSV a ser carregado.",
+        help="Caminho para o arquivo CSV (ou .bkcol, formato colunar) a ser "
+        "carregado.",
     )
     parser.add_argument(
         "--clear_table",
@@ -105,5 +348,26 @@ if __name__ == "__main__":
         "de carregar os novos dados.",
     )
 
+    parser.add_argument(
+        "--snapshot",
+        action="store_true",
+        help="Regrava o snapshot do catálogo (CATALOG_SNAPSHOT_PATH) ao final, "
+        "mesmo fora do modo SERVING_MODE=snapshot.",
+    )
+
+    parser.add_argument(
+        "--atomic",
+        action="store_true",
+        help="Carrega em uma cópia do banco SQLite, valida (contagem e checksum) "
+        "e troca o arquivo de uma vez: a API nunca vê o catálogo vazio ou parcial.",
+    )
+
+    parser.add_argument(
+        "--rejects",
+        help="CSV com as linhas rejeitadas na validação, um erro por campo "
+        "(padrão: <csv_name sem extensão>_rejects.csv).",
+    )
+
     args = parser.parse_args()
-    main(args.csv_name, args.clear_table)
+    rejects = args.rejects or os.path.splitext(args.csv_name)[0] + "_rejects.csv"
+    main(args.csv_name, args.clear_table, args.snapshot, args.atomic, rejects)
@@ -0,0 +1,45 @@
+import argparse
+import logging
+import os
+
+from src.core.columnar import DEFAULT_CHUNK_ROWS, SUFFIX, convert_csv
+from src.core.logging_config import setup_pipeline_logging
+
+
+def main(csv_filename: str, output: str, chunk_size: int = DEFAULT_CHUNK_ROWS):
+    """Converte um CSV do scraper para o formato colunar (`.bkcol`)."""
+    setup_pipeline_logging()
+    logger = logging.getLogger(__name__)
+
+    if not os.path.exists(csv_filename):
+        logger.error(f"Arquivo CSV não encontrado em: {csv_filename}")
+        return
+    rows = convert_csv(csv_filename, output, chunk_size)
+    logger.info(
+        f"{rows} livros convertidos para '{output}' "
+        f"({os.path.getsize(csv_filename)} -> {os.path.getsize(output)} bytes)."
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Converte um CSV do scraper para o formato colunar comprimido."
+    )
+    parser.add_argument(
+        "--csv_name",
+        default="books_data_detailed.csv",
+        help="Caminho para o arquivo CSV a ser convertido.",
+    )
+    parser.add_argument(
+        "--output", help=f"Arquivo de saída (padrão: <csv_name sem extensão>{SUFFIX})."
+    )
+    parser.add_argument(
+        "--chunk_size",
+        type=int,
+        default=DEFAULT_CHUNK_ROWS,
+        help="Linhas por bloco (cada bloco guarda mínimo/máximo de cada coluna).",
+    )
+
+    args = parser.parse_args()
+    output = args.output or os.path.splitext(args.csv_name)[0] + SUFFIX
+    main(args.csv_name, output, args.chunk_size)
@@ -0,0 +1,215 @@
+import argparse
+import logging
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional
+
+import httpx
+from sqlalchemy import exists
+from sqlalchemy.orm import Session
+
+from scripts.request_scheduler import RequestScheduler, RetriesExhausted
+from src.core import images
+from src.core.config import get_settings
+from src.core.database import SessionLocal
+from src.core.images import THUMBNAIL, ImageStore, make_thumbnail, sniff_content_type
+from src.core.logging_config import setup_pipeline_logging
+from src.core.models import Book, BookImage
+
+# Linhas de book_images gravadas por commit
+COMMIT_EVERY = 500
+
+
+@dataclass
+class Cover:
+    """Capa baixada e gravada no diretório de imagens."""
+
+    url: str
+    content_hash: str
+    content_type: str
+    size_bytes: int
+    new_file: bool
+
+
+def pending_cover_urls(db: Session, refetch: bool = False) -> List[str]:
+    """URLs de capa dos livros ainda não baixadas (todas, com `refetch`)."""
+    query = db.query(Book.image_url).filter(
+        Book.image_url.isnot(None), Book.image_url != ""
+    )
+    if not refetch:
+        query = query.filter(~exists().where(BookImage.source_url == Book.image_url))
+    return [row[0] for row in query.distinct().order_by(Book.image_url)]
+
+
+def download_cover(
+    url: str, scheduler: RequestScheduler, store: ImageStore
+) -> Optional[Cover]:
+    """Baixa a capa e a grava no diretório (se o conteúdo ainda não existir)."""
+    logger = logging.getLogger(__name__)
+    try:
+        response = scheduler.get(url)
+        response.raise_for_status()
+    except RetriesExhausted as e:
+        logger.error(f"Capa {url} falhou em todas as tentativas: {e.reason}")
+        return None
+    except httpx.HTTPStatusError as e:
+        logger.error(f"Erro de status HTTP ao baixar a capa {url}: {e}")
+        return None
+    content_type = sniff_content_type(response.content)
+    if content_type is None:
+        logger.warning(f"Conteúdo de {url} não é uma imagem reconhecida; ignorado.")
+        return None
+    digest, new_file = store.put(response.content)
+    return Cover(url, digest, content_type, len(response.content), new_file)
+
+
+def fetch_covers(
+    db: Session,
+    scheduler: RequestScheduler,
+    store: ImageStore,
+    urls: Iterable[str],
+    workers: int = 4,
+) -> Counter:
+    """
+    Baixa as capas com até `workers` threads (os limites por host ficam com o
+    `scheduler`) e registra cada URL em `book_images`. Conteúdos repetidos
+    (mesmo hash) são gravados uma vez só. Retorna a contagem de capas
+    baixadas, arquivos novos, repetidas e falhas.
+    """
+    counts = Counter()
+    fetched_at = datetime.now(timezone.utc)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for cover in executor.map(
+            lambda url: download_cover(url, scheduler, store), urls
+        ):
+            if cover is None:
+                counts["failed"] += 1
+                continue
+            counts["downloaded"] += 1
+            counts["new_files" if cover.new_file else "duplicates"] += 1
+            db.merge(
+                BookImage(
+                    source_url=cover.url,
+                    content_hash=cover.content_hash,
+                    content_type=cover.content_type,
+                    size_bytes=cover.size_bytes,
+                    fetched_at=fetched_at,
+                )
+            )
+            if counts["downloaded"] % COMMIT_EVERY == 0:
+                db.commit()
+    db.commit()
+    return counts
+
+
+def build_thumbnails(
+    db: Session, store: ImageStore, max_size: int, workers: Optional[int] = None
+) -> int:
+    """
+    Gera, em um pool de processos, as miniaturas que ainda faltam (de todas as
+    imagens registradas, não só as desta execução). Retorna quantas gerou.
+    """
+    logger = logging.getLogger(__name__)
+    digests = [row[0] for row in db.query(BookImage.content_hash).distinct()]
+    missing = [d for d in digests if not store.exists(d, THUMBNAIL)]
+    if not missing:
+        return 0
+    if images.Image is None:
+        logger.warning(
+            f"Pillow não instalado: {len(missing)} miniaturas não geradas (a API "
+            "serve a imagem original no lugar)."
+        )
+        return 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            make_thumbnail,
+            [store.path(d) for d in missing],
+            [store.path(d, THUMBNAIL) for d in missing],
+            [max_size] * len(missing),
+            chunksize=16,
+        )
+        return sum(results)
+
+
+def main(
+    workers: int = 4,
+    requests_per_second: float = 5.0,
+    max_retries: int = 4,
+    thumbnail_workers: Optional[int] = None,
+    refetch: bool = False,
+):
+    """Baixa as capas pendentes e gera as miniaturas que faltam."""
+    setup_pipeline_logging()
+    logger = logging.getLogger(__name__)
+    settings = get_settings()
+    store = ImageStore(settings.IMAGES_DIR)
+
+    with (
+        SessionLocal() as db,
+        httpx.Client(timeout=20.0, follow_redirects=True) as client,
+    ):
+        urls = pending_cover_urls(db, refetch)
+        logger.info(f"{len(urls)} capas para baixar em '{settings.IMAGES_DIR}'...")
+        scheduler = RequestScheduler(
+            client,
+            max_concurrency=workers,
+            requests_per_second=requests_per_second,
+            max_retries=max_retries,
+        )
+        counts = fetch_covers(db, scheduler, store, urls, workers)
+        counts["thumbnails"] = build_thumbnails(
+            db, store, settings.IMAGE_THUMBNAIL_SIZE, thumbnail_workers
+        )
+    logger.info(f"Requisições: {scheduler.stats}")
+    logger.info(f"Capas: {dict(counts)}")
+    if counts["failed"]:
+        logger.warning(
+            f"{counts['failed']} capas falharam; serão tentadas de novo na próxima "
+            "execução."
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Baixa as capas dos livros para o diretório de imagens da API "
+        "(IMAGES_DIR) e gera as miniaturas."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Capas baixadas em paralelo (e limite de conexões simultâneas ao host).",
+    )
+    parser.add_argument(
+        "--rps",
+        type=float,
+        default=5.0,
+        help="Máximo de requisições por segundo ao host.",
+    )
+    parser.add_argument(
+        "--max_retries",
+        type=int,
+        default=4,
+        help="Novas tentativas para timeouts, erros de conexão, 429 e 5xx.",
+    )
+    parser.add_argument(
+        "--thumbnail_workers",
+        type=int,
+        help="Processos que geram as miniaturas (padrão: número de CPUs).",
+    )
+    parser.add_argument(
+        "--refetch",
+        action="store_true",
+        help="Baixa de novo todas as capas, inclusive as já registradas.",
+    )
+
+    args = parser.parse_args()
+    main(
+        args.workers,
+        args.rps,
+        args.max_retries,
+        args.thumbnail_workers,
+        args.refetch,
+    )
@@ -0,0 +1,183 @@
+import json
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Respostas tratadas como falhas transitórias (tentadas de novo)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# Respostas que indicam sobrecarga na origem: reduzem a taxa do host
+THROTTLE_STATUS = {429, 503}
+
+
+class RetriesExhausted(Exception):
+    """A URL falhou em todas as tentativas e foi para a lista de dead letters."""
+
+    def __init__(self, url: str, reason: str):
+        super().__init__(f"{url}: {reason}")
+        self.url = url
+        self.reason = reason
+
+
+@dataclass
+class HostState:
+    """Limites e taxa atual (requisições/s) de um host."""
+
+    rate: float
+    semaphore: threading.Semaphore
+    next_slot: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class RequestScheduler:
+    """
+    Faz as requisições do scraper respeitando a origem.
+
+    * Por host: no máximo `max_concurrency` requisições simultâneas e um
+      espaçamento mínimo de 1/taxa entre elas (um token bucket de capacidade 1).
+    * Falhas transitórias (timeout, erro de conexão, 429 e 5xx) são tentadas de
+      novo até `max_retries` vezes, com backoff exponencial e jitter
+      (respeitando `Retry-After`, quando enviado).
+    * A taxa se adapta (AIMD): cai pela metade a cada 429/503 ou resposta mais
+      lenta que `target_latency`, e sobe `rate_step` a cada sucesso, até
+      `requests_per_second`.
+    * URLs que esgotam as tentativas vão para `dead_letters` (e para o arquivo
+      `dead_letter_path`, uma linha JSON por URL) para uma nova passada depois.
+    """
+
+    def __init__(
+        self,
+        client: httpx.Client,
+        max_concurrency: int = 4,
+        requests_per_second: float = 5.0,
+        min_requests_per_second: float = 0.2,
+        rate_step: float = 0.2,
+        target_latency: float = 2.0,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        dead_letter_path: Optional[str] = None,
+    ):
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self.max_rate = requests_per_second
+        self.min_rate = min(min_requests_per_second, requests_per_second)
+        self.rate_step = rate_step
+        self.target_latency = target_latency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.dead_letter_path = dead_letter_path
+        self.dead_letters: List[Dict] = []
+        self.stats = {"requests": 0, "retries": 0, "throttled": 0, "failed": 0}
+        self._hosts: Dict[str, HostState] = {}
+        self._lock = threading.Lock()
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _host(self, url: str) -> HostState:
+        host = httpx.URL(url).host
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = HostState(
+                    rate=self.max_rate,
+                    semaphore=threading.Semaphore(self.max_concurrency),
+                )
+            return self._hosts[host]
+
+    def _wait_for_slot(self, state: HostState):
+        with state.lock:
+            now = time.monotonic()
+            slot = max(now, state.next_slot)
+            state.next_slot = slot + 1 / state.rate
+        if slot > now:
+            time.sleep(slot - now)
+
+    def _adapt(self, state: HostState, latency: float, throttled: bool):
+        with state.lock:
+            if throttled or latency > self.target_latency:
+                state.rate = max(self.min_rate, state.rate / 2)
+            else:
+                state.rate = min(self.max_rate, state.rate + self.rate_step)
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        retry_after = (
+            response.headers.get("Retry-After") if response is not None else None
+        )
+        if retry_after is not None:
+            try:
+                return min(self.backoff_max, float(retry_after))
+            except ValueError:
+                pass
+        cap = min(self.backoff_max, self.backoff_base * 2**attempt)
+        return random.uniform(cap / 2, cap)
+
+    def _attempt(self, state: HostState, url: str, **kwargs):
+        """Uma tentativa: (resposta ou None, motivo da falha ou None)."""
+        self._wait_for_slot(state)
+        start = time.monotonic()
+        with state.semaphore:
+            try:
+                response = self.client.get(url, **kwargs)
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                self._adapt(state, time.monotonic() - start, throttled=True)
+                return None, f"{type(e).__name__}: {e}"
+        throttled = response.status_code in THROTTLE_STATUS
+        if throttled:
+            self._count("throttled")
+        self._adapt(state, time.monotonic() - start, throttled)
+        if response.status_code in RETRYABLE_STATUS:
+            return response, f"HTTP {response.status_code}"
+        return response, None
+
+    def get(self, url: str, page: Optional[int] = None, **kwargs) -> httpx.Response:
+        """
+        GET com limites, retentativas e backoff. Respostas não transitórias
+        (inclusive 404) são devolvidas normalmente; se todas as tentativas
+        falharem, registra a URL como dead letter e levanta RetriesExhausted.
+        `page` é guardada na dead letter para a nova passada.
+        """
+        state = self._host(url)
+        for attempt in range(self.max_retries + 1):
+            self._count("requests")
+            response, reason = self._attempt(state, url, **kwargs)
+            if reason is None:
+                return response
+            if attempt < self.max_retries:
+                self._count("retries")
+                delay = self._backoff(attempt, response)
+                logger.debug(f"{reason} em {url}; nova tentativa em {delay:.2f}s.")
+                time.sleep(delay)
+        self._record_dead_letter(url, page, reason)
+        raise RetriesExhausted(url, reason)
+
+    def _record_dead_letter(self, url: str, page: Optional[int], reason: str):
+        entry = {
+            "url": url,
+            "page": page,
+            "reason": reason,
+            "attempts": self.max_retries + 1,
+            "failed_at": datetime.now(timezone.utc).isoformat(),
+        }
+        logger.error(f"Desistindo de {url} após {entry['attempts']} tentativas.")
+        with self._lock:
+            self.stats["failed"] += 1
+            self.dead_letters.append(entry)
+            if self.dead_letter_path:
+                with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry) + "\n")
+
+
+def read_dead_letters(path: str) -> List[Dict]:
+    """Lê o arquivo de dead letters (uma entrada JSON por linha)."""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
@@ -1,21 +1,35 @@
 import csv
+import hashlib
 import httpx
 import argparse
 import re
 import os
 import logging
 from bs4 import BeautifulSoup
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from typing import List, Dict, Optional, Iterable
 from decimal import Decimal, InvalidOperation
 
+from scripts.crawl_frontier import DONE, PENDING, CrawlFrontier
+from scripts.request_scheduler import (
+    RequestScheduler,
+    RetriesExhausted,
+    read_dead_letters,
+)
+from src.core.columnar import COLUMNS, ColumnarReader, ColumnarWriter, is_columnar
 from src.core.logging_config import setup_pipeline_logging
 
 BASE_URL = "https://books.toscrape.com/"
 CATALOGUE_URL = f"{BASE_URL}catalogue/"
 RATING_MAP = {"One": 1, "Two": 2, "Three": 3, "Four": 4, "Five": 5}
+CATALOGUE_PAGE_RE = re.compile(r"/page-\d+\.html$")
+DEFAULT_DELTA_FILE = "books_delta.csv"
+HEADERS = list(COLUMNS)
 
 
-def get_total_pages(client: httpx.Client) -> int:
+def get_total_pages(scheduler: RequestScheduler) -> int:
     """
     Raspa a primeira página do catálogo para descobrir o número total de páginas.
     Retorna 50 como um valor padrão em caso de erro.
@@ -23,7 +37,7 @@ def get_total_pages(client: httpx.Client) -> int:
     logger = logging.getLogger(__name__)
     url = f"{CATALOGUE_URL}page-1.html"
     try:
-        response = client.get(url)
+        response = scheduler.get(url, page=1)
         response.raise_for_status()
         soup = BeautifulSoup(response.text, "lxml")
         # Encontra o texto "Page 1 of 50"
@@ -42,91 +56,172 @@ def get_total_pages(client: httpx.Client) -> int:
     return 50
 
 
-def scrape_book_details(
-    book_url: str, page_number: int, client: httpx.Client
-) -> Optional[Dict]:
+def configure_base_url(base_url: str):
+    """Altera o site de origem (ex.: um espelho local usado em benchmarks)."""
+    global BASE_URL, CATALOGUE_URL
+    BASE_URL = base_url.rstrip("/") + "/"
+    CATALOGUE_URL = f"{BASE_URL}catalogue/"
+
+
+def parse_book_details(html: str, page_number: int) -> Dict:
     """
-    Entra na página de um livro específico e extrai todos os detalhes.
+    Extrai todos os detalhes de um livro a partir do HTML da sua página.
+    Levanta exceção se a página não tiver a estrutura esperada.
     """
-    try:
-        response = client.get(book_url, follow_redirects=True)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "lxml")
+    soup = BeautifulSoup(html, "lxml")
 
-        product_table = soup.find("table", class_="table-striped")
-        table_rows = product_table.find_all("tr")
-        product_info = {row.find("th").text: row.find("td").text for row in table_rows}
+    product_table = soup.find("table", class_="table-striped")
+    table_rows = product_table.find_all("tr")
+    product_info = {row.find("th").text: row.find("td").text for row in table_rows}
 
-        availability_text = product_info.get("Availability", "")
-        quantity_match = re.search(r"\((\d+) available\)", availability_text)
-        quantity = int(quantity_match.group(1)) if quantity_match else 0
+    availability_text = product_info.get("Availability", "")
+    quantity_match = re.search(r"\((\d+) available\)", availability_text)
+    quantity = int(quantity_match.group(1)) if quantity_match else 0
 
-        description_tag = soup.find("div", id="product_description")
-        description = (
-            description_tag.find_next_sibling("p").text if description_tag else ""
-        )
+    description_tag = soup.find("div", id="product_description")
+    description = description_tag.find_next_sibling("p").text if description_tag else ""
 
-        category = soup.find("ul", class_="breadcrumb").find_all("li")[2].text.strip()
+    category = soup.find("ul", class_="breadcrumb").find_all("li")[2].text.strip()
 
-        rating_p = soup.find("p", class_="star-rating")
-        rating_class = rating_p["class"][1]
-        rating = RATING_MAP.get(rating_class, 0)
+    rating_p = soup.find("p", class_="star-rating")
+    rating_class = rating_p["class"][1]
+    rating = RATING_MAP.get(rating_class, 0)
 
-        image_tag = soup.find("div", class_="item active").find("img")
-        image_url = BASE_URL + image_tag["src"].replace("../../", "")
+    image_tag = soup.find("div", class_="item active").find("img")
+    image_url = BASE_URL + image_tag["src"].replace("../../", "")
 
-        price_text = soup.find("p", class_="price_color").text
+    price_text = soup.find("p", class_="price_color").text
 
-        currency = "N/A"
-        if "£" in price_text:
-            currency = "GBP"
-        elif "$" in price_text:
-            currency = "USD"
-        elif "€" in price_text:
-            currency = "EUR"
-        elif "R$" in price_text:
-            currency = "BRL"
+    currency = "N/A"
+    if "£" in price_text:
+        currency = "GBP"
+    elif "$" in price_text:
+        currency = "USD"
+    elif "€" in price_text:
+        currency = "EUR"
+    elif "R$" in price_text:
+        currency = "BRL"
 
-        try:
-            price_value = Decimal(re.sub(r"[^0-9.]", "", price_text))
-        except (InvalidOperation, TypeError):
-            price_value = Decimal("0.00")
-
-        return {
-            "upc": product_info.get("UPC"),
-            "book_name": soup.find("h1").text,
-            "currency": currency,
-            "price": price_value,
-            "quantity": quantity,
-            "availability": quantity > 0,
-            "rating": rating,
-            "number_of_reviews": int(product_info.get("Number of reviews", 0)),
-            "category": category,
-            "description": description,
-            "image_url": image_url,
-            "source_page": page_number,
-        }
+    try:
+        price_value = Decimal(re.sub(r"[^0-9.]", "", price_text))
+    except (InvalidOperation, TypeError):
+        price_value = Decimal("0.00")
+
+    return {
+        "upc": product_info.get("UPC"),
+        "book_name": soup.find("h1").text,
+        "currency": currency,
+        "price": price_value,
+        "quantity": quantity,
+        "availability": quantity > 0,
+        "rating": rating,
+        "number_of_reviews": int(product_info.get("Number of reviews", 0)),
+        "category": category,
+        "description": description,
+        "image_url": image_url,
+        "source_page": page_number,
+    }
+
+
+def content_hash(body: bytes) -> str:
+    """Hash do conteúdo de uma página, guardado no frontier do crawl."""
+    return hashlib.sha256(body).hexdigest()
+
+
+def scrape_book_details(
+    book_url: str, page_number: int, scheduler: RequestScheduler
+) -> Optional[Dict]:
+    """
+    Entra na página de um livro específico e extrai todos os detalhes.
+    """
+    return scrape_book(book_url, page_number, scheduler)[0]
+
+
+def scrape_book(
+    book_url: str,
+    page_number: int,
+    scheduler: RequestScheduler,
+    known_hash: Optional[str] = None,
+) -> tuple[Optional[Dict], Optional[str]]:
+    """
+    Como `scrape_book_details`, mas retorna também o hash do HTML da página.
+    Se o hash for igual a `known_hash` (crawl anterior), a página não é
+    interpretada e retorna (None, hash).
+    """
+    try:
+        response = scheduler.get(book_url, page=page_number, follow_redirects=True)
+        response.raise_for_status()
+        digest = content_hash(response.content)
+        if digest == known_hash:
+            return None, digest
+        return parse_book_details(response.text, page_number), digest
+    except RetriesExhausted as e:
+        logging.error(f"Livro {book_url} enviado para as dead letters: {e.reason}")
     except httpx.HTTPStatusError as e:
         logging.error(f"Erro de status HTTP ao acessar {book_url}: {e}")
     except Exception as e:
         logging.error(f"Erro inesperado ao processar o livro {book_url}: {e}")
-    return None
+    return None, None
+
+
+def parse_listing_page(html: str) -> tuple[List[Dict], bool]:
+    """
+    Extrai de uma página de catálogo os dados que ela já mostra de cada livro
+    (URL, título, preço, avaliação e disponibilidade) e se há próxima página.
+    """
+    soup = BeautifulSoup(html, "lxml")
+    items = []
+    for pod in soup.select("article.product_pod"):
+        link = pod.select_one("h3 > a")
+        rating_p = pod.find("p", class_="star-rating")
+        availability = pod.find("p", class_="availability")
+        items.append(
+            {
+                "url": CATALOGUE_URL + link["href"],
+                "book_name": link.get("title", link.text),
+                "price": pod.find("p", class_="price_color").text.strip(),
+                "rating": RATING_MAP.get(rating_p["class"][1], 0) if rating_p else 0,
+                "availability": (
+                    " ".join(availability.text.split()) if availability else ""
+                ),
+            }
+        )
+    has_next_page = soup.find("li", class_="next") is not None
+    return items, has_next_page
+
+
+def listing_hash(item: Dict) -> str:
+    """Hash dos dados de um livro na listagem (modo listing)."""
+    fields = (item["book_name"], item["price"], item["rating"], item["availability"])
+    return hashlib.sha256("|".join(map(str, fields)).encode()).hexdigest()
 
 
 def get_book_links_from_page(
-    page_number: int, client: httpx.Client
+    page_number: int, scheduler: RequestScheduler
 ) -> tuple[List[str], bool]:
     """
     Raspa uma página de catálogo para obter os links de todos os livros.
     """
+    items, has_next_page = get_listing_from_page(page_number, scheduler)
+    return [item["url"] for item in items], has_next_page
+
+
+def get_listing_from_page(
+    page_number: int, scheduler: RequestScheduler
+) -> tuple[List[Dict], bool]:
+    """
+    Como `get_book_links_from_page`, mas com os dados de cada livro na
+    listagem (veja `parse_listing_page`).
+    """
     url = f"{CATALOGUE_URL}page-{page_number}.html"
     try:
-        response = client.get(url)
+        response = scheduler.get(url, page=page_number)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, "lxml")
-        book_links = [CATALOGUE_URL + a["href"] for a in soup.select("h3 > a")]
-        has_next_page = soup.find("li", class_="next") is not None
-        return book_links, has_next_page
+        return parse_listing_page(response.text)
+    except RetriesExhausted as e:
+        # Falha transitória persistente, não o fim do site: segue para a próxima
+        logging.error(f"Página {page_number} enviada para as dead letters: {e.reason}")
+        return [], True
     except httpx.HTTPStatusError:
         logging.warning(
             f"Não foi possível acessar a página de catálogo {page_number}. Pode ser "
@@ -143,6 +238,28 @@ def load_scrape_state(csv_filename: str) -> tuple[set, int]:
     scraped_upcs = set()
     last_scraped_page = 0
 
+    if is_columnar(csv_filename):
+        # Só a coluna de UPCs é lida; a última página vem das estatísticas
+        reader = ColumnarReader(csv_filename)
+        for chunk in reader.chunks():
+            scraped_upcs.update(reader.read_chunk(chunk, ["upc"])["upc"])
+            last_page = chunk.stats("source_page")[1]
+            if last_page is not None:
+                last_scraped_page = max(last_scraped_page, last_page)
+        scraped_upcs.difference_update(("", None))
+    else:
+        scraped_upcs, last_scraped_page = _csv_scrape_state(csv_filename)
+
+    logger.info(
+        f"Encontrados {len(scraped_upcs)} livros. Última página com dados: "
+        f"{last_scraped_page}. Continuando..."
+    )
+    return scraped_upcs, last_scraped_page
+
+
+def _csv_scrape_state(csv_filename: str) -> tuple[set, int]:
+    scraped_upcs = set()
+    last_scraped_page = 0
     with open(csv_filename, "r", newline="", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
@@ -150,14 +267,57 @@ def load_scrape_state(csv_filename: str) -> tuple[set, int]:
                 scraped_upcs.add(row["upc"])
             if row.get("source_page"):
                 last_scraped_page = max(last_scraped_page, int(row["source_page"]))
-
-    logger.info(
-        f"Encontrados {len(scraped_upcs)} livros. Última página com dados: "
-        f"{last_scraped_page}. Continuando..."
-    )
     return scraped_upcs, last_scraped_page
 
 
+def load_crawl_state(
+    csv_filename: str, frontier_file: str, append_mode: bool
+) -> tuple[CrawlFrontier, set, int]:
+    """
+    Abre o frontier do crawl e retorna (frontier, UPCs já capturados, página
+    de onde continuar). No modo append, o estado vem do frontier, sem reler o
+    CSV; CSVs gerados antes do frontier ainda são lidos uma vez. Fora do modo
+    append (ou sem o CSV), o frontier começa vazio.
+    """
+    logger = logging.getLogger(__name__)
+    if not (append_mode and os.path.exists(csv_filename)):
+        return CrawlFrontier.reset(frontier_file), set(), 0
+    if os.path.exists(frontier_file):
+        frontier = CrawlFrontier(frontier_file)
+        start_page = frontier.first_incomplete_page()
+        logger.info(
+            f"Modo 'append' ativado. Retomando o crawl de '{frontier_file}' a "
+            f"partir da página {start_page}..."
+        )
+        return frontier, frontier.scraped_upcs(), start_page
+    scraped_upcs, last_scraped_page = load_scrape_state(csv_filename)
+    return CrawlFrontier(frontier_file), scraped_upcs, last_scraped_page
+
+
+def load_refresh_state(
+    frontier_file: str, append_mode: bool
+) -> Optional[tuple[CrawlFrontier, set, int]]:
+    """
+    Estado de um crawl de atualização sobre o frontier de um crawl anterior
+    (None se ele não existir). No modo append, retoma uma atualização
+    interrompida em vez de começar outra.
+    """
+    logger = logging.getLogger(__name__)
+    if not os.path.exists(frontier_file):
+        logger.error(
+            f"Frontier '{frontier_file}' não encontrado: faça um crawl completo "
+            "antes de usar --delta."
+        )
+        return None
+    frontier = CrawlFrontier(frontier_file)
+    if not append_mode:
+        frontier.start_refresh()
+        return frontier, set(), 0
+    start_page = frontier.first_incomplete_page()
+    logger.info(f"Retomando a atualização a partir da página {start_page}...")
+    return frontier, set(), start_page
+
+
 def determine_page_iterator(
     pages_to_scrape: str,
     append_mode: bool,
@@ -183,94 +343,396 @@ def determine_page_iterator(
             return None
 
 
+def write_book(writer: csv.DictWriter, details: Dict, scraped_upcs: set):
+    """Grava o livro no CSV, a menos que o UPC já tenha sido capturado."""
+    logger = logging.getLogger(__name__)
+    page_num = details["source_page"]
+    if details["upc"] not in scraped_upcs:
+        writer.writerow(details)
+        scraped_upcs.add(details["upc"])
+        logger.info(f"Página {page_num}: Capturado '{details['book_name'][:40]}...'")
+    else:
+        logger.debug(
+            f"Página {page_num}: Pulando (já existe) '"
+            f"{details['book_name'][:40]}...'"
+        )
+
+
+def _page_links(
+    page_num: int,
+    scheduler: RequestScheduler,
+    frontier: Optional[CrawlFrontier],
+    listing_mode: bool = False,
+) -> tuple[List[str], bool, Dict[str, str]]:
+    """
+    Links da página que ainda faltam capturar, se há próxima página e o hash
+    da listagem de cada livro. Uma página já listada em uma execução anterior
+    é retomada do frontier, sem baixar a listagem de novo (exceto no modo
+    listing, que precisa dos dados atuais da listagem).
+    """
+    if (
+        frontier is not None
+        and not listing_mode
+        and frontier.page_status(page_num) == PENDING
+    ):
+        return frontier.pending_urls(page_num), True, {}
+    items, has_next = get_listing_from_page(page_num, scheduler)
+    links = [item["url"] for item in items]
+    listing = {item["url"]: listing_hash(item) for item in items}
+    if frontier is not None and links:
+        frontier.add_page_links(page_num, links)
+        links = frontier.pending_urls(page_num)
+    return links, has_next, listing
+
+
+def skip_unchanged_listings(
+    links: List[str],
+    listing: Dict[str, str],
+    known_listings: Dict[str, str],
+    frontier: Optional[CrawlFrontier],
+    outcomes: Counter,
+) -> List[str]:
+    """
+    Modo listing: resolve sem visitar a página de detalhes os livros cujos
+    dados na listagem não mudaram desde o crawl anterior e retorna os demais
+    (novos ou alterados).
+    """
+    to_visit = []
+    for url in links:
+        if url in known_listings and known_listings[url] == listing.get(url):
+            outcomes["unchanged"] += 1
+            if frontier is not None:
+                frontier.mark_unchanged(url, listing[url])
+        else:
+            to_visit.append(url)
+    return to_visit
+
+
 def run_scraper(
     writer: csv.DictWriter,
-    client: httpx.Client,
+    scheduler: RequestScheduler,
     page_iterator: Iterable[int],
     scraped_upcs: set,
+    workers: int = 1,
+    frontier: Optional[CrawlFrontier] = None,
+    known_hashes: Optional[Dict[str, str]] = None,
+    known_listings: Optional[Dict[str, str]] = None,
+) -> Counter:
+    """
+    Executa o loop principal de scraping. Os livros de cada página são baixados
+    por até `workers` threads (os limites por host ficam com o `scheduler`) e
+    gravados na ordem da página. Com um `frontier`, cada URL é marcada logo
+    após ser gravada, e páginas já concluídas são puladas. Com `known_hashes`
+    (url -> hash do crawl anterior), páginas idênticas não são interpretadas
+    nem gravadas. Com `known_listings` (modo listing, url -> hash da listagem
+    anterior), só são visitados os livros novos ou com a listagem alterada.
+    Retorna a contagem de livros novos, alterados, inalterados e com falha.
+    """
+    logger = logging.getLogger(__name__)
+    known_hashes = known_hashes or {}
+    outcomes = Counter()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for page_num in page_iterator:
+            if frontier is not None and frontier.page_status(page_num) == DONE:
+                logger.debug(f"Página {page_num} já concluída; pulando.")
+                continue
+            logger.debug(f"Processando página de catálogo {page_num}...")
+            links, has_next, listing = _page_links(
+                page_num, scheduler, frontier, known_listings is not None
+            )
+
+            if not links and isinstance(page_iterator, range) and not has_next:
+                logger.info("Chegou ao fim do site.")
+                break
+            if known_listings is not None:
+                links = skip_unchanged_listings(
+                    links, listing, known_listings, frontier, outcomes
+                )
+
+            results = executor.map(
+                lambda url, page=page_num: (
+                    url,
+                    *scrape_book(url, page, scheduler, known_hashes.get(url)),
+                ),
+                links,
+            )
+            write_page_results(
+                writer, results, scraped_upcs, frontier, known_hashes, listing, outcomes
+            )
+            if frontier is not None:
+                mark_page_processed(frontier, page_num)
+    return outcomes
+
+
+def mark_page_processed(frontier: CrawlFrontier, page_num: int):
+    """
+    Conclui a página no frontier se ela foi listada (agora ou numa execução
+    anterior) e todas as suas URLs foram resolvidas, mesmo que nenhuma tenha
+    precisado ser visitada (todas já capturadas ou com a listagem inalterada).
+    Uma página cuja listagem falhou não tem URLs registradas e fica de fora.
+    """
+    listed = frontier.page_status(page_num) == PENDING
+    if listed and not frontier.pending_urls(page_num):
+        frontier.mark_page_done(page_num)
+
+
+def write_page_results(
+    writer,
+    results: Iterable[tuple],
+    scraped_upcs: set,
+    frontier: Optional[CrawlFrontier],
+    known_hashes: Dict[str, str],
+    listing: Dict[str, str],
+    outcomes: Counter,
 ):
-    """Executa o loop principal de scraping."""
+    """
+    Grava os livros de uma página e os resolve no frontier. No CSV cada URL é
+    marcada logo após sua linha; no formato colunar a página inteira é gravada
+    como um bloco antes de as URLs serem marcadas, para que o frontier nunca
+    marque um livro que ainda não está no arquivo.
+    """
+    buffered = hasattr(writer, "flush_chunk")
+    marks = []
+    for url, details, digest in results:
+        outcome = book_outcome(url, details, digest, known_hashes)
+        outcomes[outcome] += 1
+        if details:
+            write_book(writer, details, scraped_upcs)
+        marks.append((url, outcome, details, digest, listing.get(url)))
+        if frontier is not None and not buffered:
+            record_in_frontier(frontier, *marks.pop())
+    if buffered:
+        writer.flush_chunk()
+    if frontier is not None:
+        for mark in marks:
+            record_in_frontier(frontier, *mark)
+
+
+def book_outcome(
+    url: str, details: Optional[Dict], digest: Optional[str], known_hashes: Dict
+) -> str:
+    """Classifica o resultado de `scrape_book` para uma URL."""
+    if details:
+        return "changed" if url in known_hashes else "new"
+    return "unchanged" if digest is not None else "failed"
+
+
+def record_in_frontier(
+    frontier: CrawlFrontier,
+    url: str,
+    outcome: str,
+    details: Optional[Dict],
+    digest: Optional[str],
+    listing: Optional[str] = None,
+):
+    """
+    Resolve a URL no frontier: capturada, inalterada desde o crawl anterior,
+    ou desistida (404, HTML inesperado ou retentativas esgotadas, que ficam
+    nas dead letters).
+    """
+    if details:
+        frontier.mark_done(url, digest, details["upc"], listing)
+    elif outcome == "unchanged":
+        frontier.mark_unchanged(url, listing)
+    else:
+        frontier.mark_failed(url)
+
+
+def retry_dead_letters(
+    writer: csv.DictWriter,
+    scheduler: RequestScheduler,
+    entries: List[Dict],
+    scraped_upcs: set,
+    workers: int = 1,
+    frontier: Optional[CrawlFrontier] = None,
+):
+    """
+    Nova passada só sobre as URLs das dead letters: páginas de catálogo são
+    raspadas por inteiro; páginas de livro, individualmente.
+    """
     logger = logging.getLogger(__name__)
+    pages = sorted({e["page"] for e in entries if CATALOGUE_PAGE_RE.search(e["url"])})
+    book_entries = [e for e in entries if not CATALOGUE_PAGE_RE.search(e["url"])]
+    logger.info(
+        f"Tentando de novo {len(pages)} páginas de catálogo e "
+        f"{len(book_entries)} livros das dead letters..."
+    )
+    run_scraper(writer, scheduler, pages, scraped_upcs, workers, frontier)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            lambda e: (e["url"], *scrape_book(e["url"], e["page"], scheduler)),
+            book_entries,
+        )
+        write_page_results(writer, results, scraped_upcs, frontier, {}, {}, Counter())
+
 
-    for page_num in page_iterator:
-        logger.debug(f"Processando página de catálogo {page_num}...")
-        links, has_next = get_book_links_from_page(page_num, client)
-
-        if not links and isinstance(page_iterator, range) and not has_next:
-            logger.info("Chegou ao fim do site.")
-            break
-
-        for book_url in links:
-            details = scrape_book_details(book_url, page_num, client)
-            if details:
-                if details["upc"] not in scraped_upcs:
-                    writer.writerow(details)
-                    scraped_upcs.add(details["upc"])
-                    logger.info(
-                        f"Página {page_num}: Capturado '"
-                        f"{details['book_name'][:40]}...'"
-                    )
-                else:
-                    logger.debug(
-                        f"Página {page_num}: Pulando (já existe) '"
-                        f"{details['book_name'][:40]}...'"
-                    )
-
-
-def main(pages_to_scrape: str, append_mode: bool, csv_filename: str):
-    """Função principal que orquestra o processo de scraping."""
+def main(
+    pages_to_scrape: str,
+    append_mode: bool,
+    csv_filename: str,
+    workers: int = 1,
+    requests_per_second: float = 5.0,
+    max_retries: int = 4,
+    dead_letter_file: str = "scrape_dead_letters.jsonl",
+    retry_failed: bool = False,
+    frontier_file: Optional[str] = None,
+    delta_file: Optional[str] = None,
+    mode: str = "full",
+):
+    """
+    Função principal que orquestra o processo de scraping. Com `delta_file`,
+    faz um crawl de atualização: revisita todas as páginas, mas grava em
+    `delta_file` só os livros novos ou cujo HTML mudou desde o crawl anterior.
+    O modo "listing" é uma atualização que só visita as páginas de detalhes
+    dos livros novos ou com dados da listagem alterados.
+    """
     setup_pipeline_logging()
     logger = logging.getLogger(__name__)
 
-    scraped_upcs, last_scraped_page = set(), 0
-    file_exists = os.path.exists(csv_filename)
-
-    if append_mode and file_exists:
-        scraped_upcs, last_scraped_page = load_scrape_state(csv_filename)
-
-    headers = [
-        "upc",
-        "book_name",
-        "currency",
-        "price",
-        "quantity",
-        "availability",
-        "rating",
-        "number_of_reviews",
-        "category",
-        "description",
-        "image_url",
-        "source_page",
-    ]
-    file_mode = "a" if append_mode and file_exists else "w"
+    dead_letters = []
+    dead_letter_path = dead_letter_file
+    if retry_failed:
+        if not os.path.exists(dead_letter_file):
+            logger.info(f"Nenhuma dead letter em '{dead_letter_file}'.")
+            return
+        dead_letters = read_dead_letters(dead_letter_file)
+        # As URLs que falharem de novo vão para um arquivo à parte, que só
+        # substitui o original ao fim da nova passada: se ela for interrompida,
+        # nenhuma dead letter se perde
+        dead_letter_path = f"{dead_letter_file}.retry"
+        if os.path.exists(dead_letter_path):
+            os.remove(dead_letter_path)
+        append_mode = True
+
+    if mode == "listing":
+        delta_file = delta_file or DEFAULT_DELTA_FILE
+    frontier_file = frontier_file or f"{csv_filename}.frontier"
+    output_file = delta_file or csv_filename
+    state = (
+        load_refresh_state(frontier_file, append_mode)
+        if delta_file
+        else load_crawl_state(csv_filename, frontier_file, append_mode)
+    )
+    if state is None:
+        return
+    frontier, scraped_upcs, last_scraped_page = state
+    known_hashes = frontier.content_hashes() if delta_file else None
+    known_listings = frontier.listing_hashes() if mode == "listing" else None
 
     with (
         httpx.Client(timeout=20.0, follow_redirects=True) as client,
-        open(csv_filename, file_mode, newline="", encoding="utf-8") as csvfile,
+        open_output(output_file, append_mode and os.path.exists(output_file)) as writer,
     ):
-        writer = csv.DictWriter(csvfile, fieldnames=headers)
-        if file_mode == "w":
+        scheduler = RequestScheduler(
+            client,
+            max_concurrency=workers,
+            requests_per_second=requests_per_second,
+            max_retries=max_retries,
+            dead_letter_path=dead_letter_path,
+        )
+
+        outcomes = Counter()
+        if retry_failed:
+            retry_dead_letters(
+                writer, scheduler, dead_letters, scraped_upcs, workers, frontier
+            )
+            replace_dead_letters(dead_letter_path, dead_letter_file)
+        else:
+            page_iterator = resolve_pages(
+                pages_to_scrape, append_mode, last_scraped_page, scheduler
+            )
+            if page_iterator is None:
+                frontier.close()
+                return
+            outcomes = run_scraper(
+                writer,
+                scheduler,
+                page_iterator,
+                scraped_upcs,
+                workers,
+                frontier,
+                known_hashes,
+                known_listings,
+            )
+    if delta_file:
+        outcomes["removed"] = frontier.stale_count()
+    frontier.close()
+    log_summary(scheduler, outcomes, dead_letter_file, output_file)
+
+
+def replace_dead_letters(retry_path: str, dead_letter_file: str):
+    """
+    Troca o arquivo de dead letters pelas URLs que falharam de novo na nova
+    passada (`retry_path`), ou o remove se todas foram recuperadas.
+    """
+    if os.path.exists(retry_path):
+        os.replace(retry_path, dead_letter_file)
+    else:
+        os.remove(dead_letter_file)
+
+
+@contextmanager
+def open_output(filename: str, append: bool):
+    """
+    Writer do arquivo de saída: o formato colunar (`src.core.columnar`) para
+    arquivos `.bkcol`, CSV para os demais. O CSV tem buffer de linha, então
+    cada livro já está no arquivo quando o frontier o marca como capturado.
+    """
+    if is_columnar(filename):
+        with ColumnarWriter(filename, append=append) as writer:
+            yield writer
+        return
+    with open(
+        filename, "a" if append else "w", newline="", encoding="utf-8", buffering=1
+    ) as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=HEADERS)
+        if not append:
             writer.writeheader()
+        yield writer
 
-        total_pages = 50
-        if pages_to_scrape.lower() == "all":
-            total_pages = get_total_pages(client)
 
-        page_iterator = determine_page_iterator(
-            pages_to_scrape, append_mode, last_scraped_page, total_pages
-        )
-        if page_iterator is None:
-            return
+def resolve_pages(
+    pages_to_scrape: str,
+    append_mode: bool,
+    last_scraped_page: int,
+    scheduler: RequestScheduler,
+) -> Optional[Iterable[int]]:
+    """Descobre o total de páginas (se preciso) e monta o iterador de páginas."""
+    logger = logging.getLogger(__name__)
+    total_pages = 50
+    if pages_to_scrape.lower() == "all":
+        total_pages = get_total_pages(scheduler)
 
-        if isinstance(page_iterator, range):
-            pages = f"todas a partir de {page_iterator.start}"
-        else:
-            pages = str(page_iterator)
-        logger.info(f"Iniciando scraping para as páginas: {pages}")
+    page_iterator = determine_page_iterator(
+        pages_to_scrape, append_mode, last_scraped_page, total_pages
+    )
+    if page_iterator is None:
+        return None
+
+    if isinstance(page_iterator, range):
+        pages = f"todas a partir de {page_iterator.start}"
+    else:
+        pages = str(page_iterator)
+    logger.info(f"Iniciando scraping para as páginas: {pages}")
+    return page_iterator
 
-        run_scraper(writer, client, page_iterator, scraped_upcs)
 
-    logger.info(f"Scraping concluído. Dados salvos em '{csv_filename}'.")
+def log_summary(
+    scheduler: RequestScheduler, outcomes: Counter, dead_letter_file: str, output: str
+):
+    """Loga as requisições feitas, os livros por resultado e as dead letters."""
+    logger = logging.getLogger(__name__)
+    logger.info(f"Requisições: {scheduler.stats}")
+    if outcomes:
+        logger.info(f"Livros: {dict(outcomes)}")
+    if scheduler.dead_letters:
+        logger.warning(
+            f"{len(scheduler.dead_letters)} URLs falharam em todas as tentativas e "
+            f"foram salvas em '{dead_letter_file}'. Use --retry_failed para tentar "
+            "de novo."
+        )
+    logger.info(f"Scraping concluído. Dados salvos em '{output}'.")
 
 
 if __name__ == "__main__":
@@ -286,13 +748,82 @@ if __name__ == "__main__":
     parser.add_argument(
         "--csv_name",
         default="books_data_detailed.csv",
-        help="Nome do arquivo CSV de saída.",
+        help="Nome do arquivo CSV de saída (com a extensão .bkcol, grava no "
+        "formato colunar).",
     )
     parser.add_argument(
         "--append",
         action="store_true",
         help="Ativa o modo de continuação (append) para um CSV existente.",
     )
+    parser.add_argument(
+        "--base_url",
+        default=BASE_URL,
+        help="URL base do site a ser raspado (padrão: books.toscrape.com).",
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Livros baixados em paralelo (e limite de conexões simultâneas ao host).",
+    )
+    parser.add_argument(
+        "--rps",
+        type=float,
+        default=5.0,
+        help="Máximo de requisições por segundo ao host (reduzido automaticamente "
+        "diante de 429/503 ou respostas lentas).",
+    )
+    parser.add_argument(
+        "--max_retries",
+        type=int,
+        default=4,
+        help="Novas tentativas para timeouts, erros de conexão, 429 e 5xx.",
+    )
+    parser.add_argument(
+        "--dead_letters",
+        default="scrape_dead_letters.jsonl",
+        help="Arquivo com as URLs que falharam em todas as tentativas.",
+    )
+    parser.add_argument(
+        "--frontier",
+        help="Arquivo com o estado do crawl, usado para retomar no modo append "
+        "(padrão: <csv_name>.frontier).",
+    )
+    parser.add_argument(
+        "--delta",
+        help="Crawl de atualização: revisita todas as páginas e grava neste CSV só "
+        "os livros novos ou alterados (páginas com o mesmo hash do crawl anterior "
+        "não são interpretadas).",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["full", "listing"],
+        default="full",
+        help="'listing': atualização rápida que lê título, preço, avaliação e "
+        "disponibilidade das páginas de catálogo e só visita as páginas de "
+        f"detalhes de livros novos ou alterados (grava em --delta, padrão "
+        f"{DEFAULT_DELTA_FILE}).",
+    )
+    parser.add_argument(
+        "--retry_failed",
+        action="store_true",
+        help="Tenta de novo apenas as URLs do arquivo de dead letters (append).",
+    )
 
     args = parser.parse_args()
-    main(args.pages, args.append, args.csv_name)
+    configure_base_url(args.base_url)
+    main(
+        args.pages,
+        args.append,
+        args.csv_name,
+        workers=args.workers,
+        requests_per_second=args.rps,
+        max_retries=args.max_retries,
+        dead_letter_file=args.dead_letters,
+        retry_failed=args.retry_failed,
+        frontier_file=args.frontier,
+        delta_file=args.delta,
+        mode=args.mode,
+    )
@@ -1,24 +1,45 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from dataclasses import asdict
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from decimal import Decimal
 
 from ..core import crud, schemas
-from ..core.database import SessionLocal
+from ..core.config import get_settings
+from ..core.query_engine import BookQuery, get_query_engine
+from ..core.serialization import book_rows_to_dicts
+from ..core.snapshot import CatalogSnapshot, get_catalog_snapshot
+from .deps import get_db
+from .responses import (
+    FastJSONResponse,
+    cached_json_response,
+    lookup_books,
+    to_json_content,
+)
 
 router = APIRouter(prefix="/api/v1", tags=["Books"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def snapshot_response(snapshot: CatalogSnapshot, content) -> FastJSONResponse:
+    return FastJSONResponse(
+        content, headers={"X-Data-Version": str(snapshot.data_version)}
+    )
 
 
 @router.get("/books", response_model=List[schemas.BookSchema])
-def read_books(skip: int = 0, limit: int = 20, db: Session = Depends(get_db)):
+def read_books(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    snapshot = get_catalog_snapshot()
+    if snapshot is not None:
+        return snapshot_response(snapshot, snapshot.page(skip, limit))
+    if get_settings().FAST_JSON_RESPONSES:
+        rows = crud.get_book_rows(db, skip=skip, limit=limit)
+        return FastJSONResponse(book_rows_to_dicts(rows))
     return crud.get_books(db, skip=skip, limit=limit)
 
 
@@ -28,12 +49,33 @@ def search_books_endpoint(
     category: Optional[str] = None,
     db: Session = Depends(get_db),
 ):
+    snapshot = get_catalog_snapshot()
+    if snapshot is not None:
+        return snapshot_response(snapshot, snapshot.search(title, category))
+    if get_settings().FAST_JSON_RESPONSES:
+        rows = crud.search_book_rows(db, title=title, category=category)
+        return FastJSONResponse(book_rows_to_dicts(rows))
     return crud.search_books(db, title=title, category=category)
 
 
 @router.get("/books/top-rated", response_model=List[schemas.BookSchema])
-def read_top_rated_books(limit: int = 5, db: Session = Depends(get_db)):
-    return crud.get_top_rated_books(db, limit=limit)
+def read_top_rated_books(
+    request: Request,
+    limit: int = Query(5, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    engine = get_query_engine()
+    if engine is not None:
+        query = BookQuery(sort="-rating", limit=limit)
+        return snapshot_response(engine.snapshot, engine.query(query))
+    return cached_json_response(
+        request,
+        db,
+        ("top-rated", limit),
+        lambda: to_json_content(
+            schemas.BookListAdapter, crud.get_top_rated_books(db, limit=limit)
+        ),
+    )
 
 
 @router.get("/books/price-range", response_model=List[schemas.BookSchema])
@@ -42,17 +84,133 @@ def read_books_by_price_range(
     min_price: Decimal = Query(0, ge=0),
     db: Session = Depends(get_db),
 ):
+    engine = get_query_engine()
+    if engine is not None:
+        query = BookQuery(
+            min_price=min_price, max_price=max_price, sort="price", limit=None
+        )
+        return snapshot_response(engine.snapshot, engine.query(query))
     return crud.get_books_by_price_range(db, min_price=min_price, max_price=max_price)
 
 
+SORT_PATTERN = rf"^[-+]?({'|'.join(crud.BOOK_SORT_COLUMNS)})$"
+
+
+@router.get("/books/query", response_model=List[schemas.BookSchema])
+def query_books_endpoint(
+    title: Optional[str] = None,
+    category: Optional[str] = None,
+    min_price: Optional[Decimal] = Query(None, ge=0),
+    max_price: Optional[Decimal] = Query(None, ge=0),
+    min_rating: Optional[int] = Query(None, ge=0, le=5),
+    max_rating: Optional[int] = Query(None, ge=0, le=5),
+    available: Optional[bool] = None,
+    sort: str = Query(
+        "id",
+        pattern=SORT_PATTERN,
+        description="id, price, rating, reviews ou quantity; '-' para decrescente.",
+    ),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    """Filtros combinados (categoria exata, preço, avaliação, disponibilidade e
+    título) com ordenação e paginação em uma única consulta."""
+    query = BookQuery(
+        title=title,
+        category=category,
+        min_price=min_price,
+        max_price=max_price,
+        min_rating=min_rating,
+        max_rating=max_rating,
+        available=available,
+        sort=sort,
+        skip=skip,
+        limit=limit,
+    )
+    engine = get_query_engine()
+    if engine is not None:
+        return snapshot_response(engine.snapshot, engine.query(query))
+    rows = crud.query_books(db, **asdict(query))
+    return FastJSONResponse(book_rows_to_dicts(rows))
+
+
+@router.post("/books/batch", response_model=schemas.BookBatchResponseSchema)
+def read_books_batch(
+    payload: schemas.BookBatchRequestSchema, db: Session = Depends(get_db)
+):
+    """
+    Busca vários livros por id e/ou UPC em uma chamada. Os livros voltam na
+    ordem pedida (primeiro os ids, depois os UPCs) e os não encontrados são
+    listados em `missing_ids` e `missing_upcs`.
+    """
+    max_items = get_settings().BATCH_MAX_ITEMS
+    if len(payload.ids) + len(payload.upcs) > max_items:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Informe no máximo {max_items} ids e UPCs por requisição.",
+        )
+    by_id, by_upc = lookup_books(db, ids=payload.ids, upcs=payload.upcs)
+    books = [by_id[book_id] for book_id in payload.ids if book_id in by_id]
+    books += [by_upc[upc] for upc in payload.upcs if upc in by_upc]
+    return FastJSONResponse(
+        {
+            "books": books,
+            "missing_ids": [i for i in payload.ids if i not in by_id],
+            "missing_upcs": [upc for upc in payload.upcs if upc not in by_upc],
+        }
+    )
+
+
 @router.get("/books/{book_id}", response_model=schemas.BookSchema)
 def read_book(book_id: int, db: Session = Depends(get_db)):
-    db_book = crud.get_book_by_id(db, book_id=book_id)
-    if db_book is None:
+    by_id, _ = lookup_books(db, ids=[book_id])
+    if book_id not in by_id:
+        raise HTTPException(status_code=404, detail="Livro não encontrado")
+    return FastJSONResponse(by_id[book_id])
+
+
+@router.get("/books/{book_id}/related", response_model=List[schemas.BookSchema])
+def read_related_books(
+    book_id: int,
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    """
+    Livros parecidos (descrição, título, categoria, preço e avaliação), do mais
+    parecido para o menos. A lista é pré-calculada a cada carga em
+    `book_related`: uma consulta pelo índice e os livros do cache por livro.
+    """
+    related_ids = crud.get_related_book_ids(db, book_id=book_id, limit=limit)
+    by_id, _ = lookup_books(db, ids=[book_id, *related_ids])
+    if book_id not in by_id:
+        raise HTTPException(status_code=404, detail="Livro não encontrado")
+    return FastJSONResponse([by_id[i] for i in related_ids if i in by_id])
+
+
+@router.get(
+    "/books/{book_id}/history", response_model=List[schemas.BookHistoryEntrySchema]
+)
+def read_book_history(
+    book_id: int,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+):
+    """Histórico de preço, estoque e avaliação do livro (mais recente primeiro)."""
+    if crud.get_book_by_id(db, book_id=book_id) is None:
         raise HTTPException(status_code=404, detail="Livro não encontrado")
-    return db_book
+    return crud.get_book_history(
+        db, book_id=book_id, since=since, until=until, limit=limit
+    )
 
 
 @router.get("/categories", response_model=List[str])
-def read_categories(db: Session = Depends(get_db)):
-    return crud.get_all_categories(db)
+def read_categories(request: Request, db: Session = Depends(get_db)):
+    snapshot = get_catalog_snapshot()
+    if snapshot is not None:
+        return snapshot_response(snapshot, snapshot.category_names())
+    return cached_json_response(
+        request, db, "categories", lambda: crud.get_all_categories(db)
+    )
@@ -0,0 +1,143 @@
+import asyncio
+import time
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, Depends, Header, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from ..core import crud, schemas
+from ..core.config import get_settings
+from ..core.database import ReadSessionLocal
+from ..core.serialization import book_rows_to_dicts, dumps
+from .deps import get_db
+from .responses import FastJSONResponse, get_data_version_tracker
+
+router = APIRouter(prefix="/api/v1", tags=["Changes"])
+
+CHANGES_PAGE_SIZE = 500
+# Espera sugerida ao cliente SSE antes de reconectar (ms)
+STREAM_RETRY_MS = 3000
+
+
+def read_changes_page(db: Session, since: int, limit: int) -> dict:
+    """
+    Mudanças depois de `since`, cada uma com o estado atual do livro. Os
+    livros são lidos do banco na mesma sessão das mudanças (e não do cache por
+    livro, que pode estar até DATA_VERSION_CHECK_SECONDS atrasado), para que o
+    livro nunca venha mais antigo que a mudança.
+    """
+    rows = crud.get_book_changes(db, since=since, limit=limit + 1)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    ids = {row.book_id for row in rows if row.change != crud.CHANGE_DELETE}
+    books = {
+        book["id"]: book
+        for book in book_rows_to_dicts(crud.get_book_rows_by_ids(db, ids))
+    }
+    return {
+        "changes": [
+            {
+                "seq": row.seq,
+                "book_id": row.book_id,
+                "change": row.change,
+                "data_version": row.data_version,
+                "changed_at": row.changed_at.isoformat(),
+                "book": books.get(row.book_id),
+            }
+            for row in rows
+        ],
+        "last_seq": rows[-1].seq if rows else since,
+        "has_more": has_more,
+    }
+
+
+@router.get("/books/changes", response_model=schemas.BookChangesResponseSchema)
+def read_book_changes(
+    since: int = Query(0, ge=0, description="Último `seq` já aplicado."),
+    limit: int = Query(CHANGES_PAGE_SIZE, ge=1, le=5000),
+    db: Session = Depends(get_db),
+):
+    """
+    Feed de mudanças do catálogo: livros inseridos, alterados e removidos
+    pelas cargas, em ordem de `seq`. Um espelho guarda o `last_seq` da
+    resposta e pede `?since=<last_seq>` (enquanto `has_more` for verdadeiro,
+    sem esperar), em vez de reler `/books` inteiro.
+    """
+    return FastJSONResponse(read_changes_page(db, since, limit))
+
+
+def _poll(since: int, version: Optional[int]) -> tuple:
+    """
+    Se a versão dos dados mudou desde `version`, a próxima página de mudanças
+    e a versão a guardar como já vista. A checagem usa o `DataVersionTracker`
+    compartilhado: com vários clientes conectados, o banco é consultado no
+    máximo uma vez a cada DATA_VERSION_CHECK_SECONDS.
+
+    A versão guardada é lida na mesma sessão da página, e não a do tracker: a
+    sessão pode estar em uma réplica ainda atrasada, e então as próximas
+    consultas continuam buscando até a réplica alcançar a nova versão.
+    """
+    with ReadSessionLocal() as db:
+        if get_data_version_tracker().current(db) == version:
+            return version, None
+        # Lida antes da página: a página pode trazer mudanças de uma versão
+        # mais nova, mas nunca deixa de trazer as da versão guardada
+        seen = crud.get_data_version(db)
+        return seen, read_changes_page(db, since, CHANGES_PAGE_SIZE)
+
+
+def _last_change_seq() -> int:
+    with ReadSessionLocal() as db:
+        return crud.get_last_change_seq(db)
+
+
+async def change_events(since: int) -> AsyncIterator[bytes]:
+    """Eventos SSE (`id: seq`, `event: change`) das mudanças depois de `since`."""
+    settings = get_settings()
+    yield f"retry: {STREAM_RETRY_MS}\n\n".encode()
+    version = None
+    last_sent = time.monotonic()
+    while True:
+        seen, page = await run_in_threadpool(_poll, since, version)
+        if page is not None:
+            for change in page["changes"]:
+                yield b"id: %d\nevent: change\ndata: %s\n\n" % (
+                    change["seq"],
+                    dumps(change),
+                )
+            since = page["last_seq"]
+            if page["changes"]:
+                last_sent = time.monotonic()
+            if page["has_more"]:
+                continue
+            version = seen
+        if time.monotonic() - last_sent >= settings.CHANGE_STREAM_HEARTBEAT_SECONDS:
+            yield b": keep-alive\n\n"
+            last_sent = time.monotonic()
+        await asyncio.sleep(settings.DATA_VERSION_CHECK_SECONDS)
+
+
+@router.get("/books/changes/stream", response_class=StreamingResponse)
+async def stream_book_changes(
+    since: Optional[int] = Query(
+        None, ge=0, description="Padrão: só as mudanças a partir de agora."
+    ),
+    last_event_id: Optional[int] = Header(None, ge=0),
+):
+    """
+    Stream SSE (`text/event-stream`) com as mudanças do catálogo à medida que
+    as cargas são gravadas: um evento `change` por mudança, com o mesmo
+    conteúdo de `/books/changes`. Na reconexão, o cliente SSE envia
+    `Last-Event-ID` e recebe o que perdeu.
+    """
+    if last_event_id is not None:
+        since = last_event_id
+    elif since is None:
+        since = await run_in_threadpool(_last_change_seq)
+    return StreamingResponse(
+        change_events(since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,30 @@
+from typing import Iterator
+
+from fastapi import Request
+from sqlalchemy.orm import Session
+
+from ..core.database import ReadSessionLocal, SessionLocal
+
+# Métodos HTTP que nunca gravam no banco
+READ_ONLY_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def get_db(request: Request) -> Iterator[Session]:
+    """
+    Sessão do banco da requisição.
+
+    O FastAPI reaproveita o resultado desta dependência dentro de uma mesma
+    requisição, então a rota e dependências como `get_current_user` usam uma
+    única sessão. A conexão só sai do pool na primeira query, portanto
+    respostas servidas de cache ou do snapshot não ocupam conexão. Rotas de
+    leitura recebem uma sessão somente leitura, ligada à réplica quando
+    DATABASE_REPLICA_URL está configurada.
+    """
+    if request.method in READ_ONLY_METHODS:
+        db = ReadSessionLocal()
+    else:
+        db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
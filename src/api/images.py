@@ -0,0 +1,83 @@
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request
+from fastapi.responses import FileResponse, RedirectResponse, Response
+from sqlalchemy.orm import Session
+
+from ..core import crud
+from ..core.config import get_settings
+from ..core.images import (
+    CONTENT_HASH_RE,
+    ORIGINAL,
+    THUMBNAIL,
+    ImageStore,
+    sniff_content_type,
+)
+from .deps import get_db
+
+router = APIRouter(prefix="/api/v1", tags=["Images"])
+
+IMAGE_SIZES = {"original": ORIGINAL, "thumb": THUMBNAIL}
+# O livro pode ganhar outra capa em uma nova carga: o redirecionamento tem
+# cache curto, a imagem (endereçada pelo conteúdo) tem cache longo
+COVER_REDIRECT_MAX_AGE = 300
+
+
+def _image_file(digest: str, size: str) -> tuple[str, str]:
+    """Caminho e variante servida (a original, se ainda não há miniatura)."""
+    store = ImageStore(get_settings().IMAGES_DIR)
+    variant = IMAGE_SIZES[size]
+    if variant == THUMBNAIL and not store.exists(digest, THUMBNAIL):
+        # Sem miniatura (ex.: Pillow ausente no fetch_covers): serve a original
+        variant = ORIGINAL
+    return store.path(digest, variant), variant
+
+
+@router.get("/images/{content_hash}")
+def read_image(
+    request: Request,
+    content_hash: str = Path(..., pattern=CONTENT_HASH_RE.pattern),
+    size: str = Query("original", pattern="^(original|thumb)$"),
+):
+    """
+    Imagem pelo hash SHA-256 do conteúdo. Como o conteúdo de um hash nunca
+    muda, a resposta pode ficar em cache no cliente por um ano.
+    """
+    path, variant = _image_file(content_hash, size)
+    etag = f'"{content_hash}-{variant}"'
+    if variant == IMAGE_SIZES[size]:
+        cache_control = (
+            f"public, max-age={get_settings().IMAGE_CACHE_MAX_AGE}, immutable"
+        )
+    else:
+        # A miniatura pode ser gerada depois: cache curto para a substituta
+        cache_control = f"public, max-age={COVER_REDIRECT_MAX_AGE}"
+    cache_headers = {"Cache-Control": cache_control, "ETag": etag}
+    try:
+        with open(path, "rb") as f:
+            head = f.read(16)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Imagem não encontrada")
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=cache_headers)
+    return FileResponse(
+        path,
+        media_type=sniff_content_type(head) or "application/octet-stream",
+        headers=cache_headers,
+    )
+
+
+@router.get("/books/{book_id}/cover", status_code=307)
+def read_book_cover(
+    book_id: int,
+    size: str = Query("original", pattern="^(original|thumb)$"),
+    db: Session = Depends(get_db),
+):
+    """Redireciona para a capa do livro em `/images/{hash}` (se já foi baixada)."""
+    digest = crud.get_book_cover_hash(db, book_id=book_id)
+    if digest is None:
+        raise HTTPException(status_code=404, detail="Capa não encontrada")
+    query = "?size=thumb" if size == "thumb" else ""
+    return RedirectResponse(
+        f"/api/v1/images/{digest}{query}",
+        status_code=307,
+        headers={"Cache-Control": f"public, max-age={COVER_REDIRECT_MAX_AGE}"},
+    )
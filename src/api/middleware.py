@@ -0,0 +1,212 @@
+import logging
+import random
+import time
+import uuid
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..core.compression import compress, is_compressible, negotiate_encoding
+from ..core.logging_config import request_id_var
+from ..core.query_profiler import QueryProfiler
+
+access_logger = logging.getLogger("api.access")
+
+
+def get_route_path(scope: Scope) -> str:
+    """Retorna o template da rota encontrada (ou o caminho bruto)."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or scope.get("path", "")
+
+
+def get_endpoint_label(scope: Scope) -> str:
+    """Identifica o endpoint pelo método e pelo template da rota."""
+    return f"{scope.get('method', '')} {get_route_path(scope)}"
+
+
+class QueryProfilingMiddleware:
+    """Conta as queries de cada requisição HTTP usando o `QueryProfiler`."""
+
+    def __init__(self, app: ASGIApp, profiler: QueryProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = self.profiler.start_request()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            # O roteador grava a rota encontrada no próprio `scope`
+            self.profiler.finish_request(get_endpoint_label(scope), stats)
+
+
+class AccessLogMiddleware:
+    """
+    Registra uma linha de log por requisição com id, rota, status e latência.
+
+    Respostas de sucesso são amostradas com a taxa `sample_rate`; erros e
+    requisições acima de `slow_request_ms` são sempre registrados. O id da
+    requisição (recebido em `X-Request-ID` ou gerado) é devolvido no mesmo
+    cabeçalho e fica disponível para os demais logs via `request_id_var`.
+    """
+
+    def __init__(
+        self, app: ASGIApp, sample_rate: float = 1.0, slow_request_ms: float = 1000.0
+    ):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.slow_request_ms = slow_request_ms
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        if not request_id:
+            request_id = uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append("X-Request-ID", request_id)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            latency_ms = (time.perf_counter() - start) * 1000
+            if (
+                status_code >= 400
+                or latency_ms >= self.slow_request_ms
+                or random.random() < self.sample_rate
+            ):
+                client = scope.get("client")
+                access_logger.info(
+                    f"{scope['method']} {scope['path']} {status_code} "
+                    f"{latency_ms:.1f}ms",
+                    extra={
+                        "request_id": request_id,
+                        "method": scope["method"],
+                        "route": get_route_path(scope),
+                        "path": scope["path"],
+                        "status": status_code,
+                        "latency_ms": round(latency_ms, 3),
+                        "client": client[0] if client else None,
+                    },
+                )
+            request_id_var.reset(token)
+
+
+class CompressionMiddleware:
+    """
+    Comprime respostas com gzip ou brotli, conforme o `Accept-Encoding`.
+
+    Só comprime corpos completos (não-streaming) de tipos textuais com pelo
+    menos `minimum_size` bytes. Respostas que já trazem `Content-Encoding`
+    (como os corpos pré-comprimidos do cache) passam sem alteração.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = negotiate_encoding(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        passthrough = False
+
+        async def send_wrapper(message: Message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                passthrough = "content-encoding" in headers or not is_compressible(
+                    headers.get("content-type", "")
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    # Adia o envio até saber o tamanho do corpo
+                    start_message = message
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            passthrough = True
+            headers = MutableHeaders(scope=start_message)
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                # Respostas em streaming ou pequenas seguem sem compressão
+                await send(start_message)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+class RecentPathsMiddleware:
+    """
+    Registra em `recent` (um `api.warmup.RecentPaths`) o caminho, com a query
+    string, de cada GET sem autenticação respondido com 200 e JSON. São as
+    consultas que o aquecimento refaz a cada nova versão dos dados.
+    """
+
+    def __init__(self, app: ASGIApp, recent):
+        self.app = app
+        self.recent = recent
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        for name, _ in scope["headers"]:
+            if name in (b"authorization", b"x-warmup"):
+                await self.app(scope, receive, send)
+                return
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                content_type = MutableHeaders(scope=message).get("content-type", "")
+                if content_type.startswith("application/json"):
+                    query = scope.get("query_string", b"").decode("latin-1")
+                    self.recent.add(
+                        f"{scope['path']}?{query}" if query else scope["path"]
+                    )
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
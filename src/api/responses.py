@@ -0,0 +1,139 @@
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable, List, Sequence, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+
+from ..core import crud
+from ..core.cache import (
+    BookCache,
+    DataVersionTracker,
+    ResponseCache,
+    warmup_version_var,
+)
+from ..core.compression import SUPPORTED_ENCODINGS, negotiate_encoding
+from ..core.config import get_settings
+from ..core.serialization import book_rows_to_dicts, dumps
+from ..core.snapshot import get_catalog_snapshot
+
+
+class FastJSONResponse(Response):
+    """Resposta JSON serializada com orjson (ou json da stdlib como fallback)."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def to_json_content(adapter: TypeAdapter, value: Any) -> Any:
+    """Valida `value` (ORM ou dicts) com o adaptador e o converte para JSON."""
+    return adapter.dump_python(
+        adapter.validate_python(value, from_attributes=True), mode="json"
+    )
+
+
+@lru_cache
+def get_response_cache() -> ResponseCache:
+    settings = get_settings()
+    return ResponseCache(
+        max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+        encodings=SUPPORTED_ENCODINGS if settings.COMPRESSION_ENABLED else (),
+        min_compress_size=settings.COMPRESSION_MIN_SIZE,
+    )
+
+
+@lru_cache
+def get_book_cache() -> BookCache:
+    return BookCache(max_entries=get_settings().BOOK_CACHE_MAX_ENTRIES)
+
+
+@lru_cache
+def get_data_version_tracker() -> DataVersionTracker:
+    return DataVersionTracker(check_interval=get_settings().DATA_VERSION_CHECK_SECONDS)
+
+
+def cached_json_response(
+    request: Request, db: Session, key: Hashable, build: Callable[[], Any]
+) -> Response:
+    """
+    Retorna a resposta JSON de `build()` a partir do cache da versão atual dos
+    dados, servindo o corpo pré-comprimido quando o cliente aceita.
+
+    `build` deve retornar um conteúdo já no formato JSON (ex.: o resultado de
+    `model_dump(mode="json")`).
+    """
+    if not get_settings().RESPONSE_CACHE_ENABLED:
+        return FastJSONResponse(build())
+
+    response_cache = get_response_cache()
+    version = get_data_version_tracker().current(db)
+    entry = response_cache.get(key, version)
+    if entry is None:
+        entry = response_cache.put(key, version, dumps(build()))
+
+    headers = {"X-Data-Version": str(version)}
+    body = entry.body
+    if entry.encoded:
+        headers["Vary"] = "Accept-Encoding"
+        encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+        if encoding in entry.encoded:
+            body = entry.encoded[encoding]
+            headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def lookup_books(
+    db: Session, ids: Sequence[int] = (), upcs: Sequence[str] = ()
+) -> Tuple[Dict[int, dict], Dict[str, dict]]:
+    """
+    Resolve livros por id e por UPC, no formato JSON do `BookSchema`.
+
+    Os ids vêm do snapshot no modo SERVING_MODE=snapshot; o restante sai do
+    cache por livro e o que faltar é buscado com uma única query `IN (...)`
+    por tipo de chave. Retorna ({id: livro}, {upc: livro}) só com os
+    encontrados.
+    """
+    by_id: Dict[int, dict] = {}
+    snapshot = get_catalog_snapshot()
+    if snapshot is not None:
+        for book_id in ids:
+            index = snapshot.find_by_id(book_id)
+            if index is not None:
+                by_id[book_id] = snapshot.row(index)
+        ids = ()
+
+    # O cache por livro guarda uma versão só: o aquecimento não o usa, para
+    # não descartar os livros da versão ainda em uso
+    use_cache = (
+        get_settings().RESPONSE_CACHE_ENABLED and warmup_version_var.get() is None
+    )
+    if use_cache:
+        book_cache = get_book_cache()
+        version = get_data_version_tracker().current(db)
+        by_id.update(book_cache.get_many(ids, version))
+        cached_upcs = book_cache.ids_for_upcs(upcs, version)
+        cached = book_cache.get_many(cached_upcs.values(), version)
+        by_upc = {
+            upc: cached[book_id]
+            for upc, book_id in cached_upcs.items()
+            if book_id in cached
+        }
+    else:
+        by_upc = {}
+
+    fetched: List[dict] = []
+    missing_ids = [book_id for book_id in ids if book_id not in by_id]
+    if missing_ids:
+        fetched += book_rows_to_dicts(crud.get_book_rows_by_ids(db, missing_ids))
+    missing_upcs = [upc for upc in upcs if upc not in by_upc]
+    if missing_upcs:
+        fetched += book_rows_to_dicts(crud.get_book_rows_by_upcs(db, missing_upcs))
+    for book in fetched:
+        by_id[book["id"]] = book
+        by_upc[book["upc"]] = book
+    if use_cache and fetched:
+        book_cache.put_many(fetched, version)
+    return by_id, by_upc
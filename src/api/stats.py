@@ -1,38 +1,59 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request
 from sqlalchemy.orm import Session
+from datetime import datetime, timedelta, timezone
 from typing import List
 
 from ..core import crud, schemas
-from ..core.database import SessionLocal
+from .deps import get_db
+from .responses import cached_json_response, to_json_content
 
 router = APIRouter(prefix="/api/v1/stats", tags=["Statistics"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 @router.get("/overview", response_model=schemas.StatsOverviewSchema)
-def read_stats_overview(db: Session = Depends(get_db)):
+def read_stats_overview(request: Request, db: Session = Depends(get_db)):
     """
     Retorna um resumo completo com estatísticas gerais da coleção de livros.
     """
-    stats = crud.get_stats_overview(db)
-    category_stats = crud.get_stats_by_category(db)
 
-    # Adiciona as estatísticas de categoria ao dicionário principal
-    stats["categories_stats"] = category_stats
+    def build():
+        stats = crud.get_stats_overview(db)
+        category_stats = crud.get_stats_by_category(db)
+
+        # Adiciona as estatísticas de categoria ao dicionário principal
+        stats["categories_stats"] = category_stats
 
-    return stats
+        return schemas.StatsOverviewSchema.model_validate(
+            stats, from_attributes=True
+        ).model_dump(mode="json")
+
+    return cached_json_response(request, db, "stats-overview", build)
 
 
 @router.get("/categories", response_model=List[schemas.CategoryStatsSchema])
-def read_stats_by_category(db: Session = Depends(get_db)):
+def read_stats_by_category(request: Request, db: Session = Depends(get_db)):
     """
     Retorna estatísticas detalhadas para cada categoria de livro.
     """
-    return crud.get_stats_by_category(db)
+    return cached_json_response(
+        request,
+        db,
+        "stats-categories",
+        lambda: to_json_content(
+            schemas.CategoryStatsListAdapter, crud.get_stats_by_category(db)
+        ),
+    )
+
+
+@router.get("/price-movements", response_model=schemas.PriceMovementsSchema)
+def read_price_movements(
+    days: int = Query(30, ge=1, le=3650),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    """
+    Retorna as maiores variações de preço dos últimos `days` dias, a partir do
+    histórico gravado pelo carregador.
+    """
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    return crud.get_price_movements(db, since=since, limit=limit)
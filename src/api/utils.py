@@ -1,29 +1,57 @@
 import logging
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from ..core.database import SessionLocal
+from ..core.database import replica_set
 from ..core.schemas import HealthCheckSchema
+from .auth import get_current_user
+from .deps import get_db
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["Utilities"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 @router.get("/api/v1/health", response_model=HealthCheckSchema)
 def health_check(db: Session = Depends(get_db)):
     """Verifica o status da API e a conectividade com o banco de dados."""
+    replicas = {}
+    if replica_set is not None:
+        replica_set.check()
+        replicas = dict(replica_set.status)
     try:
         db.execute(text("SELECT 1"))
-        return HealthCheckSchema(status="ok", database_connection="ok")
+        return HealthCheckSchema(
+            status="ok", database_connection="ok", replicas=replicas
+        )
     except Exception as e:
         logger.error(f"Health check falhou na conexão com o DB: {e}")
-        return HealthCheckSchema(status="ok", database_connection="error")
+        return HealthCheckSchema(
+            status="ok", database_connection="error", replicas=replicas
+        )
+
+
+def _get_query_profiler(request: Request):
+    profiler = getattr(request.app.state, "query_profiler", None)
+    if profiler is None:
+        raise HTTPException(status_code=404, detail="Perfilamento de queries inativo")
+    return profiler
+
+
+@router.get("/api/v1/debug/queries", dependencies=[Depends(get_current_user)])
+def query_profiling_report(request: Request):
+    """
+    Retorna o resumo de queries por endpoint coletado pelo perfilador.
+    Disponível apenas com QUERY_PROFILING ativado e para usuários autenticados.
+    """
+    return _get_query_profiler(request).report()
+
+
+@router.delete(
+    "/api/v1/debug/queries",
+    status_code=204,
+    dependencies=[Depends(get_current_user)],
+)
+def reset_query_profiling(request: Request):
+    """Zera os contadores do perfilador de queries."""
+    _get_query_profiler(request).reset()
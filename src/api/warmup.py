@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import time
+from collections import Counter, deque
+from typing import Dict, Iterable, List, Optional
+
+import httpx
+from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
+
+from ..core import crud
+from ..core.cache import DataVersionTracker, warmup_version_var
+from ..core.database import ReadSessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Cabeçalho das requisições de aquecimento (não entram nos caminhos recentes)
+WARMUP_HEADER = "X-Warmup"
+
+
+async def warm_up_paths(
+    app: FastAPI, paths: Iterable[str], label: str = "Caches aquecidos"
+) -> Dict[str, float]:
+    """
+    Faz requisições GET in-process (sem rede) para `paths`, populando os caches
+    da aplicação. Retorna o tempo em ms de cada caminho aquecido.
+    """
+    timings = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://warmup", headers={WARMUP_HEADER: "1"}
+    ) as c:
+        for path in paths:
+            start = time.perf_counter()
+            try:
+                response = await c.get(path)
+            except Exception as e:
+                logger.warning(f"Falha ao aquecer {path}: {e}")
+                continue
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if response.status_code >= 400:
+                logger.warning(f"Aquecimento de {path} retornou {response.status_code}")
+                continue
+            timings[path] = round(elapsed_ms, 3)
+    logger.info(f"{label}: {timings}")
+    return timings
+
+
+class RecentPaths:
+    """
+    Caminhos (com query string) das últimas `max_entries` requisições GET
+    respondidas com JSON, registrados pelo `RecentPathsMiddleware`. As mais
+    frequentes entram no aquecimento de cada nova versão dos dados.
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        self._paths: deque = deque(maxlen=max_entries)
+
+    def add(self, path: str):
+        self._paths.append(path)
+
+    def most_common(self, count: int) -> List[str]:
+        return [path for path, _ in Counter(list(self._paths)).most_common(count)]
+
+
+def _read_data_version() -> int:
+    with ReadSessionLocal() as db:
+        return crud.get_data_version(db)
+
+
+class CacheWarmer:
+    """
+    Aquecimento a cada nova versão dos dados. Com ele, a versão servida pelo
+    worker deixa de seguir o banco diretamente (`DataVersionTracker.managed`):
+    ao notar uma versão nova, as consultas quentes são refeitas já com ela,
+    preenchendo os caches de respostas da nova versão e as páginas do SQLite,
+    e só então a versão é promovida. Até lá, as requisições continuam sendo
+    servidas pelos caches da versão anterior.
+    """
+
+    def __init__(
+        self,
+        app: FastAPI,
+        tracker: DataVersionTracker,
+        paths: Iterable[str],
+        recent: Optional[RecentPaths] = None,
+        hot_paths: int = 0,
+        interval: float = 1.0,
+    ):
+        self.app = app
+        self.tracker = tracker
+        self.static_paths = list(paths)
+        self.recent = recent
+        self.hot_paths = hot_paths
+        self.interval = interval
+
+    def paths(self) -> List[str]:
+        """WARMUP_PATHS seguidos dos caminhos recentes mais pedidos."""
+        paths = list(self.static_paths)
+        if self.recent is not None and self.hot_paths:
+            paths += [
+                path
+                for path in self.recent.most_common(self.hot_paths)
+                if path not in paths
+            ]
+        return paths
+
+    async def warm(self, version: Optional[int] = None) -> Dict[str, float]:
+        """Aquece os caches da `version` (padrão: a do banco) e passa a servi-la."""
+        if version is None:
+            version = await run_in_threadpool(_read_data_version)
+        start = time.perf_counter()
+        token = warmup_version_var.set(version)
+        try:
+            timings = await warm_up_paths(
+                self.app, self.paths(), f"Caches aquecidos (versão {version})"
+            )
+        finally:
+            warmup_version_var.reset(token)
+        previous = self.tracker.version
+        self.tracker.promote(version)
+        if previous is not None and previous != version:
+            logger.info(
+                f"Versão {version} dos dados no ar após aquecer {len(timings)} "
+                f"consultas em {(time.perf_counter() - start) * 1000:.1f} ms."
+            )
+        return timings
+
+    async def run(self):
+        """Confere a versão do banco a cada `interval` segundos (até ser cancelado)."""
+        self.tracker.managed = True
+        while True:
+            try:
+                version = await run_in_threadpool(_read_data_version)
+                if version != self.tracker.version:
+                    await self.warm(version)
+            except Exception as e:
+                logger.error(f"Falha no aquecimento da nova versão dos dados: {e}")
+            await asyncio.sleep(self.interval)
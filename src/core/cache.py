@@ -0,0 +1,173 @@
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from . import crud
+from .compression import compress
+
+# Versão dos dados das requisições de aquecimento (`api.warmup`): os caches da
+# nova versão são preenchidos antes de o worker passar a servi-la
+warmup_version_var: ContextVar[Optional[int]] = ContextVar(
+    "warmup_version", default=None
+)
+# Versões guardadas por chave no `ResponseCache`
+VERSIONS_PER_KEY = 2
+
+
+@dataclass
+class CachedBody:
+    """Corpo de resposta em cache, com as versões pré-comprimidas."""
+
+    version: int
+    body: bytes
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+
+
+class ResponseCache:
+    """
+    Cache LRU de corpos de resposta, invalidado pela versão dos dados.
+
+    Cada chave guarda os corpos das `VERSIONS_PER_KEY` versões mais recentes:
+    a servida e, durante o aquecimento, a seguinte.
+
+    Corpos com pelo menos `min_compress_size` bytes são comprimidos uma única
+    vez, no nível máximo, em cada codificação de `encodings`; as requisições
+    seguintes da mesma versão dos dados reutilizam os bytes comprimidos.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        encodings: Iterable[str] = (),
+        min_compress_size: int = 1024,
+    ):
+        self.max_entries = max_entries
+        self.encodings = tuple(encodings)
+        self.min_compress_size = min_compress_size
+        self._entries: "OrderedDict[Hashable, Dict[int, CachedBody]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: int) -> Optional[CachedBody]:
+        with self._lock:
+            entry = self._entries.get(key, {}).get(version)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Hashable, version: int, body: bytes) -> CachedBody:
+        entry = CachedBody(version=version, body=body)
+        if len(body) >= self.min_compress_size:
+            for encoding in self.encodings:
+                entry.encoded[encoding] = compress(body, encoding, best=True)
+        with self._lock:
+            versions = {**self._entries.get(key, {}), version: entry}
+            self._entries[key] = {
+                v: versions[v] for v in sorted(versions)[-VERSIONS_PER_KEY:]
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class BookCache:
+    """
+    Cache LRU de livros já no formato JSON do `BookSchema`, por id (e com um
+    índice de UPC para id). Tudo é descartado quando a versão dos dados muda.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._version: Optional[int] = None
+        self._books: "OrderedDict[int, dict]" = OrderedDict()
+        self._ids_by_upc: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _check_version(self, version: int):
+        if version != self._version:
+            self._books.clear()
+            self._ids_by_upc.clear()
+            self._version = version
+
+    def get_many(self, ids: Iterable[int], version: int) -> Dict[int, dict]:
+        with self._lock:
+            self._check_version(version)
+            found = {}
+            for book_id in ids:
+                book = self._books.get(book_id)
+                if book is not None:
+                    self._books.move_to_end(book_id)
+                    found[book_id] = book
+            return found
+
+    def ids_for_upcs(self, upcs: Iterable[str], version: int) -> Dict[str, int]:
+        with self._lock:
+            self._check_version(version)
+            return {
+                upc: self._ids_by_upc[upc]
+                for upc in upcs
+                if self._ids_by_upc.get(upc) in self._books
+            }
+
+    def put_many(self, books: List[dict], version: int):
+        with self._lock:
+            self._check_version(version)
+            for book in books:
+                self._books[book["id"]] = book
+                self._books.move_to_end(book["id"])
+                self._ids_by_upc[book["upc"]] = book["id"]
+            while len(self._books) > self.max_entries:
+                _, evicted = self._books.popitem(last=False)
+                self._ids_by_upc.pop(evicted["upc"], None)
+
+    def clear(self):
+        with self._lock:
+            self._books.clear()
+            self._ids_by_upc.clear()
+
+
+class DataVersionTracker:
+    """
+    Mantém a versão atual dos dados do catálogo, consultando o banco no máximo
+    uma vez a cada `check_interval` segundos.
+
+    Com `managed`, a versão só muda por `promote`: quem consulta o banco é o
+    `CacheWarmer` da API, que promove a nova versão depois de aquecer os
+    caches. As requisições de aquecimento veem a versão de `warmup_version_var`.
+    """
+
+    def __init__(self, check_interval: float = 1.0):
+        self.check_interval = check_interval
+        self.managed = False
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+
+    @property
+    def version(self) -> Optional[int]:
+        return self._version
+
+    def promote(self, version: int):
+        self._version = version
+        self._checked_at = time.monotonic()
+
+    def current(self, db: Session) -> int:
+        warmup_version = warmup_version_var.get()
+        if warmup_version is not None:
+            return warmup_version
+        if self.managed and self._version is not None:
+            return self._version
+        now = time.monotonic()
+        if self._version is None or now - self._checked_at >= self.check_interval:
+            self._version = crud.get_data_version(db)
+            self._checked_at = now
+        return self._version
@@ -0,0 +1,345 @@
+import csv
+import json
+import logging
+import os
+import struct
+import sys
+import zlib
+from array import array
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Formato colunar dos dados raspados (alternativa tipada e comprimida ao CSV):
+#
+#   MAGIC (8 bytes) | bloco | bloco | ...
+#   bloco = tamanho do cabeçalho (uint32) | cabeçalho JSON | colunas
+#
+# Cada bloco guarda até `chunk_size` linhas e se descreve sozinho, então
+# acrescentar dados (modo append) é só escrever mais blocos no fim do arquivo.
+# O cabeçalho lista, para cada coluna, o offset (relativo ao fim do
+# cabeçalho) e o tamanho da coluna comprimida com zlib, além do mínimo e do
+# máximo da coluna no bloco. Colunas numéricas são arrays do módulo `array`
+# (little-endian); colunas de texto são offsets int64 (linhas + 1, contados em
+# caracteres) seguidos do texto UTF-8 concatenado. O preço é gravado em
+# centavos (int64), sem arredondamento.
+#
+# Valores nulos (None, ou campo vazio em coluna não textual) ocupam um valor
+# qualquer na coluna (0 ou "") e são marcados em um bitmap por bloco (um bit
+# por linha), gravado como a seção extra "<coluna>.nulls" só quando o bloco
+# tem algum nulo nessa coluna. O mínimo e o máximo consideram só os valores
+# presentes (null se a coluna do bloco for toda nula).
+MAGIC = b"BKCOL001"
+SUFFIX = ".bkcol"
+DEFAULT_CHUNK_ROWS = 10_000
+
+# Colunas na ordem do CSV do scraper e o tipo de cada uma ("str" = texto)
+COLUMNS = {
+    "upc": "str",
+    "book_name": "str",
+    "currency": "str",
+    "price": "q",
+    "quantity": "i",
+    "availability": "b",
+    "rating": "b",
+    "number_of_reviews": "i",
+    "category": "str",
+    "description": "str",
+    "image_url": "str",
+    "source_page": "i",
+}
+
+_HEADER_LENGTH = struct.Struct("<I")
+_SWAP = sys.byteorder == "big"
+
+
+class ColumnarFormatError(ValueError):
+    """O arquivo não está no formato colunar esperado."""
+
+
+def is_columnar(path: str) -> bool:
+    """Arquivos com a extensão `.bkcol` usam o formato colunar."""
+    return path.endswith(SUFFIX)
+
+
+def _to_storage(name: str, value):
+    if value is None or (value == "" and COLUMNS[name] != "str"):
+        return None
+    if name == "price":
+        return int((Decimal(value) * 100).to_integral_value())
+    if name == "availability":
+        if isinstance(value, str):
+            return int(value.lower() == "true")
+        return int(bool(value))
+    if COLUMNS[name] == "str":
+        return str(value)
+    return int(value)
+
+
+def _from_storage(name: str, values: list) -> list:
+    if name == "price":
+        return [Decimal(cents).scaleb(-2) for cents in values]
+    if name == "availability":
+        return [bool(v) for v in values]
+    return values
+
+
+def _null_bitmap(nulls: list, rows: int) -> bytes:
+    bitmap = bytearray((rows + 7) // 8)
+    for i in nulls:
+        bitmap[i >> 3] |= 1 << (i & 7)
+    return bytes(bitmap)
+
+
+def _null_positions(bitmap: bytes, rows: int) -> list:
+    return [i for i in range(rows) if bitmap[i >> 3] >> (i & 7) & 1]
+
+
+def _encode(kind: str, values: list) -> bytes:
+    if kind != "str":
+        data = array(kind, values)
+        if _SWAP:
+            data.byteswap()
+        return data.tobytes()
+    offsets = array("q", [0])
+    position = 0
+    for value in values:
+        position += len(value)
+        offsets.append(position)
+    if _SWAP:
+        offsets.byteswap()
+    return offsets.tobytes() + "".join(values).encode("utf-8")
+
+
+def _decode(kind: str, data: bytes, rows: int) -> list:
+    if kind != "str":
+        values = array(kind)
+        values.frombytes(data)
+        if _SWAP:
+            values.byteswap()
+        return values.tolist()
+    split = (rows + 1) * 8
+    offsets = array("q")
+    offsets.frombytes(data[:split])
+    if _SWAP:
+        offsets.byteswap()
+    # Offsets em caracteres: o texto é decodificado uma vez e só fatiado
+    text = data[split:].decode("utf-8")
+    return [text[start:end] for start, end in zip(offsets, offsets[1:])]
+
+
+class ColumnarWriter:
+    """
+    Grava linhas (dicts com as chaves de `COLUMNS`) em blocos colunares.
+
+    Tem a mesma interface usada do `csv.DictWriter` (`writeheader` e
+    `writerow`), mais `flush_chunk`, que grava imediatamente o bloco em
+    andamento. Em modo append, um bloco incompleto no fim do arquivo (escrita
+    interrompida) é descartado antes de continuar.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        append: bool = False,
+        chunk_size: int = DEFAULT_CHUNK_ROWS,
+        level: int = 6,
+    ):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.level = level
+        self._rows: Dict[str, list] = {name: [] for name in COLUMNS}
+        self._count = 0
+        if append and os.path.exists(path) and os.path.getsize(path) > 0:
+            valid = ColumnarReader(path).valid_length()
+            self._file = open(path, "r+b")
+            self._file.truncate(valid)
+            self._file.seek(valid)
+        else:
+            self._file = open(path, "wb")
+            self._file.write(MAGIC)
+
+    def writeheader(self):
+        """Sem efeito: o esquema é fixo (compatibilidade com `csv.DictWriter`)."""
+
+    def writerow(self, row: Dict):
+        for name in COLUMNS:
+            self._rows[name].append(_to_storage(name, row.get(name)))
+        self._count += 1
+        if self._count >= self.chunk_size:
+            self.flush_chunk()
+
+    def flush_chunk(self):
+        """Grava as linhas acumuladas como um bloco (se houver alguma)."""
+        if not self._count:
+            return
+        columns = {}
+        blobs = []
+        offset = 0
+        for name, kind in COLUMNS.items():
+            for section, entry, blob in self._sections(name, kind, self._rows[name]):
+                columns[section] = {"offset": offset, "length": len(blob), **entry}
+                blobs.append(blob)
+                offset += len(blob)
+        header = json.dumps({"rows": self._count, "columns": columns}).encode()
+        self._file.write(_HEADER_LENGTH.pack(len(header)) + header + b"".join(blobs))
+        self._file.flush()
+        self._rows = {name: [] for name in COLUMNS}
+        self._count = 0
+
+    def _sections(self, name: str, kind: str, values: list) -> list:
+        """(nome, estatísticas, dados comprimidos) da coluna e do seu bitmap."""
+        nulls = [i for i, value in enumerate(values) if value is None]
+        if nulls:
+            present = [value for value in values if value is not None]
+            placeholder = "" if kind == "str" else 0
+            values = [placeholder if value is None else value for value in values]
+        else:
+            present = values
+        stats = {"min": min(present, default=None), "max": max(present, default=None)}
+        sections = [(name, stats, zlib.compress(_encode(kind, values), self.level))]
+        if nulls:
+            bitmap = _null_bitmap(nulls, len(values))
+            sections.append((f"{name}.nulls", {}, zlib.compress(bitmap, self.level)))
+        return sections
+
+    def close(self):
+        self.flush_chunk()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+@dataclass
+class Chunk:
+    """Um bloco do arquivo: número de linhas, estatísticas e posição."""
+
+    rows: int
+    columns: Dict[str, dict]
+    data_offset: int
+
+    def stats(self, name: str):
+        """
+        (mínimo, máximo) dos valores presentes da coluna no bloco, já no tipo
+        lido; (None, None) se todos forem nulos.
+        """
+        column = self.columns[name]
+        if column["min"] is None:
+            return None, None
+        low, high = _from_storage(name, [column["min"], column["max"]])
+        return low, high
+
+
+class ColumnarReader:
+    """
+    Lê um arquivo colunar bloco a bloco. Só as colunas pedidas são lidas e
+    descomprimidas; as estatísticas dos blocos vêm só dos cabeçalhos.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ColumnarFormatError(f"'{path}' não é um arquivo colunar.")
+
+    def _scan(self) -> Iterator[tuple]:
+        """(bloco, offset do fim do bloco) para cada bloco completo."""
+        size = os.path.getsize(self.path)
+        with open(self.path, "rb") as f:
+            position = len(MAGIC)
+            while position + _HEADER_LENGTH.size <= size:
+                f.seek(position)
+                (header_length,) = _HEADER_LENGTH.unpack(f.read(_HEADER_LENGTH.size))
+                data_offset = position + _HEADER_LENGTH.size + header_length
+                if data_offset > size:
+                    break
+                try:
+                    header = json.loads(f.read(header_length))
+                except ValueError:
+                    break
+                end = data_offset + sum(
+                    column["length"] for column in header["columns"].values()
+                )
+                if end > size:
+                    break
+                yield Chunk(header["rows"], header["columns"], data_offset), end
+                position = end
+            if position < size:
+                logger.warning(
+                    f"Bloco incompleto no fim de '{self.path}' ignorado "
+                    f"({size - position} bytes)."
+                )
+
+    def chunks(self) -> Iterator[Chunk]:
+        for chunk, _ in self._scan():
+            yield chunk
+
+    def valid_length(self) -> int:
+        """Tamanho do arquivo até o último bloco completo."""
+        length = len(MAGIC)
+        for _, end in self._scan():
+            length = end
+        return length
+
+    def read_chunk(
+        self, chunk: Chunk, columns: Optional[Iterable[str]] = None
+    ) -> Dict[str, list]:
+        """
+        Lê as colunas pedidas (todas, por padrão) de um bloco. Valores nulos
+        voltam como None.
+        """
+        names = list(columns) if columns is not None else list(COLUMNS)
+        batch = {}
+        with open(self.path, "rb") as f:
+
+            def section(name: str) -> bytes:
+                column = chunk.columns[name]
+                f.seek(chunk.data_offset + column["offset"])
+                return zlib.decompress(f.read(column["length"]))
+
+            for name in names:
+                values = _from_storage(
+                    name, _decode(COLUMNS[name], section(name), chunk.rows)
+                )
+                if f"{name}.nulls" in chunk.columns:
+                    bitmap = section(f"{name}.nulls")
+                    for i in _null_positions(bitmap, chunk.rows):
+                        values[i] = None
+                batch[name] = values
+        return batch
+
+    def iter_batches(
+        self, columns: Optional[Iterable[str]] = None
+    ) -> Iterator[Dict[str, list]]:
+        """Um dict coluna -> valores tipados por bloco."""
+        names = list(columns) if columns is not None else None
+        for chunk in self.chunks():
+            yield self.read_chunk(chunk, names)
+
+    def iter_rows(self, columns: Optional[Iterable[str]] = None) -> Iterator[Dict]:
+        """Uma linha (dict) por vez, com os valores já tipados."""
+        for batch in self.iter_batches(columns):
+            names = list(batch)
+            for values in zip(*(batch[name] for name in names)):
+                yield dict(zip(names, values))
+
+
+def convert_csv(
+    csv_path: str, output_path: str, chunk_size: int = DEFAULT_CHUNK_ROWS
+) -> int:
+    """Converte um CSV do scraper para o formato colunar. Retorna as linhas."""
+    rows = 0
+    with (
+        open(csv_path, newline="", encoding="utf-8") as csvfile,
+        ColumnarWriter(output_path, chunk_size=chunk_size) as writer,
+    ):
+        for row in csv.DictReader(csvfile):
+            writer.writerow(row)
+            rows += 1
+    return rows
@@ -0,0 +1,56 @@
+import gzip
+from typing import Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; aceita também o binding brotlicffi
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+# Em ordem de preferência quando o cliente aceita mais de uma
+SUPPORTED_ENCODINGS: Tuple[str, ...] = ("br", "gzip") if brotli else ("gzip",)
+
+# Tipos de conteúdo que valem a pena comprimir
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript")
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Escolhe a codificação suportada de maior preferência aceita pelo cliente."""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str, best: bool = False) -> bytes:
+    """
+    Comprime `body` com a codificação informada. Com `best`, usa o nível máximo
+    de compressão (apropriado para corpos que ficam em cache).
+    """
+    if encoding == "br":
+        return brotli.compress(body, quality=11 if best else 4)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=9 if best else 6)
+    raise ValueError(f"Codificação não suportada: {encoding}")
+
+
+def is_compressible(content_type: str) -> bool:
+    return content_type.startswith(COMPRESSIBLE_TYPES)
@@ -1,3 +1,6 @@
+from functools import lru_cache
+from typing import List
+
 from pydantic_settings import BaseSettings
 
 
@@ -8,9 +11,107 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_SECONDS: int
     # ACCESS_TOKEN_EXPIRE_MINUTES: int
 
+    # --- Perfilamento de queries (desligado por padrão) ---
+    QUERY_PROFILING: bool = False
+    # Queries acima deste tempo são logadas com parâmetros e plano de execução
+    SLOW_QUERY_THRESHOLD_MS: float = 100.0
+    # Requisições que executam mais queries que isso são sinalizadas (N+1)
+    MAX_QUERIES_PER_REQUEST: int = 10
+    # Inclui os parâmetros (truncados) no log de queries lentas; desligado por
+    # padrão, pois eles podem conter dados sensíveis (ex.: hash de senha)
+    SLOW_QUERY_LOG_PARAMS: bool = False
+
+    # --- Logging da API ---
+    LOG_LEVEL: str = "DEBUG"
+    # "text" (padrão) ou "json" (uma linha JSON por registro no api.log)
+    LOG_FORMAT: str = "text"
+    # Formatação e escrita dos logs em uma thread de fundo (QueueListener)
+    LOG_QUEUE: bool = True
+    # Fração das requisições bem-sucedidas registradas no log de acesso
+    ACCESS_LOG_SAMPLE_RATE: float = 1.0
+    # Requisições mais lentas que isso são sempre registradas
+    ACCESS_LOG_SLOW_MS: float = 1000.0
+
+    # --- Serialização ---
+    # Monta as listas de livros direto das colunas e serializa com orjson
+    # (quando instalado), sem validar cada linha com o Pydantic
+    FAST_JSON_RESPONSES: bool = False
+
+    # --- Compressão e cache de respostas ---
+    COMPRESSION_ENABLED: bool = True
+    # Respostas menores que isso (em bytes) seguem sem compressão
+    COMPRESSION_MIN_SIZE: int = 1024
+    # Cache de respostas (categorias, estatísticas, mais bem avaliados)
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_MAX_ENTRIES: int = 256
+    # Cache por livro (detalhe e busca em lote), descartado a cada nova versão
+    BOOK_CACHE_MAX_ENTRIES: int = 10000
+    # Máximo de ids + UPCs aceitos por POST /api/v1/books/batch
+    BATCH_MAX_ITEMS: int = 100
+    # Intervalo mínimo entre consultas à versão dos dados do catálogo
+    DATA_VERSION_CHECK_SECONDS: float = 1.0
+    # Comentário enviado pelo stream de mudanças (SSE) quando nada muda, para
+    # que proxies não derrubem a conexão ociosa
+    CHANGE_STREAM_HEARTBEAT_SECONDS: float = 15.0
+
+    # --- Snapshot do catálogo ---
+    # "database": leituras vão ao banco; "snapshot": listagem, busca, detalhe e
+    # categorias são servidos de um arquivo mapeado em memória, compartilhado
+    # entre os workers e regravado pelo carregador ao fim de cada carga
+    SERVING_MODE: str = "database"
+    CATALOG_SNAPSHOT_PATH: str = "data/catalog.snapshot"
+
+    # --- Capas dos livros (scripts.fetch_covers) ---
+    # Diretório endereçado pelo conteúdo servido em /api/v1/images
+    IMAGES_DIR: str = "data/images"
+    # Maior lado das miniaturas (geradas só com o Pillow instalado)
+    IMAGE_THUMBNAIL_SIZE: int = 200
+    # Imagens nunca mudam (o nome é o hash): cache de um ano no cliente
+    IMAGE_CACHE_MAX_AGE: int = 31536000
+
+    # --- Livros parecidos (src.core.related) ---
+    # Vizinhos pré-calculados por livro a cada carga (0 desliga o cálculo)
+    RELATED_BOOKS_TOP_K: int = 10
+
+    # --- Inicialização da aplicação ---
+    # "check": interrompe a inicialização se o banco não está na última
+    # migração do Alembic (`alembic upgrade head`; ~150 ms a mais);
+    # "create": cria as tabelas ausentes com create_all (desenvolvimento);
+    # "none": não verifica nada
+    DB_SCHEMA_STARTUP: str = "check"
+    # Conexões abertas no pool durante a inicialização
+    DB_POOL_WARM_CONNECTIONS: int = 1
+    # Pré-carrega os caches de respostas (WARMUP_PATHS) durante a inicialização
+    WARM_CACHES_ON_STARTUP: bool = True
+    WARMUP_PATHS: List[str] = [
+        "/api/v1/categories",
+        "/api/v1/stats/overview",
+        "/api/v1/stats/categories",
+        "/api/v1/books/top-rated",
+        "/api/v1/books",
+    ]
+    # A cada nova versão dos dados (nova carga), cada worker refaz as consultas
+    # de WARMUP_PATHS e as WARMUP_HOT_PATHS mais pedidas entre as últimas
+    # WARMUP_RECENT_REQUESTS, e só então passa a servir a nova versão
+    WARM_CACHES_ON_RELOAD: bool = True
+    WARMUP_HOT_PATHS: int = 20
+    WARMUP_RECENT_REQUESTS: int = 1000
+
     class Config:
         env_file = ".env"
 
 
-# Cria uma instância única das configurações que será usada em todo o projeto
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    """
+    Retorna a instância única das configurações, lida do .env apenas no
+    primeiro uso (e não na importação do módulo).
+    """
+    return Settings()
+
+
+def __getattr__(name: str):
+    # Mantém `from .config import settings` funcionando, de forma preguiçosa
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
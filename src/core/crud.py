@@ -1,11 +1,27 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import Float, func, desc, select, type_coerce, update
+from collections import defaultdict
+from datetime import datetime, timezone
 from decimal import Decimal
-from typing import Optional, List
+from typing import Iterable, Optional, List
 from statistics import median
+import re
+import unicodedata
 
 from . import models, schemas
 from .security import get_password_hash
+from .serialization import BOOK_FIELDS
+
+# Colunas de `models.Book` na ordem de `BOOK_FIELDS`, com o preço lido como
+# float para evitar a conversão para Decimal linha a linha
+BOOK_ROW_COLUMNS = [
+    (
+        type_coerce(models.Book.price, Float).label("price")
+        if name == "price"
+        else getattr(models.Book, name)
+    )
+    for name in BOOK_FIELDS
+]
 
 
 def get_books(db: Session, skip: int = 0, limit: int = 100):
@@ -13,27 +29,55 @@ def get_books(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.Book).offset(skip).limit(limit).all()
 
 
+def get_book_rows(db: Session, skip: int = 0, limit: int = 100) -> List[tuple]:
+    """Como `get_books`, mas retorna tuplas de colunas em vez de objetos ORM."""
+    return db.query(*BOOK_ROW_COLUMNS).offset(skip).limit(limit).all()
+
+
 def get_book_by_id(db: Session, book_id: int):
     """Busca um único livro no banco de dados pelo seu ID."""
     return db.query(models.Book).filter(models.Book.id == book_id).first()
 
 
+def get_book_rows_by_ids(db: Session, ids: Iterable[int]) -> List[tuple]:
+    """Busca vários livros pelo id em uma única query `IN (...)` (sem ordem)."""
+    return db.query(*BOOK_ROW_COLUMNS).filter(models.Book.id.in_(set(ids))).all()
+
+
+def get_book_rows_by_upcs(db: Session, upcs: Iterable[str]) -> List[tuple]:
+    """Busca vários livros pelo UPC em uma única query `IN (...)` (sem ordem)."""
+    return db.query(*BOOK_ROW_COLUMNS).filter(models.Book.upc.in_(set(upcs))).all()
+
+
 def search_books(
     db: Session, title: Optional[str] = None, category: Optional[str] = None
 ):
     """Busca livros por título e/ou categoria."""
-    query = db.query(models.Book)
+    return _filter_search(db.query(models.Book), title, category).all()
+
+
+def search_book_rows(
+    db: Session, title: Optional[str] = None, category: Optional[str] = None
+) -> List[tuple]:
+    """Como `search_books`, mas retorna tuplas de colunas."""
+    return _filter_search(db.query(*BOOK_ROW_COLUMNS), title, category).all()
+
+
+def _filter_search(query, title: Optional[str], category: Optional[str]):
     if title:
         query = query.filter(models.Book.book_name.ilike(f"%{title}%"))
     if category:
         query = query.filter(models.Book.category.ilike(f"%{category}%"))
-    return query.all()
+    return query
 
 
 def get_all_categories(db: Session) -> List[str]:
     """Retorna uma lista de todas as categorias únicas."""
     results = (
-        db.query(models.Book.category).distinct().order_by(models.Book.category).all()
+        db.query(models.Category.name)
+        .filter(models.Category.book_count > 0)
+        .order_by(models.Category.name)
+        .all()
     )
     return [category[0] for category in results]
 
@@ -42,20 +86,32 @@ def get_stats_overview(db: Session):
     """Calcula as estatísticas gerais da coleção."""
 
     total_books = db.query(models.Book).count()
-    total_categories = db.query(models.Book.category).distinct().count()
+    total_categories = (
+        db.query(models.Category).filter(models.Category.book_count > 0).count()
+    )
     total_stock_quantity = db.query(func.sum(models.Book.quantity)).scalar() or 0
 
     all_prices = [b.price for b in db.query(models.Book.price).all()]
     average_price = db.query(func.avg(models.Book.price)).scalar() or Decimal("0.0")
     median_price = median(all_prices) if all_prices else Decimal("0.0")
 
-    cheapest_book_obj = db.query(models.Book).order_by(models.Book.price.asc()).first()
+    # Empates desfeitos pelo menor id (como em `query_books`), para que o
+    # resultado não dependa do índice escolhido
+    cheapest_book_obj = (
+        db.query(models.Book)
+        .order_by(models.Book.price.asc(), models.Book.id.asc())
+        .first()
+    )
     most_expensive_book_obj = (
-        db.query(models.Book).order_by(models.Book.price.desc()).first()
+        db.query(models.Book)
+        .order_by(models.Book.price.desc(), models.Book.id.asc())
+        .first()
     )
 
     most_reviewed_book_obj = (
-        db.query(models.Book).order_by(models.Book.number_of_reviews.desc()).first()
+        db.query(models.Book)
+        .order_by(models.Book.number_of_reviews.desc(), models.Book.id.asc())
+        .first()
     )
 
     rating_dist_query = (
@@ -99,21 +155,193 @@ def get_stats_overview(db: Session):
 
 
 def get_stats_by_category(db: Session):
-    """Calcula estatísticas detalhadas por categoria."""
+    """Retorna as estatísticas por categoria (pré-calculadas pelo carregador)."""
     return (
         db.query(
-            models.Book.category,
-            func.count(models.Book.id).label("book_count"),
-            func.avg(models.Book.price).label("average_price"),
+            models.Category.name.label("category"),
+            models.Category.book_count,
+            models.Category.avg_price.label("average_price"),
         )
-        .group_by(models.Book.category)
+        .filter(models.Category.book_count > 0)
+        .order_by(models.Category.name)
         .all()
     )
 
 
+def slugify(name: str) -> str:
+    """Converte o nome de uma categoria em um slug ("Science Fiction" ->
+    "science-fiction")."""
+    ascii_name = (
+        unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    )
+    return re.sub(r"[^a-z0-9]+", "-", ascii_name.lower()).strip("-")
+
+
+def unique_slug(name: str, taken: set) -> str:
+    """
+    Slug de `name` que ainda não está em `taken`, com sufixo numérico em caso
+    de colisão ("Science-Fiction" -> "science-fiction-2"). Nomes sem nenhuma
+    letra ou dígito ASCII viram "categoria". Adiciona o slug a `taken`.
+    """
+    base = slugify(name) or "categoria"
+    slug, suffix = base, 2
+    while slug in taken:
+        slug = f"{base}-{suffix}"
+        suffix += 1
+    taken.add(slug)
+    return slug
+
+
+def _get_or_create_categories(db: Session, names: Iterable[str]) -> dict:
+    names = set(names)
+    categories = {
+        category.name: category
+        for category in db.query(models.Category).filter(
+            models.Category.name.in_(names)
+        )
+    }
+    missing = sorted(names - categories.keys())
+    taken = {slug for (slug,) in db.query(models.Category.slug)} if missing else set()
+    for name in missing:
+        category = models.Category(
+            name=name,
+            slug=unique_slug(name, taken),
+            book_count=0,
+            price_total=0,
+            total_stock=0,
+        )
+        db.add(category)
+        categories[name] = category
+    db.flush()
+    return categories
+
+
+def add_books_to_categories(db: Session, books: List[models.Book]):
+    """
+    Liga livros novos às suas categorias (criando as que faltarem) e atualiza
+    os agregados de forma incremental, sem reler a tabela de livros. Não faz
+    commit.
+    """
+    by_category = defaultdict(list)
+    for book in books:
+        if book.category:
+            by_category[book.category].append(book)
+    categories = _get_or_create_categories(db, by_category)
+
+    for name, group in by_category.items():
+        category = categories[name]
+        prices = [book.price for book in group]
+        category.book_count += len(group)
+        category.price_total += sum(prices)
+        category.total_stock += sum(book.quantity for book in group)
+        category.avg_price = (category.price_total / category.book_count).quantize(
+            Decimal("0.01")
+        )
+        known = [p for p in [category.min_price, category.max_price] if p is not None]
+        category.min_price = min(known + prices)
+        category.max_price = max(known + prices)
+        for book in group:
+            book.category_id = category.id
+
+
+def update_categories_for_changes(db: Session, changes: List[tuple]):
+    """
+    Aplica aos agregados das categorias as mudanças de preço e estoque de
+    livros existentes (`changes` como em `record_book_changes`, com o
+    `category_id` no estado atual), somando só a diferença entre o valor novo
+    e o anterior. Mínimo e máximo só são relidos do banco nas categorias em que
+    o preço anterior de algum livro era o mínimo ou o máximo. Deve ser chamada
+    depois de `record_book_changes`. Não faz commit.
+    """
+    by_category = defaultdict(list)
+    for current, data in changes:
+        if current.category_id is not None:
+            by_category[current.category_id].append((current, data))
+    if not by_category:
+        return
+    categories = db.query(models.Category).filter(models.Category.id.in_(by_category))
+
+    stale = []
+    for category in categories:
+        group = by_category[category.id]
+        old_prices = [current.price for current, _ in group]
+        new_prices = [data["price"] for _, data in group]
+        category.price_total += sum(new_prices) - sum(old_prices)
+        category.total_stock += sum(
+            data["quantity"] - current.quantity for current, data in group
+        )
+        category.avg_price = (category.price_total / category.book_count).quantize(
+            Decimal("0.01")
+        )
+        if category.min_price in old_prices or category.max_price in old_prices:
+            stale.append(category)
+        else:
+            category.min_price = min([category.min_price, *new_prices])
+            category.max_price = max([category.max_price, *new_prices])
+
+    if stale:
+        bounds = {
+            row.category_id: row
+            for row in db.query(
+                models.Book.category_id,
+                func.min(models.Book.price).label("min_price"),
+                func.max(models.Book.price).label("max_price"),
+            )
+            .filter(models.Book.category_id.in_([c.id for c in stale]))
+            .group_by(models.Book.category_id)
+        }
+        for category in stale:
+            category.min_price = bounds[category.id].min_price
+            category.max_price = bounds[category.id].max_price
+
+
+def rebuild_categories(db: Session):
+    """
+    Recalcula do zero a tabela de categorias e `books.category_id` a partir dos
+    livros (usado quando livros são removidos). Não faz commit.
+    """
+    names = db.query(models.Book.category).filter(models.Book.category.isnot(None))
+    _get_or_create_categories(db, [name for (name,) in names.distinct()])
+    db.execute(
+        update(models.Book).values(
+            category_id=select(models.Category.id)
+            .where(models.Category.name == models.Book.category)
+            .scalar_subquery()
+        )
+    )
+    aggregates = {
+        row.category_id: row
+        for row in db.query(
+            models.Book.category_id,
+            func.count(models.Book.id).label("book_count"),
+            func.sum(models.Book.price).label("price_total"),
+            func.min(models.Book.price).label("min_price"),
+            func.max(models.Book.price).label("max_price"),
+            func.sum(models.Book.quantity).label("total_stock"),
+        ).group_by(models.Book.category_id)
+    }
+    for category in db.query(models.Category):
+        row = aggregates.get(category.id)
+        category.book_count = row.book_count if row else 0
+        category.price_total = row.price_total if row else 0
+        category.total_stock = row.total_stock or 0 if row else 0
+        category.min_price = row.min_price if row else None
+        category.max_price = row.max_price if row else None
+        category.avg_price = (
+            (Decimal(row.price_total) / row.book_count).quantize(Decimal("0.01"))
+            if row
+            else None
+        )
+
+
 def get_top_rated_books(db: Session, limit: int = 5):
-    """Retorna os livros com a maior avaliação."""
-    return db.query(models.Book).order_by(desc(models.Book.rating)).limit(limit).all()
+    """Retorna os livros com a maior avaliação (empates: menor id primeiro)."""
+    return (
+        db.query(models.Book)
+        .order_by(desc(models.Book.rating), models.Book.id.asc())
+        .limit(limit)
+        .all()
+    )
 
 
 def get_books_by_price_range(db: Session, min_price: Decimal, max_price: Decimal):
@@ -121,9 +349,386 @@ def get_books_by_price_range(db: Session, min_price: Decimal, max_price: Decimal
     return (
         db.query(models.Book)
         .filter(models.Book.price.between(min_price, max_price))
+        .order_by(models.Book.price, models.Book.id)
+        .all()
+    )
+
+
+# Chaves aceitas em `sort` por `query_books` ("-" no início inverte a ordem)
+BOOK_SORT_COLUMNS = {
+    "id": models.Book.id,
+    "price": models.Book.price,
+    "rating": models.Book.rating,
+    "reviews": models.Book.number_of_reviews,
+    "quantity": models.Book.quantity,
+}
+
+
+def query_books(
+    db: Session,
+    title: Optional[str] = None,
+    category: Optional[str] = None,
+    min_price: Optional[Decimal] = None,
+    max_price: Optional[Decimal] = None,
+    min_rating: Optional[int] = None,
+    max_rating: Optional[int] = None,
+    available: Optional[bool] = None,
+    sort: str = "id",
+    skip: int = 0,
+    limit: Optional[int] = 20,
+) -> List[tuple]:
+    """
+    Combina filtros e ordenação em uma única query paginada (tuplas de colunas,
+    como `get_book_rows`). Empates na ordenação são sempre desfeitos pelo menor
+    id, em qualquer direção.
+    """
+    key = sort.lstrip("-+")
+    if key not in BOOK_SORT_COLUMNS:
+        raise ValueError(
+            f"Ordenação inválida: '{sort}'. Use uma de {sorted(BOOK_SORT_COLUMNS)}."
+        )
+    book = models.Book
+    filters = [
+        (category, lambda: book.category == category),
+        (min_price, lambda: book.price >= min_price),
+        (max_price, lambda: book.price <= max_price),
+        (min_rating, lambda: book.rating >= min_rating),
+        (max_rating, lambda: book.rating <= max_rating),
+        (available, lambda: book.availability == available),
+        (title or None, lambda: book.book_name.ilike(f"%{title}%")),
+    ]
+    query = db.query(*BOOK_ROW_COLUMNS)
+    for value, condition in filters:
+        if value is not None:
+            query = query.filter(condition())
+
+    column = BOOK_SORT_COLUMNS[key]
+    if sort.startswith("-"):
+        column = column.desc()
+    query = query.order_by(column, models.Book.id.asc()).offset(skip)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+
+# Campos de `Book` cujo histórico é mantido em `book_snapshots`
+TRACKED_FIELDS = ("price", "quantity", "rating")
+# Períodos aceitos na compactação do histórico (formato do strftime)
+HISTORY_BUCKETS = {"day": "%Y-%m-%d", "week": "%Y-%W", "month": "%Y-%m"}
+
+
+def record_new_books(db: Session, books: List[models.Book], captured_at: datetime):
+    """Grava o primeiro registro de histórico de livros recém-inseridos (já com
+    id). Não faz commit."""
+    db.bulk_insert_mappings(
+        models.BookSnapshot,
+        [
+            {
+                "book_id": book.id,
+                "captured_at": captured_at,
+                "price": book.price,
+                "quantity": book.quantity,
+                "rating": book.rating,
+            }
+            for book in books
+        ],
+    )
+
+
+def record_book_changes(db: Session, changes: List[tuple], captured_at: datetime):
+    """
+    Aplica mudanças de preço/estoque/avaliação e grava uma linha de histórico
+    por livro alterado, com os valores anteriores. `changes` é uma lista de
+    (estado atual, novos dados). Não faz commit.
+    """
+    db.bulk_update_mappings(
+        models.Book,
+        [
+            {
+                "id": current.id,
+                "availability": data["availability"],
+                **{field: data[field] for field in TRACKED_FIELDS},
+            }
+            for current, data in changes
+        ],
+    )
+    record_book_snapshots(db, changes, captured_at)
+
+
+def record_book_snapshots(db: Session, changes: List[tuple], captured_at: datetime):
+    """Grava uma linha de histórico por (estado anterior, novos dados), sem
+    alterar o livro. Não faz commit."""
+    db.bulk_insert_mappings(
+        models.BookSnapshot,
+        [
+            {
+                "book_id": current.id,
+                "captured_at": captured_at,
+                "previous_price": current.price,
+                "previous_quantity": current.quantity,
+                **{field: data[field] for field in TRACKED_FIELDS},
+            }
+            for current, data in changes
+        ],
+    )
+
+
+def delete_book_history(db: Session, book_ids: Optional[Iterable[int]] = None):
+    """
+    Apaga o histórico dos livros `book_ids` ou, sem eles, o de livros que não
+    existem mais (restos de um `--clear_table` interrompido), para que um id
+    livre não herde o histórico de outro livro. Não faz commit.
+    """
+    snapshot = models.BookSnapshot
+    if book_ids is None:
+        db.query(snapshot).filter(
+            snapshot.book_id.not_in(select(models.Book.id))
+        ).delete(synchronize_session=False)
+        return
+    book_ids = list(book_ids)
+    for start in range(0, len(book_ids), 500):
+        chunk = book_ids[start : start + 500]
+        db.query(snapshot).filter(snapshot.book_id.in_(chunk)).delete(
+            synchronize_session=False
+        )
+
+
+# Tipos de mudança gravados no feed `book_changes`
+CHANGE_INSERT = "insert"
+CHANGE_UPDATE = "update"
+CHANGE_DELETE = "delete"
+
+
+def record_catalog_changes(
+    db: Session,
+    data_version: int,
+    changed_at: datetime,
+    inserted: Iterable[int] = (),
+    updated: Iterable[int] = (),
+    deleted: Iterable[int] = (),
+):
+    """Grava no feed de mudanças os ids removidos, inseridos e alterados na
+    versão `data_version`, nessa ordem. Não faz commit."""
+    db.bulk_insert_mappings(
+        models.BookChange,
+        [
+            {
+                "book_id": book_id,
+                "change": change,
+                "data_version": data_version,
+                "changed_at": changed_at,
+            }
+            for change, ids in (
+                (CHANGE_DELETE, deleted),
+                (CHANGE_INSERT, inserted),
+                (CHANGE_UPDATE, updated),
+            )
+            for book_id in ids
+        ],
+    )
+
+
+def get_book_changes(db: Session, since: int = 0, limit: int = 500):
+    """Mudanças com `seq` maior que `since`, em ordem (varredura pela chave)."""
+    change = models.BookChange
+    return (
+        db.query(change).filter(change.seq > since).order_by(change.seq).limit(limit)
+    ).all()
+
+
+def get_last_change_seq(db: Session) -> int:
+    return db.query(func.max(models.BookChange.seq)).scalar() or 0
+
+
+def _as_utc(moment: datetime) -> datetime:
+    # O histórico é gravado em UTC; datas sem fuso são consideradas UTC
+    return moment.astimezone(timezone.utc) if moment.tzinfo else moment
+
+
+def get_book_history(
+    db: Session,
+    book_id: int,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = 100,
+):
+    """Histórico de um livro, do registro mais recente para o mais antigo
+    (varredura pelo índice livro + data)."""
+    snapshot = models.BookSnapshot
+    query = db.query(snapshot).filter(snapshot.book_id == book_id)
+    if since is not None:
+        query = query.filter(snapshot.captured_at >= _as_utc(since))
+    if until is not None:
+        query = query.filter(snapshot.captured_at <= _as_utc(until))
+    return (
+        query.order_by(snapshot.captured_at.desc(), snapshot.id.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def get_book_cover_hash(db: Session, book_id: int) -> Optional[str]:
+    """Hash da capa baixada do livro (None se o livro ou a capa não existir)."""
+    return (
+        db.query(models.BookImage.content_hash)
+        .join(models.Book, models.Book.image_url == models.BookImage.source_url)
+        .filter(models.Book.id == book_id)
+        .scalar()
+    )
+
+
+def get_related_book_ids(db: Session, book_id: int, limit: int = 10) -> List[int]:
+    """Ids dos livros parecidos com o livro, na ordem pré-calculada em
+    `book_related` (varredura pela chave livro + posição)."""
+    related = models.BookRelated
+    rows = (
+        db.query(related.related_book_id)
+        .filter(related.book_id == book_id)
+        .order_by(related.rank)
+        .limit(limit)
+    )
+    return [row[0] for row in rows]
+
+
+def get_price_movements(db: Session, since: datetime, limit: int = 10) -> dict:
+    """
+    Variação de preço dos livros desde `since`: compara o preço anterior ao
+    primeiro registro do período com o preço do último. Só os registros do
+    período são lidos (índice por data).
+    """
+    snapshot = models.BookSnapshot
+    window = (
+        db.query(
+            snapshot.book_id,
+            func.min(snapshot.id).label("first_id"),
+            func.max(snapshot.id).label("last_id"),
+        )
+        .filter(snapshot.captured_at >= since)
+        .group_by(snapshot.book_id)
+        .subquery()
+    )
+    first = aliased(snapshot)
+    last = aliased(snapshot)
+    rows = (
+        db.query(
+            window.c.book_id,
+            models.Book.book_name,
+            func.coalesce(first.previous_price, first.price).label("old_price"),
+            last.price.label("new_price"),
+        )
+        .join(first, first.id == window.c.first_id)
+        .join(last, last.id == window.c.last_id)
+        .join(models.Book, models.Book.id == window.c.book_id)
         .all()
     )
 
+    movements = []
+    for row in rows:
+        old_price = Decimal(row.old_price)
+        new_price = Decimal(row.new_price)
+        if old_price == new_price:
+            continue
+        change = new_price - old_price
+        movements.append(
+            {
+                "book_id": row.book_id,
+                "book_name": row.book_name,
+                "old_price": old_price,
+                "new_price": new_price,
+                "change": change,
+                "change_pct": (
+                    round(float(change / old_price) * 100, 2) if old_price else None
+                ),
+            }
+        )
+    movements.sort(key=lambda m: (-abs(m["change"]), m["book_id"]))
+    return {
+        "since": since,
+        "changed_books": len(movements),
+        "increases": sum(1 for m in movements if m["change"] > 0),
+        "decreases": sum(1 for m in movements if m["change"] < 0),
+        "movements": movements[:limit],
+    }
+
+
+# Registros removidos/atualizados por vez durante a compactação do histórico
+HISTORY_COMPACTION_BATCH = 500
+
+
+def _compact_book_groups(groups: dict, to_delete: list, updates: list):
+    # Mantém o último registro de cada período, com os valores anteriores do
+    # primeiro
+    for group in groups.values():
+        if len(group) < 2:
+            continue
+        first, kept = group[0], group[-1]
+        to_delete.extend(row.id for row in group[:-1])
+        updates.append(
+            {
+                "id": kept.id,
+                "previous_price": first.previous_price,
+                "previous_quantity": first.previous_quantity,
+            }
+        )
+
+
+def _apply_history_compaction(db: Session, to_delete: list, updates: list):
+    snapshot = models.BookSnapshot
+    db.bulk_update_mappings(snapshot, updates)
+    for start in range(0, len(to_delete), HISTORY_COMPACTION_BATCH):
+        chunk = to_delete[start : start + HISTORY_COMPACTION_BATCH]
+        db.query(snapshot).filter(snapshot.id.in_(chunk)).delete(
+            synchronize_session=False
+        )
+    to_delete.clear()
+    updates.clear()
+
+
+def compact_book_history(db: Session, older_than: datetime, bucket: str = "day"):
+    """
+    Reduz o histórico anterior a `older_than` a um registro por livro por
+    período ("day", "week" ou "month"), mantendo o último de cada período. O
+    registro mantido herda os valores anteriores do primeiro, para que as
+    variações continuem corretas. O histórico é lido em lotes, ordenado por
+    livro, e só os registros de um livro ficam em memória por vez. Não faz
+    commit; retorna quantos registros foram removidos.
+    """
+    date_format = HISTORY_BUCKETS[bucket]
+    snapshot = models.BookSnapshot
+    rows = (
+        db.query(
+            snapshot.id,
+            snapshot.book_id,
+            snapshot.captured_at,
+            snapshot.previous_price,
+            snapshot.previous_quantity,
+        )
+        .filter(snapshot.captured_at < older_than)
+        .order_by(snapshot.book_id, snapshot.id)
+        .yield_per(HISTORY_COMPACTION_BATCH)
+    )
+
+    removed = 0
+    to_delete = []
+    updates = []
+    book_id = None
+    groups = defaultdict(list)
+    for row in rows:
+        if row.book_id != book_id:
+            # Os registros do livro anterior estão completos
+            _compact_book_groups(groups, to_delete, updates)
+            if len(to_delete) >= HISTORY_COMPACTION_BATCH:
+                removed += len(to_delete)
+                _apply_history_compaction(db, to_delete, updates)
+            book_id = row.book_id
+            groups = defaultdict(list)
+        groups[row.captured_at.strftime(date_format)].append(row)
+    _compact_book_groups(groups, to_delete, updates)
+    if to_delete:
+        removed += len(to_delete)
+        _apply_history_compaction(db, to_delete, updates)
+    return removed
+
 
 def get_user_by_username(db: Session, username: str):
     """Busca um usuário pelo seu nome de usuário."""
@@ -138,3 +743,27 @@ def create_user(db: Session, user: schemas.UserCreateSchema):
     db.commit()
     db.refresh(db_user)
     return db_user
+
+
+def get_data_version(db: Session) -> int:
+    """Retorna a versão atual dos dados do catálogo (0 se nunca carregado)."""
+    version = (
+        db.query(models.CatalogState.data_version)
+        .filter(models.CatalogState.id == 1)
+        .scalar()
+    )
+    return version or 0
+
+
+def bump_data_version(db: Session) -> int:
+    """
+    Incrementa a versão dos dados do catálogo. Não faz commit: deve ser chamada
+    na mesma transação que altera os livros.
+    """
+    state = db.get(models.CatalogState, 1)
+    if state is None:
+        state = models.CatalogState(id=1, data_version=0)
+        db.add(state)
+    state.data_version += 1
+    state.updated_at = datetime.now(timezone.utc)
+    return state.data_version
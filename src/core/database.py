@@ -1,13 +1,176 @@
-from sqlalchemy import create_engine
+import logging
+import os
+
+from sqlalchemy import create_engine, event, exc, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
+from .routing import ReplicaSet, RoutingSession
+
 # Define o caminho para o arquivo do banco de dados SQLite
 # Ele será criado na pasta 'data' na raiz do projeto
-DATABASE_URL = "sqlite:///./data/books.db"
+# (pode ser sobrescrito pela variável de ambiente DATABASE_URL)
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./data/books.db")
 
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def _file_id(path: str):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+
+def recycle_on_file_swap(pool_engine):
+    """
+    Descarta conexões abertas sobre um arquivo SQLite que foi substituído (ex.:
+    pela recarga atômica do carregador): ao retirar uma conexão do pool, se o
+    arquivo no caminho do banco não é mais o mesmo, o pool abre outra.
+    """
+    url = pool_engine.url
+    if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:"):
+        return
+    if url.database.startswith("file:"):
+        return
+    path = os.path.abspath(url.database)
+
+    @event.listens_for(pool_engine, "connect")
+    def _remember_file(dbapi_connection, connection_record):
+        connection_record.info["file_id"] = _file_id(path)
+
+    @event.listens_for(pool_engine, "checkout")
+    def _check_file(dbapi_connection, connection_record, connection_proxy):
+        if connection_record.info.get("file_id") != _file_id(path):
+            raise exc.DisconnectionError(f"Banco '{path}' substituído; reconectando.")
+
+
+recycle_on_file_swap(engine)
+
+# Réplicas opcionais para as leituras, separadas por vírgula (ex.: cópias do
+# SQLite abertas em modo somente leitura). As escritas vão sempre para o
+# engine principal; veja `src/core/routing.py`.
+DATABASE_REPLICA_URLS = [
+    url.strip()
+    for url in os.getenv(
+        "DATABASE_REPLICA_URLS", os.getenv("DATABASE_REPLICA_URL", "")
+    ).split(",")
+    if url.strip()
+]
+replica_engines = [
+    create_engine(url, connect_args={"check_same_thread": False})
+    for url in DATABASE_REPLICA_URLS
+]
+for replica_engine in replica_engines:
+    recycle_on_file_swap(replica_engine)
+replica_set = (
+    ReplicaSet(
+        engine,
+        replica_engines,
+        check_interval=float(os.getenv("REPLICA_HEALTH_CHECK_SECONDS", "5")),
+        max_lag_versions=int(os.getenv("REPLICA_MAX_LAG_VERSIONS", "0")),
+    )
+    if replica_engines
+    else None
+)
+
+SessionLocal = sessionmaker(
+    class_=RoutingSession,
+    autocommit=False,
+    autoflush=False,
+    bind=engine,
+    replica_set=replica_set,
+)
+# Sessões das rotas de leitura: mesmo roteamento, mas sem permitir escritas
+ReadSessionLocal = sessionmaker(
+    class_=RoutingSession,
+    autocommit=False,
+    autoflush=False,
+    bind=engine,
+    replica_set=replica_set,
+)
+
+
+@event.listens_for(ReadSessionLocal, "before_flush")
+def _reject_writes(session, flush_context, instances):
+    raise RuntimeError("Tentativa de escrita em uma sessão somente leitura.")
+
+
+@event.listens_for(ReadSessionLocal, "after_begin")
+def _begin_read_only(session, transaction, connection):
+    # O before_flush só vale para o ORM: comandos Core e SQL textual são
+    # barrados pelo próprio banco, na conexão usada pela sessão de leitura
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql("PRAGMA query_only = ON")
+        connection.info["query_only"] = True
+    else:
+        connection.exec_driver_sql("SET TRANSACTION READ ONLY")
+
+
+def reset_query_only_on_checkin(pool_engine):
+    """
+    Desliga o `PRAGMA query_only` ligado por uma sessão de leitura quando a
+    conexão volta ao pool, para que as sessões de escrita possam reutilizá-la.
+    """
+
+    @event.listens_for(pool_engine, "checkin")
+    def _reset_query_only(dbapi_connection, connection_record):
+        if dbapi_connection is None:
+            return
+        if connection_record.info.pop("query_only", False):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA query_only = OFF")
+            cursor.close()
+
+
+for pool_engine in [engine, *replica_engines]:
+    reset_query_only_on_checkin(pool_engine)
+
 
 # Base que os modelos ORM irão herdar
 Base = declarative_base()
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+
+def check_schema_revision() -> bool:
+    """
+    Compara a revisão do Alembic registrada no banco com a última migração.
+    Retorna False (e loga um aviso) se o banco estiver desatualizado.
+    """
+    from alembic.config import Config
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    config = Config(os.path.join(PROJECT_ROOT, "alembic.ini"))
+    heads = set(ScriptDirectory.from_config(config).get_heads())
+    with engine.connect() as connection:
+        current = set(MigrationContext.configure(connection).get_current_heads())
+    if current != heads:
+        logger.warning(
+            f"O banco está na revisão {sorted(current) or 'nenhuma'}, mas a última "
+            f"migração é {sorted(heads)}. Execute 'alembic upgrade head'."
+        )
+        return False
+    return True
+
+
+def warm_connection_pool(connections: int = 1):
+    """
+    Abre `connections` conexões no pool, para que a primeira requisição não
+    pague o custo de conexão.
+    """
+    opened = []
+    engines = [engine, *replica_engines]
+    try:
+        for _ in range(connections):
+            for pool_engine in engines:
+                connection = pool_engine.connect()
+                connection.execute(text("SELECT 1"))
+                opened.append(connection)
+    finally:
+        for connection in opened:
+            connection.close()
@@ -0,0 +1,103 @@
+import hashlib
+import io
+import logging
+import os
+import re
+import tempfile
+from typing import Optional
+
+try:  # Pillow é opcional; sem ele as miniaturas não são geradas
+    from PIL import Image
+except ImportError:  # pragma: no cover - depende do ambiente
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+# Hash SHA-256 em hexadecimal: o nome de cada imagem no diretório
+CONTENT_HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+# Assinaturas (primeiros bytes) dos formatos aceitos
+SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+ORIGINAL = "original"
+THUMBNAIL = "thumb"
+
+
+def sniff_content_type(data: bytes) -> Optional[str]:
+    """Tipo da imagem pelos primeiros bytes (None se não for um formato aceito)."""
+    for signature, content_type in SIGNATURES:
+        if data.startswith(signature):
+            return content_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class ImageStore:
+    """
+    Diretório de imagens endereçado pelo conteúdo:
+
+        <root>/original/ab/<sha256>   bytes baixados, sem alteração
+        <root>/thumb/ab/<sha256>      miniatura JPEG (com Pillow)
+
+    Como o nome é o hash do conteúdo, o mesmo arquivo serve todas as URLs com
+    a mesma imagem, e um arquivo nunca muda depois de gravado.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, digest: str, variant: str = ORIGINAL) -> str:
+        return os.path.join(self.root, variant, digest[:2], digest)
+
+    def exists(self, digest: str, variant: str = ORIGINAL) -> bool:
+        return os.path.exists(self.path(digest, variant))
+
+    def put(self, data: bytes) -> tuple[str, bool]:
+        """Grava a imagem (se ainda não existir). Retorna (hash, se era nova)."""
+        digest = content_hash(data)
+        if self.exists(digest):
+            return digest, False
+        write_atomically(self.path(digest), data)
+        return digest, True
+
+
+def write_atomically(path: str, data: bytes):
+    """Grava em um arquivo temporário e o renomeia: leitores nunca veem meio arquivo."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def make_thumbnail(source: str, destination: str, max_size: int) -> bool:
+    """
+    Gera a miniatura JPEG de `source` com o maior lado de até `max_size` px.
+    Função de módulo para rodar em um ProcessPoolExecutor. Retorna False se o
+    Pillow não estiver instalado ou a imagem não puder ser lida.
+    """
+    if Image is None:
+        return False
+    buffer = io.BytesIO()
+    try:
+        with Image.open(source) as image:
+            image.thumbnail((max_size, max_size))
+            image.convert("RGB").save(buffer, "JPEG", quality=85, optimize=True)
+    except OSError as e:
+        logger.error(f"Não foi possível gerar a miniatura de '{source}': {e}")
+        return False
+    write_atomically(destination, buffer.getvalue())
+    return True
@@ -1,12 +1,84 @@
+import atexit
+import copy
+import json
+import logging
 import logging.config
 import os
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
 
 LOGS_DIR = "logs"
-os.makedirs(LOGS_DIR, exist_ok=True)
+
+# Listener da fila de logs em execução (um por processo)
+_queue_listener: Optional[QueueListener] = None
+
+# Id da requisição em andamento, anexado a todos os registros de log
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Campos extras (passados via `extra=`) incluídos nas linhas JSON
+JSON_EXTRA_FIELDS = (
+    "request_id",
+    "method",
+    "route",
+    "path",
+    "status",
+    "latency_ms",
+    "client",
+)
+
+
+class RequestIdFilter(logging.Filter):
+    """Anexa o id da requisição atual ao registro de log."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "request_id", None) is None:
+            record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Formata cada registro como uma linha JSON."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for name in JSON_EXTRA_FIELDS:
+            value = getattr(record, name, None)
+            if value is not None:
+                data[name] = value
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class StructuredQueueHandler(QueueHandler):
+    """
+    `QueueHandler` que mantém `exc_info` e `stack_info` no registro enfileirado.
+
+    O `prepare` padrão formata o traceback dentro da mensagem e descarta
+    `exc_info`; aqui só a mensagem é montada na thread da requisição, e o
+    traceback é formatado pelo listener (como campo próprio no JSON).
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.msg = record.getMessage()
+        record.args = None
+        return record
+
 
 BASE_CONFIG = {
     "version": 1,
     "disable_existing_loggers": False,
+    "filters": {
+        "request_id": {"()": RequestIdFilter},
+    },
     "formatters": {
         "default": {
             "format": "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
@@ -15,6 +87,9 @@ BASE_CONFIG = {
         "simple_console": {
             "format": "%(message)s",
         },
+        "json": {
+            "()": JsonFormatter,
+        },
     },
     "handlers": {
         "console": {
@@ -36,7 +111,8 @@ BASE_CONFIG = {
 
 def setup_pipeline_logging():
     """Configura o logging para os scripts de ingestão de dados."""
-    config = BASE_CONFIG.copy()
+    os.makedirs(LOGS_DIR, exist_ok=True)
+    config = copy.deepcopy(BASE_CONFIG)
     config["handlers"]["pipeline_file"] = {
         "class": "logging.handlers.RotatingFileHandler",
         "formatter": "default",
@@ -50,27 +126,81 @@ def setup_pipeline_logging():
     logging.config.dictConfig(config)
 
 
-def setup_api_logging():
-    """Configura o logging para a aplicação FastAPI."""
-    config = BASE_CONFIG.copy()
+def setup_api_logging(
+    json_logs: bool = False,
+    use_queue: bool = True,
+    level: str = "DEBUG",
+    access_middleware: bool = True,
+):
+    """
+    Configura o logging para a aplicação FastAPI.
+
+    Com `use_queue`, os registros são apenas enfileirados na thread da
+    requisição; a formatação e a escrita em arquivo/console acontecem em uma
+    thread de fundo (`QueueListener`). Com `json_logs`, o arquivo `api.log`
+    recebe uma linha JSON por registro. Com `access_middleware` (o
+    `AccessLogMiddleware` instalado), o log de acesso do uvicorn fica só com
+    avisos e `api.access` passa a ser o único log de acesso.
+    """
+    global _queue_listener
+    # Escreve o que estiver pendente antes de trocar os handlers; sem isso,
+    # cada nova configuração deixaria a thread do listener anterior rodando
+    stop_api_logging()
+    os.makedirs(LOGS_DIR, exist_ok=True)
+    config = copy.deepcopy(BASE_CONFIG)
+    config["root"]["level"] = level
     config["handlers"]["api_file"] = {
         "class": "logging.handlers.RotatingFileHandler",
-        "formatter": "default",
+        "formatter": "json" if json_logs else "default",
         "filename": os.path.join(LOGS_DIR, "api.log"),
         "maxBytes": 1024 * 1024 * 5,
         "backupCount": 3,
         "encoding": "utf-8",
         "level": "DEBUG",
     }
-    config["loggers"]["uvicorn.access"] = {
-        "handlers": ["api_file", "console"],
-        "level": "INFO",
-        "propagate": False,
-    }
-    config["loggers"]["uvicorn.error"] = {
-        "handlers": ["api_file", "console"],
-        "level": "INFO",
-        "propagate": False,
-    }
-    config["root"]["handlers"].append("api_file")
+    output_handlers = ["api_file", "console"]
+
+    if use_queue:
+        config["handlers"]["queue"] = {
+            "class": StructuredQueueHandler,
+            "handlers": output_handlers,
+            "respect_handler_level": True,
+            "filters": ["request_id"],
+        }
+        handlers = ["queue"]
+    else:
+        for name in output_handlers:
+            config["handlers"][name]["filters"] = ["request_id"]
+        handlers = output_handlers
+
+    for name in ("uvicorn.access", "uvicorn.error", "api.access"):
+        config["loggers"][name] = {
+            "handlers": handlers,
+            "level": "INFO",
+            "propagate": False,
+        }
+    if access_middleware:
+        # Sem isso, cada requisição apareceria duas vezes, e a linha do uvicorn
+        # (sem amostragem, id, rota ou latência) ignoraria ACCESS_LOG_SAMPLE_RATE
+        config["loggers"]["uvicorn.access"]["level"] = "WARNING"
+    config["root"]["handlers"] = handlers
     logging.config.dictConfig(config)
+
+    if use_queue:
+        _queue_listener = logging.getHandlerByName("queue").listener
+        _queue_listener.start()
+
+
+def stop_api_logging():
+    """
+    Para a thread de fundo do logging da API, escrevendo os registros ainda
+    na fila. Não faz nada se o logging não estiver usando a fila.
+    """
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
+
+
+# Garante que os registros pendentes sejam escritos ao encerrar
+atexit.register(stop_api_logging)
@@ -1,4 +1,15 @@
-from sqlalchemy import Column, Integer, String, Numeric, Boolean, Text
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Numeric,
+    Boolean,
+    Text,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+)
 
 # Using the Base in database.py
 from .database import Base
@@ -6,22 +17,117 @@ from .database import Base
 
 class Book(Base):
     __tablename__ = "books"
+    # Índices usados pelos filtros e ordenações de `crud.query_books`
+    __table_args__ = (Index("ix_books_category_price", "category", "price"),)
 
     id = Column(Integer, primary_key=True, index=True)
     upc = Column(String(50), unique=True, nullable=False, index=True)
     book_name = Column(String(255), nullable=False)
     currency = Column(String(3), nullable=False, default="GBP")
-    price = Column(Numeric(10, 2), nullable=False)
+    price = Column(Numeric(10, 2), nullable=False, index=True)
     quantity = Column(Integer, nullable=False)
     availability = Column(Boolean, default=True)
-    rating = Column(Integer)
-    number_of_reviews = Column(Integer, default=0)
+    rating = Column(Integer, index=True)
+    number_of_reviews = Column(Integer, default=0, index=True)
     category = Column(String(100))
+    category_id = Column(Integer, ForeignKey("categories.id"), index=True)
     description = Column(Text)
     image_url = Column(String(255))
     source_page = Column(Integer)
 
 
+class BookSnapshot(Base):
+    """
+    Histórico de preço, estoque e avaliação de um livro. O carregador só grava
+    uma linha quando algum desses valores muda (e na primeira carga do livro).
+    """
+
+    __tablename__ = "book_snapshots"
+    # Consultas de histórico são varreduras por intervalo (livro + data)
+    __table_args__ = (
+        Index("ix_book_snapshots_book_id_captured_at", "book_id", "captured_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    book_id = Column(Integer, ForeignKey("books.id"), nullable=False)
+    captured_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    price = Column(Numeric(10, 2), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    rating = Column(Integer)
+    # Valores anteriores à mudança (nulos no primeiro registro do livro)
+    previous_price = Column(Numeric(10, 2))
+    previous_quantity = Column(Integer)
+
+
+class BookChange(Base):
+    """
+    Feed de mudanças do catálogo: uma linha por livro inserido, alterado ou
+    removido em cada carga. `seq` só cresce (AUTOINCREMENT do SQLite: valores
+    nunca são reutilizados, nem depois de remoções), então um espelho do
+    catálogo pede só o que veio depois do último `seq` que aplicou.
+    """
+
+    __tablename__ = "book_changes"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    seq = Column(Integer, primary_key=True)
+    # Sem chave estrangeira: as remoções continuam no feed depois que o livro sai
+    book_id = Column(Integer, nullable=False)
+    change = Column(String(10), nullable=False)
+    data_version = Column(Integer, nullable=False)
+    changed_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class BookImage(Base):
+    """
+    Capa baixada pelo `scripts.fetch_covers`: a URL de origem (`Book.image_url`)
+    e o hash SHA-256 do conteúdo, que é o nome do arquivo no diretório de
+    imagens. URLs com o mesmo conteúdo compartilham o arquivo.
+    """
+
+    __tablename__ = "book_images"
+
+    source_url = Column(String(255), primary_key=True)
+    content_hash = Column(String(64), nullable=False, index=True)
+    content_type = Column(String(50), nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    fetched_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class BookRelated(Base):
+    """
+    Livros mais parecidos com cada livro (texto, categoria, preço e avaliação),
+    pré-calculados por `src.core.related` a cada carga. A chave (livro,
+    posição) deixa a lista de um livro em uma única varredura do índice.
+    """
+
+    __tablename__ = "book_related"
+
+    book_id = Column(Integer, ForeignKey("books.id"), primary_key=True)
+    rank = Column(Integer, primary_key=True)
+    related_book_id = Column(
+        Integer, ForeignKey("books.id"), nullable=False, index=True
+    )
+    score = Column(Float, nullable=False)
+
+
+class Category(Base):
+    """Categoria dos livros, com agregados mantidos pelo carregador."""
+
+    __tablename__ = "categories"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(100), unique=True, nullable=False)
+    slug = Column(String(120), unique=True, nullable=False)
+    book_count = Column(Integer, nullable=False, default=0)
+    # Soma dos preços, para atualizar a média de forma incremental
+    price_total = Column(Numeric(14, 2), nullable=False, default=0)
+    avg_price = Column(Numeric(10, 2))
+    min_price = Column(Numeric(10, 2))
+    max_price = Column(Numeric(10, 2))
+    total_stock = Column(Integer, nullable=False, default=0)
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -29,3 +135,14 @@ class User(Base):
     username = Column(String(100), unique=True, index=True, nullable=False)
     hashed_password = Column(String(255), nullable=False)
     is_active = Column(Boolean, default=True)
+
+
+class CatalogState(Base):
+    """Linha única com a versão atual dos dados do catálogo."""
+
+    __tablename__ = "catalog_state"
+
+    id = Column(Integer, primary_key=True)
+    # Incrementada pelo carregador a cada alteração nos livros
+    data_version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True))
@@ -0,0 +1,249 @@
+import heapq
+from dataclasses import dataclass
+from decimal import ROUND_CEILING, ROUND_FLOOR, Decimal
+from functools import lru_cache
+from typing import List, Optional
+
+from .snapshot import CatalogSnapshot, get_catalog_snapshot
+
+try:  # NumPy é opcional; sem ele as consultas rodam em Python puro
+    import numpy as np
+except ImportError:  # pragma: no cover - depende do ambiente
+    np = None
+
+# Chaves de ordenação aceitas ("-" no início inverte a ordem) e a coluna do
+# snapshot correspondente. Empates são desfeitos pelo menor id, em qualquer
+# direção.
+SORT_COLUMNS = {
+    "id": "id",
+    "price": "price_cents",
+    "rating": "rating",
+    "reviews": "number_of_reviews",
+    "quantity": "quantity",
+}
+
+
+@dataclass
+class BookQuery:
+    """Filtros e ordenação de uma consulta ao catálogo (os mesmos parâmetros de
+    `crud.query_books`)."""
+
+    title: Optional[str] = None
+    category: Optional[str] = None
+    min_price: Optional[Decimal] = None
+    max_price: Optional[Decimal] = None
+    min_rating: Optional[int] = None
+    max_rating: Optional[int] = None
+    available: Optional[bool] = None
+    sort: str = "id"
+    skip: int = 0
+    limit: Optional[int] = 20
+
+    def __post_init__(self):
+        # Com valores negativos, o fatiamento e o argpartition devolveriam
+        # linhas diferentes em cada caminho (NumPy, Python puro e banco)
+        if self.skip < 0:
+            raise ValueError(f"skip deve ser >= 0 (recebido {self.skip}).")
+        if self.limit is not None and self.limit < 0:
+            raise ValueError(f"limit deve ser >= 0 (recebido {self.limit}).")
+
+
+def parse_sort(sort: str):
+    """Converte "-reviews" em ("number_of_reviews", True)."""
+    descending = sort.startswith("-")
+    key = sort.lstrip("-+")
+    if key not in SORT_COLUMNS:
+        raise ValueError(
+            f"Ordenação inválida: '{sort}'. Use uma de {sorted(SORT_COLUMNS)}."
+        )
+    return SORT_COLUMNS[key], descending
+
+
+def _to_cents(price: Decimal, rounding) -> int:
+    return int((Decimal(price) * 100).to_integral_value(rounding=rounding))
+
+
+class ColumnarQueryEngine:
+    """
+    Executa filtros e ordenações sobre as colunas do `CatalogSnapshot`.
+
+    Com NumPy, as colunas são vistas sem cópia sobre o arquivo mapeado em
+    memória, os predicados viram máscaras vetorizadas e o top-k usa
+    `argpartition`; sem NumPy, o mesmo resultado é obtido com listas e `heapq`.
+    """
+
+    def __init__(self, snapshot: CatalogSnapshot):
+        self.snapshot = snapshot
+        columns = ["id", "price_cents", "rating", "number_of_reviews", "quantity"]
+        columns += ["availability", "category_code"]
+        if np is not None:
+            self.columns = {
+                name: np.frombuffer(
+                    snapshot.columns[name], dtype=snapshot.columns[name].format
+                )
+                for name in columns
+            }
+        else:
+            self.columns = {name: snapshot.columns[name] for name in columns}
+        # Máscaras de nulos (1 = nulo) das colunas que podem ser nulas: como no
+        # SQL, nulos não passam em nenhum filtro e ficam abaixo de qualquer
+        # valor na ordenação (primeiro na crescente, por último na decrescente)
+        self.nulls = {}
+        for name in columns:
+            nulls = snapshot.columns.get(f"{name}.nulls")
+            if nulls is not None:
+                self.nulls[name] = (
+                    np.frombuffer(nulls, dtype=np.int8).astype(bool)
+                    if np is not None
+                    else nulls
+                )
+
+    def _category_codes(self, category: str) -> List[int]:
+        return [
+            code
+            for code, name in enumerate(self.snapshot.categories)
+            if name == category
+        ]
+
+    def _matches_title(self, positions, title: str) -> List[int]:
+        # Texto livre não é vetorizável sobre o blob de strings; filtra por último,
+        # só entre as linhas que já passaram pelos demais predicados
+        needle = title.lower()
+        return [
+            i
+            for i in positions
+            if needle in self.snapshot.string("book_name", i).lower()
+        ]
+
+    def _bounds(self, query: BookQuery):
+        """Predicados da consulta como (coluna, mínimo, máximo) inclusivos."""
+        bounds = []
+        if query.min_price is not None or query.max_price is not None:
+            low = (
+                _to_cents(query.min_price, ROUND_CEILING)
+                if query.min_price is not None
+                else None
+            )
+            high = (
+                _to_cents(query.max_price, ROUND_FLOOR)
+                if query.max_price is not None
+                else None
+            )
+            bounds.append(("price_cents", low, high))
+        if query.min_rating is not None or query.max_rating is not None:
+            bounds.append(("rating", query.min_rating, query.max_rating))
+        if query.available is not None:
+            flag = int(query.available)
+            bounds.append(("availability", flag, flag))
+        return bounds
+
+    def select(self, query: BookQuery) -> List[int]:
+        """Retorna as posições (no snapshot) dos livros da página pedida."""
+        sort_column, descending = parse_sort(query.sort)
+        if np is not None:
+            return self._select_numpy(query, sort_column, descending)
+        return self._select_python(query, sort_column, descending)
+
+    def query(self, query: BookQuery) -> List[dict]:
+        """Como `select`, mas já monta os livros no formato do `BookSchema`."""
+        return self.snapshot.rows(self.select(query))
+
+    def _sort_values_numpy(self, sort_column, positions):
+        # Nulos valem um a menos que o menor valor presente
+        values = self.columns[sort_column][positions].astype(np.int64)
+        if sort_column in self.nulls:
+            nulls = self.nulls[sort_column][positions]
+            if nulls.any():
+                present = values[~nulls]
+                values[nulls] = present.min() - 1 if len(present) else 0
+        return values
+
+    def _sort_values_python(self, sort_column, positions) -> dict:
+        column = self.columns[sort_column]
+        values = {i: column[i] for i in positions}
+        nulls = self.nulls.get(sort_column)
+        if nulls is not None:
+            missing = [i for i in positions if nulls[i]]
+            present = [values[i] for i in positions if not nulls[i]]
+            lowest = min(present) - 1 if present else 0
+            values.update((i, lowest) for i in missing)
+        return values
+
+    def _select_numpy(self, query, sort_column, descending) -> List[int]:
+        count = self.snapshot.count
+        mask = np.ones(count, dtype=bool)
+        for name, low, high in self._bounds(query):
+            column = self.columns[name]
+            if name in self.nulls:
+                mask &= ~self.nulls[name]
+            if low is not None:
+                mask &= column >= low
+            if high is not None:
+                mask &= column <= high
+        if query.category is not None:
+            codes = self._category_codes(query.category)
+            mask &= np.isin(self.columns["category_code"], codes)
+
+        positions = np.flatnonzero(mask)
+        if query.title:
+            positions = np.array(
+                self._matches_title(positions.tolist(), query.title), dtype=np.int64
+            )
+        end = None if query.limit is None else query.skip + query.limit
+        if sort_column != "id" or descending:
+            # Chave composta valor * N + posição: ordena pelo valor e desempata
+            # pela posição (= id), permitindo um top-k exato com argpartition.
+            # Na ordem decrescente só o valor é negado: empates seguem pelo menor id
+            values = self._sort_values_numpy(sort_column, positions)
+            if descending:
+                values = -values
+            keys = values * count + positions
+            if end is not None and end < len(keys):
+                top = np.argpartition(keys, end - 1)[:end]
+                positions = positions[top[np.argsort(keys[top])]]
+            else:
+                positions = positions[np.argsort(keys)]
+        return positions[query.skip : end].tolist()
+
+    def _select_python(self, query, sort_column, descending) -> List[int]:
+        positions = range(self.snapshot.count)
+        for name, low, high in self._bounds(query):
+            column = self.columns[name]
+            if name in self.nulls:
+                nulls = self.nulls[name]
+                positions = [i for i in positions if not nulls[i]]
+            if low is not None:
+                positions = [i for i in positions if column[i] >= low]
+            if high is not None:
+                positions = [i for i in positions if column[i] <= high]
+        if query.category is not None:
+            codes = set(self._category_codes(query.category))
+            category_codes = self.columns["category_code"]
+            positions = [i for i in positions if category_codes[i] in codes]
+        if query.title:
+            positions = self._matches_title(positions, query.title)
+
+        end = None if query.limit is None else query.skip + query.limit
+        if sort_column != "id" or descending:
+            values = self._sort_values_python(sort_column, positions)
+            sign = -1 if descending else 1
+
+            def key(i):
+                return (sign * values[i], i)
+
+            if end is not None and end < len(positions):
+                positions = heapq.nsmallest(end, positions, key=key)
+            else:
+                positions = sorted(positions, key=key)
+        return list(positions[query.skip : end])
+
+
+@lru_cache(maxsize=1)
+def _engine_for(snapshot: CatalogSnapshot) -> ColumnarQueryEngine:
+    return ColumnarQueryEngine(snapshot)
+
+
+def get_query_engine() -> Optional[ColumnarQueryEngine]:
+    """Motor de consultas do snapshot atual (None fora do modo snapshot)."""
+    snapshot = get_catalog_snapshot()
+    return _engine_for(snapshot) if snapshot is not None else None
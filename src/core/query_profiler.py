@@ -0,0 +1,195 @@
+import logging
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Módulo cujas funções são usadas para atribuir cada query à sua origem
+CRUD_MODULE = "src.core.crud"
+MAX_PARAM_LENGTH = 100
+
+
+@dataclass
+class RequestQueryStats:
+    """Contadores de queries de uma única requisição."""
+
+    statements: int = 0
+    db_time_ms: float = 0.0
+    slow_statements: int = 0
+    by_function: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class EndpointSummary:
+    """Resumo acumulado das queries executadas por um endpoint."""
+
+    requests: int = 0
+    statements: int = 0
+    max_statements: int = 0
+    db_time_ms: float = 0.0
+    slow_statements: int = 0
+    flagged_requests: int = 0
+    by_function: Dict[str, int] = field(default_factory=dict)
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "statements": self.statements,
+            "avg_statements": (
+                round(self.statements / self.requests, 2) if self.requests else 0
+            ),
+            "max_statements": self.max_statements,
+            "db_time_ms": round(self.db_time_ms, 3),
+            "slow_statements": self.slow_statements,
+            "flagged_requests": self.flagged_requests,
+            "by_function": dict(
+                sorted(self.by_function.items(), key=lambda i: i[1], reverse=True)
+            ),
+        }
+
+
+_current_request: ContextVar[Optional[RequestQueryStats]] = ContextVar(
+    "query_profiler_request", default=None
+)
+
+
+def _find_crud_caller() -> str:
+    """Retorna o nome da função de `crud` que originou a query, se houver."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        if frame.f_globals.get("__name__") == CRUD_MODULE:
+            return frame.f_code.co_name
+        frame = frame.f_back
+    return "<outros>"
+
+
+def _format_params(parameters) -> str:
+    if isinstance(parameters, dict):
+        items = [f"{k}={v!r}"[:MAX_PARAM_LENGTH] for k, v in parameters.items()]
+    elif isinstance(parameters, (list, tuple)):
+        items = [repr(v)[:MAX_PARAM_LENGTH] for v in parameters]
+    else:
+        items = [repr(parameters)[:MAX_PARAM_LENGTH]]
+    return "(" + ", ".join(items) + ")"
+
+
+class QueryProfiler:
+    """
+    Registra o número e a duração das queries executadas em um engine.
+
+    Queries acima de `slow_query_ms` são logadas com os parâmetros e o plano de
+    execução; requisições com mais de `max_statements` queries são sinalizadas
+    como possíveis N+1. Um resumo por endpoint fica disponível em `report()`.
+    """
+
+    def __init__(
+        self,
+        slow_query_ms: float = 100.0,
+        max_statements: int = 10,
+        log_params: bool = False,
+    ):
+        self.slow_query_ms = slow_query_ms
+        self.max_statements = max_statements
+        self.log_params = log_params
+        self._summaries: Dict[str, EndpointSummary] = {}
+        self._lock = threading.Lock()
+
+    def install(self, engine: Engine):
+        """Registra os listeners de execução no engine informado."""
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, many):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, many):
+        elapsed_ms = (time.perf_counter() - conn.info["query_start_time"].pop()) * 1000
+        stats = _current_request.get()
+        if stats is not None:
+            caller = _find_crud_caller()
+            stats.statements += 1
+            stats.db_time_ms += elapsed_ms
+            stats.by_function[caller] = stats.by_function.get(caller, 0) + 1
+
+        if elapsed_ms < self.slow_query_ms:
+            return
+        if stats is not None:
+            stats.slow_statements += 1
+
+        message = f"Query lenta ({elapsed_ms:.1f} ms): {statement}"
+        if self.log_params:
+            message += f" | parâmetros: {_format_params(parameters)}"
+        if not many:
+            plan = self._explain(conn, statement, parameters)
+            if plan:
+                message += f" | plano: {plan}"
+        logger.warning(message)
+
+    def _explain(self, conn, statement: str, parameters) -> Optional[str]:
+        """Executa EXPLAIN para a query, em um cursor separado."""
+        if not statement.lstrip().upper().startswith("SELECT"):
+            return None
+        if conn.dialect.name == "sqlite":
+            explain_sql = f"EXPLAIN QUERY PLAN {statement}"
+        else:
+            explain_sql = f"EXPLAIN {statement}"
+        try:
+            cursor = conn.connection.cursor()
+            try:
+                cursor.execute(explain_sql, parameters)
+                rows = cursor.fetchall()
+            finally:
+                cursor.close()
+        except Exception as e:
+            logger.debug(f"Não foi possível obter o plano da query: {e}")
+            return None
+        # No SQLite, o detalhe do plano fica na última coluna de cada linha
+        return "; ".join(str(row[-1]) for row in rows)
+
+    def start_request(self) -> RequestQueryStats:
+        """Inicia a contagem de queries para a requisição atual."""
+        stats = RequestQueryStats()
+        _current_request.set(stats)
+        return stats
+
+    def finish_request(self, endpoint: str, stats: RequestQueryStats):
+        """Encerra a contagem da requisição e acumula no resumo do endpoint."""
+        _current_request.set(None)
+        if stats.statements > self.max_statements:
+            logger.warning(
+                f"Possível N+1 em {endpoint}: {stats.statements} queries em uma "
+                f"requisição (limite {self.max_statements}). "
+                f"Por função: {stats.by_function}"
+            )
+
+        with self._lock:
+            summary = self._summaries.setdefault(endpoint, EndpointSummary())
+            summary.requests += 1
+            summary.statements += stats.statements
+            summary.max_statements = max(summary.max_statements, stats.statements)
+            summary.db_time_ms += stats.db_time_ms
+            summary.slow_statements += stats.slow_statements
+            if stats.statements > self.max_statements:
+                summary.flagged_requests += 1
+            for name, count in stats.by_function.items():
+                summary.by_function[name] = summary.by_function.get(name, 0) + count
+
+    def report(self) -> dict:
+        """Retorna o resumo por endpoint, ordenado pelo total de queries."""
+        with self._lock:
+            ordered = sorted(
+                self._summaries.items(), key=lambda i: i[1].statements, reverse=True
+            )
+            return {endpoint: summary.as_dict() for endpoint, summary in ordered}
+
+    def reset(self):
+        """Descarta os resumos acumulados."""
+        with self._lock:
+            self._summaries.clear()
@@ -0,0 +1,348 @@
+import heapq
+import logging
+import math
+import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from .models import Book, BookRelated
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOP_K = 10
+TOKEN_RE = re.compile(r"[a-z][a-z']{2,}")
+STOPWORDS = frozenset(
+    (
+        "the and for are but not you all any can her was one our out his has had "
+        "him how its may new now own who did get she too use that with have this "
+        "will your from they been were what when which their there them than then "
+        "these those some into more other about would could should after before "
+        "also just only over such very where while being each most both through"
+    ).split()
+)
+# Uma ocorrência no título vale tanto quanto três na descrição
+NAME_WEIGHT = 3
+# Termos de maior peso guardados por livro (o vetor TF-IDF é truncado neles)
+TERMS_PER_BOOK = 24
+# Livros por termo no índice invertido: só os de maior peso no termo, para que
+# termos comuns não tornem a busca de candidatos quadrática
+MAX_POSTINGS = 64
+# Candidatos do texto avaliados por livro (os de maior similaridade de texto)
+MAX_CANDIDATES = 256
+# Vizinhos por preço na mesma categoria, somados aos candidatos do texto
+CATEGORY_NEIGHBOURS = 8
+# Na atualização incremental, os livros alterados entram na lista destes
+# candidatos mais próximos (se superarem o último colocado da lista)
+REVERSE_CANDIDATES = 50
+# Peso de cada componente na nota final (soma 1)
+TEXT_WEIGHT = 0.7
+CATEGORY_WEIGHT = 0.15
+PRICE_WEIGHT = 0.1
+RATING_WEIGHT = 0.05
+NUMERIC_WEIGHT = CATEGORY_WEIGHT + PRICE_WEIGHT + RATING_WEIGHT
+# Ids por consulta `IN (...)`
+ID_CHUNK = 500
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    if not text:
+        return []
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def book_terms(name: Optional[str], description: Optional[str]) -> Counter:
+    """Frequência dos termos do livro (título com peso `NAME_WEIGHT`)."""
+    terms = Counter(tokenize(description))
+    for token in tokenize(name):
+        terms[token] += NAME_WEIGHT
+    return terms
+
+
+@dataclass
+class BookFeatures:
+    """O que entra na similaridade: vetor TF-IDF normalizado e campos numéricos."""
+
+    category: Optional[str]
+    price: float
+    rating: int
+    terms: Dict[str, float]
+
+
+def tfidf_vector(terms: Counter, idf: Dict[str, float]) -> Dict[str, float]:
+    """Os `TERMS_PER_BOOK` termos de maior peso ((1 + log tf) * idf), com norma 1."""
+    weights = [
+        ((1 + math.log(count)) * idf[term], term)
+        for term, count in terms.items()
+        if idf.get(term)
+    ]
+    top = heapq.nlargest(TERMS_PER_BOOK, weights)
+    norm = math.sqrt(sum(weight * weight for weight, _ in top))
+    return {term: weight / norm for weight, term in top} if norm else {}
+
+
+class RelatedIndex:
+    """
+    Índice em memória para achar os livros parecidos: índice invertido dos
+    vetores TF-IDF (candidatos pelo texto) e, por categoria, os livros
+    ordenados por preço (candidatos quando o texto tem pouco em comum).
+    """
+
+    def __init__(self, books: Dict[int, BookFeatures]):
+        self.books = books
+        postings: Dict[str, List[Tuple[float, int]]] = defaultdict(list)
+        by_category: Dict[Optional[str], List[Tuple[float, int]]] = defaultdict(list)
+        for book_id, book in books.items():
+            for term, weight in book.terms.items():
+                postings[term].append((weight, book_id))
+            by_category[book.category].append((book.price, book_id))
+        self.postings = {
+            term: heapq.nlargest(MAX_POSTINGS, entries)
+            for term, entries in postings.items()
+        }
+        self.by_category = {}
+        self.positions = {}
+        for category, entries in by_category.items():
+            entries.sort()
+            self.by_category[category] = [book_id for _, book_id in entries]
+            self.positions.update(
+                (book_id, i) for i, (_, book_id) in enumerate(entries)
+            )
+
+    @classmethod
+    def from_db(cls, db: Session) -> "RelatedIndex":
+        """
+        Monta o índice com todos os livros do banco em duas passagens (a
+        primeira só conta em quantos livros cada termo aparece), para não
+        manter os termos de todos os livros em memória.
+        """
+        columns = (
+            Book.id,
+            Book.book_name,
+            Book.description,
+            Book.category,
+            Book.price,
+            Book.rating,
+        )
+        document_frequency = Counter()
+        total = 0
+        for row in db.query(Book.book_name, Book.description).yield_per(1000):
+            document_frequency.update(book_terms(*row).keys())
+            total += 1
+        idf = {
+            term: math.log(total / count) for term, count in document_frequency.items()
+        }
+        books = {}
+        for book_id, name, description, category, price, rating in db.query(
+            *columns
+        ).yield_per(1000):
+            books[book_id] = BookFeatures(
+                category,
+                float(price),
+                rating or 0,
+                tfidf_vector(book_terms(name, description), idf),
+            )
+        return cls(books)
+
+    def _category_neighbours(self, book_id: int) -> List[int]:
+        """Os livros de preço mais próximo na mesma categoria."""
+        ids = self.by_category[self.books[book_id].category]
+        i = self.positions[book_id]
+        return ids[max(0, i - CATEGORY_NEIGHBOURS) : i + CATEGORY_NEIGHBOURS + 1]
+
+    def _combine(self, a: BookFeatures, b: BookFeatures, text: float) -> float:
+        score = TEXT_WEIGHT * text
+        if a.category == b.category:
+            score += CATEGORY_WEIGHT
+        highest = max(a.price, b.price)
+        if highest > 0:
+            score += PRICE_WEIGHT * (1 - abs(a.price - b.price) / highest)
+        else:
+            score += PRICE_WEIGHT
+        score += RATING_WEIGHT * (1 - abs(a.rating - b.rating) / 5)
+        return score
+
+    def score(self, book_id: int, other_id: int) -> float:
+        """Similaridade de um par de livros (cosseno dos vetores truncados)."""
+        a, b = self.books[book_id], self.books[other_id]
+        text = sum(weight * b.terms.get(term, 0.0) for term, weight in a.terms.items())
+        return self._combine(a, b, text)
+
+    def scores(self, book_id: int, top_k: Optional[int] = None) -> Dict[int, float]:
+        """
+        Similaridade do livro com cada candidato. A parte do texto é somada
+        termo a termo pelo índice invertido, sem comparar com o catálogo todo.
+        Com `top_k`, ficam de fora os candidatos que não alcançariam os
+        `top_k` primeiros nem com a nota máxima nos campos numéricos, e dos
+        restantes só os `MAX_CANDIDATES` de texto mais parecido são avaliados.
+        """
+        book = self.books[book_id]
+        text: Dict[int, float] = defaultdict(float)
+        for term, weight in book.terms.items():
+            for other_weight, other_id in self.postings.get(term, ()):
+                text[other_id] += weight * other_weight
+        text.pop(book_id, None)
+        candidates = text.items()
+        if top_k is not None and len(text) > top_k:
+            best = heapq.nlargest(top_k, candidates, key=itemgetter(1))
+            floor = min(self._combine(book, self.books[i], v) for i, v in best)
+            minimum = (floor - NUMERIC_WEIGHT) / TEXT_WEIGHT
+            candidates = [(i, v) for i, v in candidates if v >= minimum]
+            if len(candidates) > MAX_CANDIDATES:
+                candidates = heapq.nlargest(
+                    MAX_CANDIDATES, candidates, key=itemgetter(1)
+                )
+        scores = {
+            other_id: self._combine(book, self.books[other_id], value)
+            for other_id, value in candidates
+        }
+        for other_id in self._category_neighbours(book_id):
+            if other_id not in scores and other_id != book_id:
+                scores[other_id] = self.score(book_id, other_id)
+        return scores
+
+    def neighbours(self, book_id: int, top_k: int) -> List[Tuple[float, int]]:
+        """Os `top_k` livros mais parecidos, como (nota, id), do maior para o menor."""
+        return _top(self.scores(book_id, top_k), top_k)
+
+
+def _top(scores: Dict[int, float], top_k: int) -> List[Tuple[float, int]]:
+    return heapq.nlargest(
+        top_k, ((score, book_id) for book_id, score in scores.items())
+    )
+
+
+def _chunks(ids: Iterable[int]) -> Iterator[List[int]]:
+    ids = list(ids)
+    for start in range(0, len(ids), ID_CHUNK):
+        yield ids[start : start + ID_CHUNK]
+
+
+def _read_lists(db: Session, book_ids: Iterable[int]) -> Dict[int, Dict[int, float]]:
+    lists: Dict[int, Dict[int, float]] = defaultdict(dict)
+    for chunk in _chunks(book_ids):
+        rows = (
+            db.query(
+                BookRelated.book_id, BookRelated.related_book_id, BookRelated.score
+            )
+            .filter(BookRelated.book_id.in_(chunk))
+            .order_by(BookRelated.book_id, BookRelated.rank)
+        )
+        for book_id, related_id, score in rows:
+            lists[book_id][related_id] = score
+    return lists
+
+
+def _delete_lists(db: Session, book_ids: Iterable[int]):
+    for chunk in _chunks(book_ids):
+        db.query(BookRelated).filter(BookRelated.book_id.in_(chunk)).delete(
+            synchronize_session=False
+        )
+
+
+def _write_lists(db: Session, lists: Dict[int, List[Tuple[float, int]]]):
+    _delete_lists(db, lists)
+    db.bulk_insert_mappings(
+        BookRelated,
+        [
+            {
+                "book_id": book_id,
+                "rank": rank,
+                "related_book_id": related_id,
+                "score": round(score, 6),
+            }
+            for book_id, ranked in lists.items()
+            for rank, (score, related_id) in enumerate(ranked, 1)
+        ],
+    )
+
+
+def _affected_lists(
+    db: Session, index: RelatedIndex, changed: Dict[int, Dict[int, float]]
+) -> Dict[int, Dict[int, float]]:
+    """
+    Livros fora de `changed` cuja lista pode mudar, com a nova nota de cada
+    livro alterado: os candidatos mais próximos de cada livro alterado e os
+    livros que já têm algum livro alterado na lista (nota recalculada).
+    """
+    affected: Dict[int, Dict[int, float]] = defaultdict(dict)
+    for book_id, scores in changed.items():
+        for score, other_id in _top(scores, REVERSE_CANDIDATES):
+            if other_id not in changed:
+                affected[other_id][book_id] = score
+    for chunk in _chunks(changed):
+        rows = db.query(BookRelated.book_id, BookRelated.related_book_id).filter(
+            BookRelated.related_book_id.in_(chunk)
+        )
+        for book_id, related_id in rows:
+            if book_id in index.books and book_id not in changed:
+                affected[book_id].setdefault(
+                    related_id, index.score(book_id, related_id)
+                )
+    return affected
+
+
+def _lists_citing(db: Session, removed: Iterable[int]) -> set:
+    """Livros cuja lista gravada cita algum dos livros removidos."""
+    citing = set()
+    for chunk in _chunks(removed):
+        rows = db.query(BookRelated.book_id).filter(
+            BookRelated.related_book_id.in_(chunk)
+        )
+        citing.update(book_id for (book_id,) in rows)
+    return citing
+
+
+def update_related(
+    db: Session,
+    book_ids: Optional[Iterable[int]] = None,
+    top_k: int = DEFAULT_TOP_K,
+    removed_ids: Iterable[int] = (),
+) -> int:
+    """
+    Recalcula os livros parecidos (`book_related`). Com `book_ids` (livros
+    novos ou alterados na carga), só as listas desses livros são refeitas do
+    zero; nas dos demais, apenas os livros alterados entram, saem ou mudam de
+    posição. `removed_ids` são livros já apagados de `books`: as listas deles
+    são apagadas e as que os citam, refeitas. Sem `book_ids`, ou com a tabela
+    vazia, refaz todas. Retorna quantas listas foram gravadas. Não faz commit.
+    """
+    index = RelatedIndex.from_db(db)
+    if book_ids is None or db.query(BookRelated.book_id).first() is None:
+        lists = {book_id: index.neighbours(book_id, top_k) for book_id in index.books}
+        db.query(BookRelated).delete()
+        _write_lists(db, lists)
+        return len(lists)
+
+    removed = set(removed_ids) - index.books.keys()
+    changed = {
+        book_id: index.scores(book_id, max(top_k, REVERSE_CANDIDATES))
+        for book_id in set(book_ids)
+        if book_id in index.books
+    }
+    lists = {book_id: _top(scores, top_k) for book_id, scores in changed.items()}
+    # Só tirar o livro removido deixaria a lista com um vizinho a menos: as
+    # listas que o citam são refeitas do zero
+    for book_id in _lists_citing(db, removed):
+        if book_id in index.books and book_id not in changed:
+            lists[book_id] = index.neighbours(book_id, top_k)
+    affected = _affected_lists(db, index, changed)
+    current = _read_lists(db, affected.keys() - lists.keys())
+    for book_id, candidates in affected.items():
+        if book_id in lists:
+            continue
+        if book_id not in current:
+            # Livro sem lista gravada: calcula a lista inteira
+            lists[book_id] = index.neighbours(book_id, top_k)
+            continue
+        merged = {**current[book_id], **candidates}
+        ranked = _top(merged, top_k)
+        stored = [(related_id, round(score, 6)) for score, related_id in ranked]
+        if stored != list(current[book_id].items()):
+            lists[book_id] = ranked
+    _delete_lists(db, removed)
+    _write_lists(db, lists)
+    return len(lists)
@@ -0,0 +1,143 @@
+import hashlib
+import logging
+import os
+import sqlite3
+from decimal import Decimal
+from typing import Iterable, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import URL, Engine
+
+logger = logging.getLogger(__name__)
+
+# Tabelas que a API (ou outro processo) pode alterar durante a carga; são
+# copiadas de novo do banco em uso imediatamente antes da troca, para não
+# perder, por exemplo, usuários criados ou capas registradas pelo fetch_covers
+# enquanto a cópia de trabalho era carregada
+LIVE_TABLES = ("users", "book_images")
+
+
+class ReloadValidationError(ValueError):
+    """A cópia de trabalho não passou na validação; o banco em uso não muda."""
+
+
+def sqlite_path(url: URL) -> str:
+    """Caminho absoluto do arquivo de um banco SQLite (ValueError se não for)."""
+    if (
+        url.get_backend_name() != "sqlite"
+        or url.database in (None, "", ":memory:")
+        or url.database.startswith("file:")
+    ):
+        raise ValueError(
+            f"A recarga atômica exige um banco SQLite em arquivo, não '{url}'."
+        )
+    return os.path.abspath(url.database)
+
+
+def create_shadow_copy(live_path: str, shadow_path: str):
+    """
+    Copia o banco em uso para `shadow_path` com a API de backup do SQLite
+    (consistente mesmo com leitores e escritores ativos).
+    """
+    if not os.path.exists(live_path):
+        raise FileNotFoundError(f"Banco '{live_path}' não encontrado.")
+    if os.path.exists(shadow_path):
+        os.remove(shadow_path)
+    source = sqlite3.connect(live_path)
+    target = sqlite3.connect(shadow_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+def catalog_checksum(rows: Iterable[Tuple]) -> Tuple[int, str]:
+    """
+    Número de livros e SHA-256 de (upc, preço, estoque, avaliação), em ordem de
+    UPC. O mesmo valor é calculado a partir do CSV e do banco carregado.
+    """
+    digest = hashlib.sha256()
+    count = 0
+    for upc, price, quantity, rating in sorted(rows, key=lambda row: row[0]):
+        digest.update(f"{upc}|{Decimal(price):.2f}|{quantity}|{rating}\n".encode())
+        count += 1
+    return count, digest.hexdigest()
+
+
+def validate_shadow(shadow_engine: Engine, expected: Tuple[int, str]):
+    """
+    Confere a integridade do arquivo, as chaves estrangeiras e a contagem e o
+    checksum dos livros contra o esperado. Levanta ReloadValidationError.
+    """
+    with shadow_engine.connect() as connection:
+        integrity = connection.execute(text("PRAGMA integrity_check")).scalar()
+        if integrity != "ok":
+            raise ReloadValidationError(f"integrity_check falhou: {integrity}")
+        broken = connection.execute(text("PRAGMA foreign_key_check")).fetchall()
+        if broken:
+            raise ReloadValidationError(
+                f"{len(broken)} chaves estrangeiras inválidas (ex.: {broken[0]})"
+            )
+        rows = connection.execute(
+            text("SELECT upc, price, quantity, rating FROM books")
+        ).fetchall()
+    actual = catalog_checksum(rows)
+    if actual[0] != expected[0]:
+        raise ReloadValidationError(
+            f"Contagem divergente: {actual[0]} livros carregados, "
+            f"{expected[0]} esperados."
+        )
+    if actual[1] != expected[1]:
+        raise ReloadValidationError(
+            f"Checksum divergente: {actual[1]} carregado, {expected[1]} esperado."
+        )
+    logger.info(f"Cópia de trabalho validada: {actual[0]} livros, sha256 {actual[1]}.")
+
+
+def swap_database(shadow_path: str, live_path: str):
+    """
+    Coloca a cópia de trabalho no lugar do banco em uso com `os.replace`.
+
+    Um lock de escrita no banco em uso (`BEGIN IMMEDIATE` em uma conexão à
+    parte) é mantido desde antes da cópia das `LIVE_TABLES` até depois do
+    `os.replace`, então nenhuma escrita feita nesse meio tempo se perde: quem
+    tenta escrever espera o lock. Só uma escrita que já estava em andamento em
+    uma conexão retirada do pool antes da troca ainda pode terminar no arquivo
+    antigo. Conexões já abertas continuam lendo o arquivo antigo até voltarem
+    ao pool; na próxima retirada são recicladas (veja
+    `database.recycle_on_file_swap`), então nenhum leitor vê dados parciais.
+    """
+    lock = sqlite3.connect(live_path, isolation_level=None)
+    try:
+        # A transação também resolve um eventual journal pendente do banco em
+        # uso, que não pode sobrar para ser aplicado sobre o arquivo novo
+        lock.execute("BEGIN IMMEDIATE")
+        connection = sqlite3.connect(shadow_path, isolation_level=None)
+        try:
+            connection.execute("ATTACH DATABASE ? AS live", (live_path,))
+            connection.execute("BEGIN")
+            for table in LIVE_TABLES:
+                connection.execute(f"DELETE FROM main.{table}")
+                connection.execute(
+                    f"INSERT INTO main.{table} SELECT * FROM live.{table}"
+                )
+            connection.execute("COMMIT")
+            connection.execute("DETACH DATABASE live")
+        finally:
+            connection.close()
+
+        with open(shadow_path, "rb") as shadow_file:
+            os.fsync(shadow_file.fileno())
+        os.replace(shadow_path, live_path)
+        directory = os.open(os.path.dirname(live_path), os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+    finally:
+        # O lock (no arquivo antigo) só é solto depois da troca
+        if lock.in_transaction:
+            lock.execute("ROLLBACK")
+        lock.close()
+    logger.info(f"Banco '{live_path}' substituído pela cópia recarregada.")
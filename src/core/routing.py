@@ -0,0 +1,139 @@
+import itertools
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import Select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Tabelas sempre lidas do primário: mudanças nelas não alteram a versão dos
+# dados do catálogo, então o atraso das réplicas não seria detectado (ex.: um
+# usuário recém-criado tentando fazer login)
+PRIMARY_ONLY_TABLES = frozenset({"users"})
+
+DATA_VERSION_SQL = text("SELECT data_version FROM catalog_state WHERE id = 1")
+
+
+def _data_version(engine: Engine) -> int:
+    with engine.connect() as connection:
+        return connection.execute(DATA_VERSION_SQL).scalar() or 0
+
+
+class ReplicaSet:
+    """
+    Réplicas de leitura com verificação de saúde e de atraso.
+
+    A cada `check_interval` segundos (na primeira escolha após o intervalo),
+    compara a versão dos dados do catálogo de cada réplica com a do primário.
+    Réplicas inacessíveis ou mais de `max_lag_versions` versões atrás ficam
+    fora do rodízio até a próxima verificação; sem réplicas saudáveis, as
+    leituras voltam para o primário.
+    """
+
+    def __init__(
+        self,
+        primary: Engine,
+        replicas: List[Engine],
+        check_interval: float = 5.0,
+        max_lag_versions: int = 0,
+    ):
+        self.primary = primary
+        self.replicas = replicas
+        self.check_interval = check_interval
+        self.max_lag_versions = max_lag_versions
+        self.status: Dict[str, str] = {
+            self._name(replica): "unknown" for replica in replicas
+        }
+        self._healthy: List[Engine] = list(replicas)
+        self._cycle = itertools.cycle(self._healthy)
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _name(engine: Engine) -> str:
+        return engine.url.render_as_string(hide_password=True)
+
+    def check(self):
+        """
+        Verifica todas as réplicas e atualiza o rodízio. As consultas são
+        feitas fora do lock (uma réplica lenta não trava o `pick` das outras
+        requisições); só a troca do resultado acontece sob o lock.
+        """
+        try:
+            primary_version = _data_version(self.primary)
+        except Exception as e:
+            # Sem o primário não há como medir o atraso; mantém o estado atual
+            logger.warning(f"Falha ao ler a versão dos dados no primário: {e}")
+            return
+        healthy = []
+        status = {}
+        for replica in self.replicas:
+            name = self._name(replica)
+            try:
+                lag = primary_version - _data_version(replica)
+            except Exception as e:
+                state = "error"
+                logger.warning(f"Réplica {name} indisponível: {e}")
+            else:
+                state = "ok" if lag <= self.max_lag_versions else f"lagging ({lag})"
+            if state != self.status.get(name):
+                logger.info(f"Réplica {name}: {state}")
+            status[name] = state
+            if state == "ok":
+                healthy.append(replica)
+        with self._lock:
+            self.status = status
+            self._healthy = healthy
+            self._cycle = itertools.cycle(healthy)
+
+    def pick(self) -> Optional[Engine]:
+        """Próxima réplica saudável (rodízio), ou None para usar o primário."""
+        if not self.replicas:
+            return None
+        with self._lock:
+            now = time.monotonic()
+            # Só uma requisição por intervalo faz a verificação
+            due = now - self._checked_at >= self.check_interval
+            if due:
+                self._checked_at = now
+        if due:
+            self.check()
+        with self._lock:
+            return next(self._cycle) if self._healthy else None
+
+
+class RoutingSession(Session):
+    """
+    Sessão que escolhe o engine a cada operação: só leituras (`select()` e
+    consultas do ORM) vão para uma réplica saudável; todo o resto (flush,
+    INSERT/UPDATE/DELETE e SQL textual, que pode ser uma escrita) vai para o
+    primário.
+
+    Cada sessão usa uma única réplica (escolhida na primeira leitura), e depois
+    da primeira escrita fica presa ao primário até o fim, para que as leituras
+    seguintes vejam o que acabou de ser gravado.
+    """
+
+    def __init__(self, *args, replica_set: Optional[ReplicaSet] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replica_set = replica_set
+        self._replica: Optional[Engine] = None
+        self._pinned_to_primary = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        primary = super().get_bind(mapper=mapper, clause=clause, **kwargs)
+        if self.replica_set is None or self._pinned_to_primary:
+            return primary
+        if self._flushing or (clause is not None and not isinstance(clause, Select)):
+            self._pinned_to_primary = True
+            return primary
+        table = getattr(mapper, "persist_selectable", None)
+        if table is not None and table.name in PRIMARY_ONLY_TABLES:
+            return primary
+        if self._replica is None:
+            self._replica = self.replica_set.pick()
+        return self._replica or primary
@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter, model_validator
+from datetime import datetime
 from decimal import Decimal
 from typing import Optional, List, Dict
 
@@ -23,10 +24,54 @@ class BookSchema(BaseModel):
         from_attributes = True
 
 
+class BookBatchRequestSchema(BaseModel):
+    """Schema para a busca de vários livros por id e/ou UPC."""
+
+    ids: List[int] = []
+    upcs: List[str] = []
+
+    @model_validator(mode="after")
+    def check_not_empty(self):
+        if not self.ids and not self.upcs:
+            raise ValueError("Informe ao menos um id ou UPC.")
+        return self
+
+
+class BookBatchResponseSchema(BaseModel):
+    """Schema para a resposta da busca em lote (na ordem pedida)."""
+
+    books: List[BookSchema]
+    missing_ids: List[int]
+    missing_upcs: List[str]
+
+
+class BookChangeSchema(BaseModel):
+    """Schema para uma mudança do feed do catálogo."""
+
+    seq: int
+    book_id: int
+    change: str
+    data_version: int
+    changed_at: datetime
+    # Estado atual do livro (nulo se ele foi removido)
+    book: Optional[BookSchema] = None
+
+
+class BookChangesResponseSchema(BaseModel):
+    """Schema para uma página do feed de mudanças."""
+
+    changes: List[BookChangeSchema]
+    # `since` da próxima página
+    last_seq: int
+    has_more: bool
+
+
 # Schema para o endpoint de health check
 class HealthCheckSchema(BaseModel):
     status: str = "ok"
     database_connection: str = "ok"
+    # Estado de cada réplica de leitura configurada (vazio sem réplicas)
+    replicas: Dict[str, str] = {}
 
 
 # Schema para estatísticas de uma categoria
@@ -73,6 +118,46 @@ class StatsOverviewSchema(BaseModel):
         populate_by_name = True
 
 
+class BookHistoryEntrySchema(BaseModel):
+    """Schema para um registro do histórico de preço/estoque de um livro."""
+
+    captured_at: datetime
+    price: Decimal
+    quantity: int
+    rating: Optional[int] = None
+    previous_price: Optional[Decimal] = None
+    previous_quantity: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+
+class PriceMovementSchema(BaseModel):
+    """Schema para a variação de preço de um livro em um período."""
+
+    book_id: int
+    book_name: str
+    old_price: Decimal
+    new_price: Decimal
+    change: Decimal
+    change_pct: Optional[float] = None
+
+
+class PriceMovementsSchema(BaseModel):
+    """Schema para o resumo das variações de preço em um período."""
+
+    since: datetime
+    changed_books: int
+    increases: int
+    decreases: int
+    movements: List[PriceMovementSchema]
+
+
+# Adaptadores para validar/serializar listas fora do ciclo do FastAPI
+BookListAdapter = TypeAdapter(List[BookSchema])
+CategoryStatsListAdapter = TypeAdapter(List[CategoryStatsSchema])
+
+
 class UserSchema(BaseModel):
     """Schema para exibir dados de um usuário (sem a senha)."""
 
@@ -4,7 +4,7 @@ from passlib.context import CryptContext
 from jose import JWTError, jwt
 
 # Importa nossas configurações centralizadas
-from .config import settings
+from .config import get_settings
 
 # --- Configuração de Hashing de Senhas ---
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -24,6 +24,7 @@ def get_password_hash(password: str) -> str:
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Cria um novo token de acesso JWT."""
+    settings = get_settings()
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
@@ -45,6 +46,7 @@ def decode_access_token(token: str) -> Optional[str]:
     Decodifica um token de acesso.
     Retorna o username se o token for válido, ou None caso contrário.
     """
+    settings = get_settings()
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
@@ -0,0 +1,49 @@
+import json
+from typing import Any, Iterable, List
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional; sem ele usamos o json da stdlib
+    orjson = None
+
+# Ordem das colunas retornadas pelas funções `*_rows` do crud
+BOOK_FIELDS = (
+    "id",
+    "upc",
+    "book_name",
+    "currency",
+    "price",
+    "quantity",
+    "availability",
+    "rating",
+    "number_of_reviews",
+    "category",
+    "description",
+    "image_url",
+    "source_page",
+)
+PRICE_INDEX = BOOK_FIELDS.index("price")
+
+
+def dumps(content: Any) -> bytes:
+    """Serializa para JSON usando orjson, se disponível."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode(
+        "utf-8"
+    )
+
+
+def book_rows_to_dicts(rows: Iterable[tuple]) -> List[dict]:
+    """
+    Converte tuplas de colunas de livros em dicionários prontos para o JSON.
+
+    O preço chega como float e é formatado com duas casas, do mesmo jeito que o
+    `BookSchema` serializa o `Decimal` (como string).
+    """
+    result = []
+    for row in rows:
+        book = dict(zip(BOOK_FIELDS, row))
+        book["price"] = f"{row[PRICE_INDEX]:.2f}"
+        result.append(book)
+    return result
@@ -0,0 +1,322 @@
+import bisect
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from . import crud, models
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Formato do arquivo (little-endian):
+#   MAGIC (8 bytes) | tamanho do cabeçalho (uint32) | cabeçalho JSON | seções
+# Cada seção começa em um offset múltiplo de 8 e é descrita no cabeçalho por
+# (offset, length, typecode). Colunas numéricas são arrays do módulo `array`;
+# colunas de texto são um array de offsets (count + 1) mais um blob UTF-8;
+# category e currency são codificadas por dicionário (NULL_CODE = nulo).
+MAGIC = b"BKSNAP02"
+ALIGNMENT = 8
+# Código reservado para valores nulos nas colunas codificadas por dicionário
+NULL_CODE = 0xFFFF
+
+STRING_COLUMNS = ("upc", "book_name", "description", "image_url")
+# Colunas de texto que podem ser nulas ganham uma máscara (1 = nulo)
+NULLABLE_STRING_COLUMNS = ("description", "image_url")
+# Colunas numéricas que podem ser nulas: gravadas como 0, com a mesma máscara
+NULLABLE_NUMERIC_COLUMNS = (
+    "availability",
+    "rating",
+    "number_of_reviews",
+    "source_page",
+)
+
+
+def _encode_strings(values: List[Optional[str]]):
+    offsets = array("q", [0])
+    chunks = []
+    position = 0
+    for value in values:
+        data = (value or "").encode("utf-8")
+        chunks.append(data)
+        position += len(data)
+        offsets.append(position)
+    return offsets, b"".join(chunks)
+
+
+def _dictionary_encode(values: List[Optional[str]]):
+    dictionary = sorted({v for v in values if v is not None})
+    codes = {name: i for i, name in enumerate(dictionary)}
+    return dictionary, array("H", (codes.get(v, NULL_CODE) for v in values))
+
+
+def write_snapshot(db: Session, path: str) -> int:
+    """
+    Grava um snapshot do catálogo em `path`, de forma atômica: o arquivo novo é
+    escrito ao lado e substitui o anterior com `os.replace`, então leitores
+    nunca veem um arquivo parcial. Retorna o número de livros gravados.
+    """
+    rows = (
+        db.query(
+            models.Book.id,
+            models.Book.upc,
+            models.Book.book_name,
+            models.Book.currency,
+            models.Book.price,
+            models.Book.quantity,
+            models.Book.availability,
+            models.Book.rating,
+            models.Book.number_of_reviews,
+            models.Book.category,
+            models.Book.description,
+            models.Book.image_url,
+            models.Book.source_page,
+        )
+        .order_by(models.Book.id)
+        .all()
+    )
+    count = len(rows)
+    categories, category_codes = _dictionary_encode([r.category for r in rows])
+    currencies, currency_codes = _dictionary_encode([r.currency for r in rows])
+
+    sections: Dict[str, tuple] = {
+        "id": ("i", array("i", (r.id for r in rows))),
+        "price_cents": ("q", array("q", (int(round(r.price * 100)) for r in rows))),
+        "quantity": ("i", array("i", (r.quantity for r in rows))),
+        "availability": ("b", array("b", (bool(r.availability) for r in rows))),
+        "rating": ("b", array("b", (r.rating or 0 for r in rows))),
+        "number_of_reviews": (
+            "i",
+            array("i", (r.number_of_reviews or 0 for r in rows)),
+        ),
+        "source_page": ("i", array("i", (r.source_page or 0 for r in rows))),
+        "category_code": ("H", category_codes),
+        "currency_code": ("H", currency_codes),
+    }
+    for name in NULLABLE_NUMERIC_COLUMNS:
+        sections[f"{name}.nulls"] = (
+            "b",
+            array("b", (getattr(r, name) is None for r in rows)),
+        )
+    for name in STRING_COLUMNS:
+        values = [getattr(r, name) for r in rows]
+        offsets, blob = _encode_strings(values)
+        sections[f"{name}.offsets"] = ("q", offsets)
+        sections[f"{name}.data"] = ("B", blob)
+        if name in NULLABLE_STRING_COLUMNS:
+            sections[f"{name}.nulls"] = ("b", array("b", (v is None for v in values)))
+
+    payloads = {
+        name: data if isinstance(data, bytes) else data.tobytes()
+        for name, (_, data) in sections.items()
+    }
+    header = {
+        "data_version": crud.get_data_version(db),
+        "created_at": time.time(),
+        "count": count,
+        "dictionaries": {"category": categories, "currency": currencies},
+        "sections": {},
+    }
+    # O tamanho do cabeçalho depende dos offsets, então reservamos espaço fixo
+    # calculando os offsets a partir de um cabeçalho provisório
+    header_size = 0
+    for _ in range(3):
+        position = _align(len(MAGIC) + 4 + header_size)
+        for name, (typecode, _) in sections.items():
+            header["sections"][name] = [position, len(payloads[name]), typecode]
+            position = _align(position + len(payloads[name]))
+        encoded_header = json.dumps(header).encode("utf-8")
+        if len(encoded_header) == header_size:
+            break
+        header_size = len(encoded_header)
+
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(encoded_header)))
+        f.write(encoded_header)
+        for name, (offset, length, _) in header["sections"].items():
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(payloads[name])
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    logger.info(f"Snapshot do catálogo gravado em '{path}' ({count} livros).")
+    return count
+
+
+def _align(position: int) -> int:
+    return (position + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+class CatalogSnapshot:
+    """
+    Snapshot somente leitura do catálogo, mapeado em memória.
+
+    Todos os processos que abrem o mesmo arquivo compartilham as mesmas páginas
+    de memória (page cache do sistema), sem duplicar o catálogo por worker.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"Arquivo de snapshot inválido: {path}")
+        (header_size,) = struct.unpack_from("<I", self._mmap, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(self._mmap[start : start + header_size])
+        self.data_version: int = header["data_version"]
+        self.count: int = header["count"]
+        self.categories: List[str] = header["dictionaries"]["category"]
+        self.currencies: List[str] = header["dictionaries"]["currency"]
+
+        buffer = memoryview(self._mmap)
+        self.columns: Dict[str, memoryview] = {}
+        for name, (offset, length, typecode) in header["sections"].items():
+            self.columns[name] = buffer[offset : offset + length].cast(typecode)
+
+    def string(self, name: str, index: int) -> Optional[str]:
+        nulls = self.columns.get(f"{name}.nulls")
+        if nulls is not None and nulls[index]:
+            return None
+        offsets = self.columns[f"{name}.offsets"]
+        data = self.columns[f"{name}.data"]
+        return str(data[offsets[index] : offsets[index + 1]], "utf-8")
+
+    def number(self, name: str, index: int):
+        """Valor da coluna numérica `name` na posição `index` (None se nulo)."""
+        nulls = self.columns.get(f"{name}.nulls")
+        if nulls is not None and nulls[index]:
+            return None
+        return self.columns[name][index]
+
+    def category(self, index: int) -> Optional[str]:
+        code = self.columns["category_code"][index]
+        return None if code == NULL_CODE else self.categories[code]
+
+    def find_by_id(self, book_id: int) -> Optional[int]:
+        """Retorna a posição do livro no snapshot (busca binária pelo id)."""
+        ids = self.columns["id"]
+        index = bisect.bisect_left(ids, book_id)
+        if index < self.count and ids[index] == book_id:
+            return index
+        return None
+
+    def row(self, index: int) -> dict:
+        """Monta o livro na posição `index` no formato JSON do `BookSchema`."""
+        c = self.columns
+        cents = c["price_cents"][index]
+        availability = self.number("availability", index)
+        return {
+            "id": c["id"][index],
+            "upc": self.string("upc", index),
+            "book_name": self.string("book_name", index),
+            "currency": self.currencies[c["currency_code"][index]],
+            "price": f"{cents // 100}.{cents % 100:02d}",
+            "quantity": c["quantity"][index],
+            "availability": None if availability is None else bool(availability),
+            "rating": self.number("rating", index),
+            "number_of_reviews": self.number("number_of_reviews", index),
+            "category": self.category(index),
+            "description": self.string("description", index),
+            "image_url": self.string("image_url", index),
+            "source_page": self.number("source_page", index),
+        }
+
+    def rows(self, indexes) -> List[dict]:
+        return [self.row(i) for i in indexes]
+
+    def page(self, skip: int, limit: int) -> List[dict]:
+        return self.rows(range(max(skip, 0), min(skip + limit, self.count)))
+
+    def search(self, title: Optional[str], category: Optional[str]) -> List[dict]:
+        """Equivalente a `crud.search_books` (busca parcial, sem diferenciar
+        maiúsculas/minúsculas)."""
+        indexes = range(self.count)
+        if category:
+            needle = category.lower()
+            codes = {
+                code
+                for code, name in enumerate(self.categories)
+                if needle in name.lower()
+            }
+            category_codes = self.columns["category_code"]
+            indexes = [i for i in indexes if category_codes[i] in codes]
+        if title:
+            needle = title.lower()
+            indexes = [
+                i for i in indexes if needle in self.string("book_name", i).lower()
+            ]
+        return self.rows(indexes)
+
+    def category_names(self) -> List[str]:
+        """Categorias com ao menos um livro, em ordem alfabética."""
+        return list(self.categories)
+
+
+class SnapshotManager:
+    """
+    Mantém o snapshot aberto e o troca quando o arquivo é substituído pelo
+    carregador (verificado no máximo a cada `check_interval` segundos).
+    """
+
+    def __init__(self, path: str, check_interval: float = 1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._file_id = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[CatalogSnapshot]:
+        now = time.monotonic()
+        if self._snapshot is not None and now - self._checked_at < self.check_interval:
+            return self._snapshot
+        with self._lock:
+            self._checked_at = now
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                return self._snapshot
+            file_id = (stat.st_ino, stat.st_mtime_ns)
+            if file_id != self._file_id:
+                try:
+                    self._snapshot = CatalogSnapshot(self.path)
+                    self._file_id = file_id
+                    logger.info(
+                        f"Snapshot do catálogo carregado ({self._snapshot.count} "
+                        f"livros, versão {self._snapshot.data_version})."
+                    )
+                except (OSError, ValueError) as e:
+                    logger.error(f"Não foi possível abrir o snapshot: {e}")
+            return self._snapshot
+
+
+@lru_cache
+def get_snapshot_manager() -> Optional[SnapshotManager]:
+    settings = get_settings()
+    if settings.SERVING_MODE.lower() != "snapshot":
+        return None
+    return SnapshotManager(
+        settings.CATALOG_SNAPSHOT_PATH,
+        check_interval=settings.DATA_VERSION_CHECK_SECONDS,
+    )
+
+
+def get_catalog_snapshot() -> Optional[CatalogSnapshot]:
+    """
+    Retorna o snapshot atual no modo SERVING_MODE=snapshot, ou None (modo
+    banco de dados, ou snapshot ainda não gerado).
+    """
+    manager = get_snapshot_manager()
+    return manager.get() if manager else None
@@ -0,0 +1,289 @@
+import csv
+import logging
+import os
+from collections import Counter
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import String
+
+from .columnar import ColumnarReader, is_columnar
+from .models import Book
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_ROWS = 1_000
+FALLBACK_SLICE = 256
+REJECTS_HEADERS = ["row", "upc", "field", "value", "error"]
+
+# Colunas da tabela de livros carregadas a partir do arquivo do scraper
+FIELDS = [
+    "upc",
+    "book_name",
+    "currency",
+    "price",
+    "quantity",
+    "availability",
+    "rating",
+    "number_of_reviews",
+    "category",
+    "description",
+    "image_url",
+    "source_page",
+]
+# Valor usado quando a coluna inteira falta no cabeçalho do CSV
+DEFAULTS = {
+    "price": "0.00",
+    "quantity": "0",
+    "availability": "False",
+    "rating": "0",
+    "number_of_reviews": "0",
+    "source_page": "0",
+}
+REQUIRED = {"upc", "book_name", "currency"}
+# Tamanho máximo dos textos, tirado das colunas String(n) de `models.Book`
+MAX_LENGTHS = {
+    column.name: column.type.length
+    for column in Book.__table__.columns
+    if column.name in FIELDS and isinstance(column.type, String) and column.type.length
+}
+# Numeric(10, 2): até 8 dígitos antes da vírgula
+MAX_PRICE = Decimal(10) ** (Book.__table__.c.price.type.precision - 2)
+# Valores aceitos na coluna availability (inclusive os bool do formato colunar)
+BOOLEANS = {
+    True: True,
+    False: False,
+    **{
+        variant: value
+        for text, value in (("true", True), ("false", False), ("1", True), ("0", False))
+        for variant in (text, text.capitalize(), text.upper())
+    },
+}
+
+_CONVERSION_ERRORS = (ValueError, TypeError, InvalidOperation, KeyError)
+
+
+@dataclass
+class FieldError:
+    """Um campo inválido: linha de dados (1 = primeira após o cabeçalho)."""
+
+    row: int
+    upc: str
+    field: str
+    value: str
+    error: str
+
+
+# Conversão e faixa aceita (mínimo, máximo) de cada coluna não textual. As
+# conversões são funções embutidas, para que `map` rode a coluna inteira em C
+CONVERTERS: Dict[str, Tuple[Callable, Optional[tuple]]] = {
+    "price": (Decimal, (Decimal(0), MAX_PRICE - Decimal("0.01"))),
+    "quantity": (int, (0, 2**31 - 1)),
+    "availability": (BOOLEANS.__getitem__, None),
+    "rating": (int, (0, 5)),
+    "number_of_reviews": (int, (0, 2**31 - 1)),
+    "source_page": (int, (0, 2**31 - 1)),
+}
+
+
+def _convert_column(values: list, convert: Callable) -> Tuple[list, Dict[int, str]]:
+    """
+    Converte a coluna inteira de uma vez (`map` sobre a função embutida). Se
+    alguma conversão falhar, a coluna é refeita em fatias de `FALLBACK_SLICE`
+    valores, e só as fatias com erro valor a valor, para achar as linhas.
+    """
+    try:
+        return list(map(convert, values)), {}
+    except _CONVERSION_ERRORS:
+        pass
+    converted = []
+    bad = {}
+    for start in range(0, len(values), FALLBACK_SLICE):
+        piece = values[start : start + FALLBACK_SLICE]
+        try:
+            converted.extend(map(convert, piece))
+            continue
+        except _CONVERSION_ERRORS:
+            pass
+        for i, value in enumerate(piece, start):
+            try:
+                converted.append(convert(value))
+            except _CONVERSION_ERRORS:
+                converted.append(None)
+                bad[i] = "valor inválido"
+    return converted, bad
+
+
+def _check_range(values: list, bounds: tuple, bad: Dict[int, str]):
+    """Confere a faixa pelo mínimo/máximo da coluna; valor a valor só se falhar."""
+    low, high = bounds
+    valid = [v for v in values if v is not None] if bad else values
+    try:
+        if not valid or (low <= min(valid) and max(valid) <= high):
+            return
+    except InvalidOperation:
+        pass  # NaN no preço: não pode ser comparado
+    for i, value in enumerate(values):
+        try:
+            in_range = value is None or low <= value <= high
+        except InvalidOperation:
+            in_range = False
+        if not in_range:
+            bad[i] = f"fora da faixa [{low}, {high}]"
+
+
+def _check_text(name: str, values: list) -> Dict[int, str]:
+    bad = {}
+    if name in REQUIRED and not all(values):
+        bad.update({i: "obrigatório" for i, v in enumerate(values) if not v})
+    limit = MAX_LENGTHS.get(name)
+    if limit and max(map(len, values), default=0) > limit:
+        bad.update(
+            {
+                i: f"maior que {limit} caracteres"
+                for i, v in enumerate(values)
+                if len(v) > limit
+            }
+        )
+    return bad
+
+
+def validate_batch(
+    columns: Dict[str, list], first_row: int = 1
+) -> Tuple[List[dict], List[FieldError]]:
+    """
+    Valida e converte um lote (coluna -> valores, crus do CSV ou já tipados do
+    formato colunar) coluna a coluna. Retorna as linhas válidas, já com os
+    campos de `Book` tipados, e um erro por campo inválido; uma linha com
+    qualquer campo inválido fica de fora.
+    """
+    typed = {}
+    errors: Dict[int, Dict[str, str]] = {}
+    for name in FIELDS:
+        values = columns[name]
+        if name in CONVERTERS:
+            convert, bounds = CONVERTERS[name]
+            values, bad = _convert_column(values, convert)
+            if bounds:
+                _check_range(values, bounds, bad)
+        else:
+            values = ["" if v is None else v for v in values]
+            bad = _check_text(name, values)
+        typed[name] = values
+        for i, message in bad.items():
+            errors.setdefault(i, {})[name] = message
+
+    rows = [
+        dict(zip(FIELDS, values))
+        for i, values in enumerate(zip(*(typed[name] for name in FIELDS)))
+        if i not in errors
+    ]
+    field_errors = [
+        FieldError(
+            first_row + i, columns["upc"][i], name, str(columns[name][i]), message
+        )
+        for i in sorted(errors)
+        for name, message in errors[i].items()
+    ]
+    return rows, field_errors
+
+
+def read_csv_batches(
+    filename: str, batch_size: int = DEFAULT_BATCH_ROWS
+) -> Iterator[Dict[str, list]]:
+    """Lê o CSV em lotes de colunas (coluna -> lista de textos)."""
+    with open(filename, "r", newline="", encoding="utf-8") as csvfile:
+        reader = csv.reader(csvfile)
+        header = next(reader, [])
+        positions = {name: header.index(name) for name in FIELDS if name in header}
+        width = len(header)
+        rows = (row for row in reader if row)
+        while True:
+            chunk = [row for _, row in zip(range(batch_size), rows)]
+            if not chunk:
+                return
+            if min(map(len, chunk)) < width:
+                # Linhas curtas (campos finais ausentes) são completadas com ""
+                chunk = [row + [""] * (width - len(row)) for row in chunk]
+            transposed = list(zip(*chunk))
+            yield {
+                name: (
+                    list(transposed[positions[name]])
+                    if name in positions
+                    else [DEFAULTS.get(name, "")] * len(chunk)
+                )
+                for name in FIELDS
+            }
+
+
+class BatchValidator:
+    """
+    Etapa de validação do carregador: lê o arquivo do scraper (CSV ou
+    `.bkcol`) em lotes, valida cada lote com `validate_batch` e entrega só as
+    linhas válidas. Os erros, um por campo, vão para o arquivo de rejeitados
+    (CSV com linha, UPC, campo, valor e motivo), criado só se houver algum.
+    """
+
+    def __init__(
+        self, rejects_path: Optional[str] = None, batch_size: int = DEFAULT_BATCH_ROWS
+    ):
+        self.rejects_path = rejects_path
+        self.batch_size = batch_size
+        self.rows = 0
+        self.rejected_rows = 0
+        self.errors_by_field: Counter = Counter()
+        self._rejects_file = None
+        self._rejects_writer = None
+
+    def batches(self, filename: str) -> Iterator[List[dict]]:
+        if self.rejects_path and os.path.exists(self.rejects_path):
+            # Relatório de uma carga anterior
+            os.remove(self.rejects_path)
+        if is_columnar(filename):
+            source = ColumnarReader(filename).iter_batches()
+        else:
+            source = read_csv_batches(filename, self.batch_size)
+        try:
+            for columns in source:
+                rows, errors = validate_batch(columns, self.rows + 1)
+                self.rows += len(columns["upc"])
+                self.rejected_rows += len({error.row for error in errors})
+                self._record(errors)
+                if rows:
+                    yield rows
+        finally:
+            self.close()
+
+    def _record(self, errors: List[FieldError]):
+        self.errors_by_field.update(error.field for error in errors)
+        if not errors or not self.rejects_path:
+            return
+        if self._rejects_writer is None:
+            self._rejects_file = open(
+                self.rejects_path, "w", newline="", encoding="utf-8"
+            )
+            self._rejects_writer = csv.writer(self._rejects_file)
+            self._rejects_writer.writerow(REJECTS_HEADERS)
+        self._rejects_writer.writerows(
+            (e.row, e.upc, e.field, e.value, e.error) for e in errors
+        )
+
+    def close(self):
+        if self._rejects_file is not None:
+            self._rejects_file.close()
+            self._rejects_file = None
+            self._rejects_writer = None
+
+    def log_summary(self):
+        if not self.rejected_rows:
+            return
+        destination = (
+            f"detalhes em '{self.rejects_path}'"
+            if self.rejects_path
+            else "sem relatório"
+        )
+        logger.warning(
+            f"{self.rejected_rows} de {self.rows} linhas rejeitadas na validação "
+            f"(erros por campo: {dict(self.errors_by_field)}; {destination})."
+        )
@@ -0,0 +1,129 @@
+import os
+import tempfile
+
+# As configurações e a URL do banco são lidas na importação de `src`: os testes
+# usam um banco SQLite descartável e valores fixos para o Settings
+_workdir = tempfile.mkdtemp(prefix="book-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_workdir, 'books.db')}"
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_SECONDS", "1800")
+os.environ.setdefault("DB_SCHEMA_STARTUP", "none")
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    """Sessão sobre o banco de testes, com o schema recriado do zero."""
+    from src.core import models
+    from src.core.database import SessionLocal, engine
+
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def client(db):
+    """Cliente da API sobre o banco de testes (sem rodar o lifespan)."""
+    from fastapi.testclient import TestClient
+
+    from main_api import create_app
+
+    return TestClient(create_app())
+
+
+@pytest.fixture
+def make_book():
+    """Fábrica de `models.Book` com valores padrão válidos (sobrescrevíveis)."""
+    from decimal import Decimal
+
+    from src.core import models
+
+    counter = iter(range(1, 1_000_000))
+
+    def factory(**fields):
+        n = next(counter)
+        values = {
+            "upc": f"upc-{n:06d}",
+            "book_name": f"Book {n}",
+            "currency": "GBP",
+            "price": Decimal("10.00"),
+            "quantity": 1,
+            "availability": True,
+            "rating": 3,
+            "number_of_reviews": 0,
+            "category": "Fiction",
+            "description": f"Description {n}",
+            "image_url": f"https://example.com/{n}.jpg",
+            "source_page": 1,
+        }
+        values.update(fields)
+        return models.Book(**values)
+
+    return factory
+
+
+class StubServer:
+    """
+    Servidor HTTP local com respostas roteirizadas por caminho: cada
+    requisição consome a próxima resposta da lista do caminho, e a última se
+    repete. Caminhos sem roteiro recebem 404. Guarda os caminhos pedidos.
+    """
+
+    def __init__(self):
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.routes = {}
+        self.requests = []
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                status, headers, body = server._next(self.path, self.headers)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}/"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def add(self, path: str, *responses):
+        """Roteiro de `path`: (status, headers, body) ou só o status."""
+        self.routes[path] = [
+            (r, {}, b"") if isinstance(r, int) else r for r in responses
+        ]
+
+    def url(self, path: str) -> str:
+        return self.base_url + path.lstrip("/")
+
+    def _next(self, path, headers):
+        with self._lock:
+            self.requests.append(path)
+            script = self.routes.get(path)
+            if not script:
+                return 404, {}, b""
+            return script.pop(0) if len(script) > 1 else script[0]
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    yield server
+    server.close()
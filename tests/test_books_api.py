@@ -0,0 +1,14 @@
+import pytest
+
+
+@pytest.mark.parametrize(
+    "query", ["skip=-5", "limit=-1", "limit=0", "limit=101", "skip=-5&limit=-1"]
+)
+def test_books_rejects_out_of_range_paging(client, query):
+    assert client.get(f"/api/v1/books?{query}").status_code == 422
+
+
+def test_books_accepts_max_page(client):
+    response = client.get("/api/v1/books?skip=0&limit=100")
+    assert response.status_code == 200
+    assert response.json() == []
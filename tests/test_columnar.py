@@ -0,0 +1,106 @@
+import csv
+from decimal import Decimal
+
+from src.core.columnar import COLUMNS, ColumnarReader, ColumnarWriter, convert_csv
+from src.core.validation import validate_batch
+
+
+def make_row(n, **overrides):
+    row = {
+        "upc": f"upc-{n:06d}",
+        "book_name": f"Livro {n}",
+        "currency": "£",
+        "price": "10.50",
+        "quantity": "3",
+        "availability": "True",
+        "rating": "4",
+        "number_of_reviews": "0",
+        "category": "Fiction",
+        "description": "Uma descrição",
+        "image_url": "https://example.com/cover.jpg",
+        "source_page": "1",
+    }
+    row.update(overrides)
+    return row
+
+
+def test_round_trip_keeps_types(tmp_path):
+    path = str(tmp_path / "books.bkcol")
+    with ColumnarWriter(path) as writer:
+        writer.writerow(make_row(1))
+
+    [row] = ColumnarReader(path).iter_rows()
+
+    assert row["price"] == Decimal("10.50")
+    assert row["availability"] is True
+    assert row["rating"] == 4
+    assert row["description"] == "Uma descrição"
+
+
+def test_nulls_round_trip(tmp_path):
+    path = str(tmp_path / "books.bkcol")
+    with ColumnarWriter(path) as writer:
+        writer.writerow(make_row(1, price="", rating=None, description=None))
+        writer.writerow(make_row(2, price="7.25", availability="", description=""))
+
+    first, second = ColumnarReader(path).iter_rows()
+
+    assert first["price"] is None
+    assert first["rating"] is None
+    assert first["description"] is None
+    assert second["price"] == Decimal("7.25")
+    assert second["availability"] is None
+    # Texto vazio continua sendo texto vazio, não nulo
+    assert second["description"] == ""
+    assert first["quantity"] == second["quantity"] == 3
+
+
+def test_stats_ignore_nulls(tmp_path):
+    path = str(tmp_path / "books.bkcol")
+    with ColumnarWriter(path) as writer:
+        writer.writerow(make_row(1, price="", source_page=""))
+        writer.writerow(make_row(2, price="99.99", source_page=""))
+
+    [chunk] = ColumnarReader(path).chunks()
+
+    assert chunk.stats("price") == (Decimal("99.99"), Decimal("99.99"))
+    assert chunk.stats("source_page") == (None, None)
+    assert chunk.stats("rating") == (4, 4)
+
+
+def test_append_after_chunk_with_nulls(tmp_path):
+    path = str(tmp_path / "books.bkcol")
+    with ColumnarWriter(path) as writer:
+        writer.writerow(make_row(1, quantity=""))
+    with ColumnarWriter(path, append=True) as writer:
+        writer.writerow(make_row(2))
+
+    rows = list(ColumnarReader(path).iter_rows(["upc", "quantity"]))
+
+    assert rows == [
+        {"upc": "upc-000001", "quantity": None},
+        {"upc": "upc-000002", "quantity": 3},
+    ]
+
+
+def test_convert_csv_with_empty_numeric_fields(tmp_path):
+    csv_path = tmp_path / "books.csv"
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(COLUMNS))
+        writer.writeheader()
+        writer.writerow(make_row(1, price="", number_of_reviews=""))
+        writer.writerow(make_row(2))
+    path = str(tmp_path / "books.bkcol")
+
+    assert convert_csv(str(csv_path), path) == 2
+
+    [batch] = ColumnarReader(path).iter_batches()
+    assert batch["price"] == [None, Decimal("10.50")]
+    assert batch["number_of_reviews"] == [None, 0]
+    # Como no CSV, a linha com preço vazio é rejeitada pela validação
+    rows, errors = validate_batch(batch)
+    assert [row["upc"] for row in rows] == ["upc-000002"]
+    assert {(e.upc, e.field) for e in errors} == {
+        ("upc-000001", "price"),
+        ("upc-000001", "number_of_reviews"),
+    }
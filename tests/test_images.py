@@ -0,0 +1,166 @@
+import httpx
+import pytest
+
+from benchmarks.fixture_server import FixtureCatalogue
+from scripts import fetch_covers
+from scripts.request_scheduler import RequestScheduler
+from src.core import images
+from src.core.config import get_settings
+from src.core.images import ORIGINAL, THUMBNAIL, ImageStore, content_hash
+from src.core.models import BookImage
+
+# Capas da fixture: livros da mesma categoria têm a mesma imagem
+CATALOGUE = FixtureCatalogue(pages=1)
+COVER_A = CATALOGUE.cover_image(0)
+COVER_B = next(
+    CATALOGUE.cover_image(i)
+    for i, book in enumerate(CATALOGUE.books)
+    if book["category"] != CATALOGUE.books[0]["category"]
+)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(get_settings(), "IMAGES_DIR", str(tmp_path / "images"))
+    return ImageStore(get_settings().IMAGES_DIR)
+
+
+@pytest.fixture
+def covers(stub_server):
+    """URLs de capa no servidor local: duas com o mesmo conteúdo."""
+    stub_server.add("/a.png", (200, {}, COVER_A))
+    stub_server.add("/a-copy.png", (200, {}, COVER_A))
+    stub_server.add("/b.png", (200, {}, COVER_B))
+    stub_server.add("/not-an-image", (200, {}, b"<html></html>"))
+    return {name: stub_server.url(name) for name in ("a.png", "a-copy.png", "b.png")}
+
+
+def fetch(db, store, urls):
+    with httpx.Client(timeout=5.0) as client:
+        scheduler = RequestScheduler(client, requests_per_second=1000.0)
+        return fetch_covers.fetch_covers(db, scheduler, store, urls, workers=2)
+
+
+def test_fetch_covers_deduplicates_by_content(db, store, covers, stub_server):
+    urls = list(covers.values()) + [
+        stub_server.url("/missing.png"),
+        stub_server.url("/not-an-image"),
+    ]
+
+    counts = fetch(db, store, urls)
+
+    assert counts == {"downloaded": 3, "new_files": 2, "duplicates": 1, "failed": 2}
+    registered = {row.source_url: row.content_hash for row in db.query(BookImage)}
+    assert registered == {
+        covers["a.png"]: content_hash(COVER_A),
+        covers["a-copy.png"]: content_hash(COVER_A),
+        covers["b.png"]: content_hash(COVER_B),
+    }
+    with open(store.path(content_hash(COVER_A)), "rb") as f:
+        assert f.read() == COVER_A
+
+
+def test_pending_cover_urls_skips_fetched(db, store, covers, make_book):
+    db.add_all(make_book(image_url=url) for url in covers.values())
+    db.commit()
+    fetch(db, store, [covers["a.png"]])
+
+    assert fetch_covers.pending_cover_urls(db) == sorted(
+        [covers["a-copy.png"], covers["b.png"]]
+    )
+    assert len(fetch_covers.pending_cover_urls(db, refetch=True)) == 3
+
+
+def test_thumbnails_without_pillow(db, store, covers, monkeypatch):
+    monkeypatch.setattr(images, "Image", None)
+    fetch(db, store, list(covers.values()))
+
+    assert fetch_covers.build_thumbnails(db, store, max_size=50, workers=1) == 0
+    assert not store.exists(content_hash(COVER_A), THUMBNAIL)
+
+
+def test_thumbnails_with_pillow(db, store, covers):
+    pytest.importorskip("PIL")
+    fetch(db, store, list(covers.values()))
+
+    assert fetch_covers.build_thumbnails(db, store, max_size=50, workers=1) == 2
+    # Já geradas: nada a fazer na próxima execução
+    assert fetch_covers.build_thumbnails(db, store, max_size=50, workers=1) == 0
+    with images.Image.open(store.path(content_hash(COVER_A), THUMBNAIL)) as thumb:
+        assert thumb.format == "JPEG"
+        assert max(thumb.size) == 50
+
+
+def test_image_etag_and_not_modified(client, store):
+    digest, _ = store.put(COVER_A)
+
+    response = client.get(f"/api/v1/images/{digest}")
+    assert response.status_code == 200
+    assert response.content == COVER_A
+    assert response.headers["content-type"] == "image/png"
+    assert response.headers["etag"] == f'"{digest}-{ORIGINAL}"'
+    assert "immutable" in response.headers["cache-control"]
+
+    cached = client.get(
+        f"/api/v1/images/{digest}",
+        headers={"If-None-Match": response.headers["etag"]},
+    )
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == response.headers["etag"]
+
+    stale = client.get(f"/api/v1/images/{digest}", headers={"If-None-Match": '"x"'})
+    assert stale.status_code == 200
+
+
+def test_thumb_falls_back_to_original_until_generated(client, store):
+    digest, _ = store.put(COVER_A)
+
+    response = client.get(f"/api/v1/images/{digest}?size=thumb")
+
+    assert response.status_code == 200
+    assert response.content == COVER_A
+    assert response.headers["etag"] == f'"{digest}-{ORIGINAL}"'
+    assert "immutable" not in response.headers["cache-control"]
+
+
+def test_thumb_served_when_present(client, store):
+    digest, _ = store.put(COVER_A)
+    images.write_atomically(store.path(digest, THUMBNAIL), b"\xff\xd8\xff thumb")
+
+    response = client.get(f"/api/v1/images/{digest}?size=thumb")
+
+    assert response.content == b"\xff\xd8\xff thumb"
+    assert response.headers["content-type"] == "image/jpeg"
+    assert response.headers["etag"] == f'"{digest}-{THUMBNAIL}"'
+    assert "immutable" in response.headers["cache-control"]
+
+
+def test_unknown_image_is_404(client, store):
+    assert client.get(f"/api/v1/images/{'0' * 64}").status_code == 404
+    assert client.get("/api/v1/images/not-a-hash").status_code == 422
+
+
+def test_book_cover_redirects_to_image(client, db, store, covers, make_book):
+    book = make_book(image_url=covers["b.png"])
+    without_cover = make_book()
+    db.add_all([book, without_cover])
+    db.commit()
+    fetch(db, store, [covers["b.png"]])
+    digest = content_hash(COVER_B)
+
+    response = client.get(f"/api/v1/books/{book.id}/cover", follow_redirects=False)
+    assert response.status_code == 307
+    assert response.headers["location"] == f"/api/v1/images/{digest}"
+    assert response.headers["cache-control"] == "public, max-age=300"
+
+    thumb = client.get(
+        f"/api/v1/books/{book.id}/cover?size=thumb", follow_redirects=False
+    )
+    assert thumb.headers["location"] == f"/api/v1/images/{digest}?size=thumb"
+
+    assert client.get(f"/api/v1/books/{book.id}/cover").content == COVER_B
+    missing = client.get(
+        f"/api/v1/books/{without_cover.id}/cover", follow_redirects=False
+    )
+    assert missing.status_code == 404
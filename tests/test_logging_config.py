@@ -0,0 +1,19 @@
+import json
+import logging
+
+from src.core.logging_config import setup_api_logging, stop_api_logging
+
+
+def test_queued_json_record_keeps_exception(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    setup_api_logging(json_logs=True)
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logging.getLogger("tests").exception("falhou em %s", "x")
+    stop_api_logging()
+
+    lines = (tmp_path / "logs" / "api.log").read_text(encoding="utf-8").splitlines()
+    record = json.loads(lines[-1])
+    assert record["message"] == "falhou em x"
+    assert "ValueError: boom" in record["exc_info"]
@@ -0,0 +1,73 @@
+import os
+
+import pytest
+import sqlalchemy as sa
+from alembic import command
+from alembic.config import Config
+
+from src.core import database
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def migrate(tmp_path, monkeypatch):
+    """Roda as migrações em um banco novo (o env.py lê `DATABASE_URL`)."""
+    url = f"sqlite:///{tmp_path / 'migrated.db'}"
+    monkeypatch.setattr(database, "DATABASE_URL", url)
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "alembic"))
+    engine = sa.create_engine(url)
+
+    def upgrade(revision: str):
+        command.upgrade(config, revision)
+        return engine
+
+    yield upgrade
+    engine.dispose()
+
+
+def test_book_changes_seeded_from_existing_books(migrate):
+    engine = migrate("f3b8d2c6a417")
+    with engine.begin() as connection:
+        for n in (1, 2, 3):
+            connection.execute(
+                sa.text(
+                    "INSERT INTO books (upc, book_name, currency, price, quantity, "
+                    "category) VALUES (:upc, :name, 'GBP', 10, 1, 'Fiction')"
+                ),
+                {"upc": f"upc-{n}", "name": f"Book {n}"},
+            )
+        connection.execute(
+            sa.text("INSERT INTO catalog_state (id, data_version) VALUES (1, 4)")
+        )
+
+    migrate("head")
+
+    with engine.connect() as connection:
+        changes = connection.execute(
+            sa.text("SELECT seq, book_id, change, data_version FROM book_changes")
+        ).all()
+        version = connection.execute(
+            sa.text("SELECT data_version FROM catalog_state WHERE id = 1")
+        ).scalar()
+    assert [tuple(row) for row in changes] == [
+        (1, 1, "insert", 5),
+        (2, 2, "insert", 5),
+        (3, 3, "insert", 5),
+    ]
+    assert version == 5
+
+
+def test_book_changes_empty_catalogue(migrate):
+    engine = migrate("head")
+
+    with engine.connect() as connection:
+        assert (
+            connection.execute(sa.text("SELECT COUNT(*) FROM book_changes")).scalar()
+            == 0
+        )
+        assert (
+            connection.execute(sa.text("SELECT COUNT(*) FROM catalog_state")).scalar()
+            == 0
+        )
@@ -0,0 +1,84 @@
+import random
+from dataclasses import asdict
+from decimal import Decimal
+
+import pytest
+
+from src.core import crud, query_engine
+from src.core.query_engine import BookQuery, ColumnarQueryEngine
+from src.core.serialization import book_rows_to_dicts
+from src.core.snapshot import CatalogSnapshot, write_snapshot
+
+QUERIES = [
+    BookQuery(),
+    BookQuery(sort="-id", limit=None),
+    BookQuery(sort="price", limit=None),
+    BookQuery(sort="-price", skip=5, limit=10),
+    BookQuery(sort="rating", limit=None),
+    BookQuery(sort="-rating", limit=7),
+    BookQuery(sort="-reviews", limit=None),
+    BookQuery(sort="reviews", skip=3, limit=5),
+    BookQuery(sort="-quantity", limit=12),
+    BookQuery(min_rating=0, limit=None),
+    BookQuery(min_rating=2, max_rating=4, sort="-rating", limit=None),
+    BookQuery(available=True, sort="price", limit=None),
+    BookQuery(available=False, limit=None),
+    BookQuery(category="Poetry", sort="-price", limit=None),
+    BookQuery(category="Missing", limit=None),
+    BookQuery(min_price=Decimal("12.50"), max_price=Decimal("30"), limit=None),
+    BookQuery(title="book 1", sort="-rating", limit=None),
+    BookQuery(limit=0),
+]
+
+
+@pytest.fixture
+def snapshot(db, make_book, tmp_path):
+    """Catálogo com empates, categorias e valores nulos, e o seu snapshot."""
+    rng = random.Random(7)
+    books = []
+    for _ in range(80):
+        books.append(
+            make_book(
+                price=Decimal(rng.choice(["9.99", "12.50", "20.00", "35.10"])),
+                quantity=rng.randint(0, 5),
+                availability=rng.choice([True, False, None]),
+                rating=rng.choice([0, 1, 3, 5, None]),
+                number_of_reviews=rng.choice([0, 2, 7, None]),
+                category=rng.choice(["Fiction", "Poetry", None]),
+                description=rng.choice(["Something", None]),
+                source_page=rng.choice([1, 2, None]),
+            )
+        )
+    db.add_all(books)
+    db.commit()
+    path = str(tmp_path / "catalog.snapshot")
+    write_snapshot(db, path)
+    return CatalogSnapshot(path)
+
+
+@pytest.fixture(params=["numpy", "python"])
+def engine(request, snapshot, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(query_engine, "np", None)
+    return ColumnarQueryEngine(snapshot)
+
+
+@pytest.mark.parametrize("query", QUERIES, ids=repr)
+def test_engine_matches_sql(db, engine, query):
+    expected = book_rows_to_dicts(crud.query_books(db, **asdict(query)))
+    assert engine.query(query) == expected
+
+
+def test_snapshot_rows_keep_nulls(db, snapshot):
+    expected = book_rows_to_dicts(crud.query_books(db, limit=None))
+    assert snapshot.rows(range(snapshot.count)) == expected
+    assert any(book["rating"] is None for book in expected)
+
+
+def test_book_query_rejects_negative_bounds():
+    with pytest.raises(ValueError):
+        BookQuery(skip=-1)
+    with pytest.raises(ValueError):
+        BookQuery(limit=-1)
@@ -0,0 +1,78 @@
+import pytest
+
+from src.core.models import Book, BookRelated
+from src.core.related import update_related
+
+TOP_K = 3
+TOPICS = [
+    "dragons wizards castles magic kingdom",
+    "murder detective investigation clues police",
+    "galaxy spaceship planets aliens starship",
+]
+
+
+@pytest.fixture
+def catalogue(db, make_book):
+    books = [
+        make_book(
+            book_name=f"{TOPICS[i % 3].split()[0].title()} {i}",
+            description=f"{TOPICS[i % 3]} volume{i}",
+            category=["Fantasy", "Mystery", "Science Fiction"][i % 3],
+        )
+        for i in range(15)
+    ]
+    db.add_all(books)
+    db.commit()
+    update_related(db, top_k=TOP_K)
+    db.commit()
+    return [book.id for book in books]
+
+
+def stored_lists(db):
+    lists = {}
+    for book_id, related_id in db.query(
+        BookRelated.book_id, BookRelated.related_book_id
+    ).order_by(BookRelated.book_id, BookRelated.rank):
+        lists.setdefault(book_id, []).append(related_id)
+    return lists
+
+
+def remove_book(db, book_id):
+    db.query(Book).filter(Book.id == book_id).delete()
+    db.flush()
+
+
+def test_removed_book_leaves_every_list(db, catalogue):
+    before = stored_lists(db)
+    removed = max(catalogue, key=lambda i: sum(i in ids for ids in before.values()))
+    citing = [book_id for book_id, ids in before.items() if removed in ids]
+    assert citing
+
+    remove_book(db, removed)
+    written = update_related(db, [], top_k=TOP_K, removed_ids=[removed])
+    db.commit()
+
+    after = stored_lists(db)
+    assert removed not in after
+    assert all(removed not in ids for ids in after.values())
+    assert written == len(citing)
+    # As listas que citavam o livro são refeitas com um vizinho no lugar dele
+    assert all(len(after[book_id]) == TOP_K for book_id in citing)
+
+    update_related(db, top_k=TOP_K)
+    assert stored_lists(db) == after
+
+
+def test_removed_and_changed_in_the_same_load(db, catalogue):
+    removed, changed = catalogue[-1], catalogue[3]
+    book = db.get(Book, changed)
+    book.description = TOPICS[1]
+    remove_book(db, removed)
+
+    update_related(db, [changed], top_k=TOP_K, removed_ids=[removed])
+    db.commit()
+
+    after = stored_lists(db)
+    assert removed not in after
+    assert all(removed not in ids for ids in after.values())
+    assert set(after) == set(catalogue) - {removed}
@@ -0,0 +1,87 @@
+import httpx
+import pytest
+
+from scripts import request_scheduler
+from scripts.request_scheduler import (
+    RequestScheduler,
+    RetriesExhausted,
+    read_dead_letters,
+)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Registra as esperas do scheduler sem dormir de fato."""
+    calls = []
+    monkeypatch.setattr(request_scheduler.time, "sleep", calls.append)
+    return calls
+
+
+@pytest.fixture
+def client():
+    with httpx.Client(timeout=5.0) as client:
+        yield client
+
+
+def make_scheduler(client, **kwargs):
+    return RequestScheduler(client, requests_per_second=1000.0, **kwargs)
+
+
+def test_429_waits_for_retry_after(stub_server, client, sleeps):
+    stub_server.add(
+        "/page.html",
+        (429, {"Retry-After": "1.5"}, b""),
+        (200, {}, b"ok"),
+    )
+    scheduler = make_scheduler(client, backoff_base=10.0)
+
+    response = scheduler.get(stub_server.url("/page.html"))
+
+    assert response.status_code == 200
+    assert response.content == b"ok"
+    assert 1.5 in sleeps
+    assert scheduler.stats["retries"] == 1
+    assert scheduler.stats["throttled"] == 1
+    # 429 reduz a taxa do host
+    host = scheduler._host(stub_server.url("/page.html"))
+    assert host.rate < 1000.0
+
+
+def test_5xx_retries_with_exponential_backoff(stub_server, client, sleeps):
+    stub_server.add("/page.html", 500, 502, (200, {}, b"ok"))
+    scheduler = make_scheduler(client, backoff_base=1.0, backoff_max=30.0)
+
+    response = scheduler.get(stub_server.url("/page.html"))
+
+    assert response.status_code == 200
+    assert scheduler.stats["retries"] == 2
+    backoffs = [delay for delay in sleeps if delay >= 0.4]
+    assert len(backoffs) == 2
+    assert 0.5 <= backoffs[0] <= 1.0
+    assert 1.0 <= backoffs[1] <= 2.0
+
+
+def test_404_is_returned_without_retrying(stub_server, client, sleeps):
+    scheduler = make_scheduler(client)
+
+    response = scheduler.get(stub_server.url("/missing.html"))
+
+    assert response.status_code == 404
+    assert scheduler.stats["retries"] == 0
+
+
+def test_exhausted_url_goes_to_dead_letters(stub_server, client, sleeps, tmp_path):
+    stub_server.add("/page-3.html", 503)
+    path = str(tmp_path / "dead.jsonl")
+    scheduler = make_scheduler(client, max_retries=2, dead_letter_path=path)
+
+    with pytest.raises(RetriesExhausted):
+        scheduler.get(stub_server.url("/page-3.html"), page=3)
+
+    assert stub_server.requests == ["/page-3.html"] * 3
+    [entry] = read_dead_letters(path)
+    assert entry["url"] == stub_server.url("/page-3.html")
+    assert entry["page"] == 3
+    assert entry["reason"] == "HTTP 503"
+    assert entry["attempts"] == 3
+    assert scheduler.dead_letters == [entry]
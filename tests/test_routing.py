@@ -0,0 +1,53 @@
+import pytest
+from sqlalchemy import create_engine, insert, select, text, update
+
+from src.core import models
+from src.core.routing import ReplicaSet, RoutingSession
+
+
+@pytest.fixture
+def engines(tmp_path):
+    primary = create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    for engine in (primary, replica):
+        models.Base.metadata.create_all(bind=engine)
+    yield primary, replica
+    primary.dispose()
+    replica.dispose()
+
+
+@pytest.fixture
+def session(engines):
+    primary, replica = engines
+    with RoutingSession(
+        bind=primary, replica_set=ReplicaSet(primary, [replica])
+    ) as session:
+        yield session
+
+
+def test_select_goes_to_replica(engines, session):
+    _, replica = engines
+    assert session.get_bind(clause=select(models.Book.id)) is replica
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        text("UPDATE books SET quantity = 0"),
+        insert(models.Book),
+        update(models.Book).values(quantity=0),
+    ],
+    ids=["text", "insert", "update"],
+)
+def test_non_select_statements_pin_the_primary(engines, session, statement):
+    primary, _ = engines
+    assert session.get_bind(clause=statement) is primary
+    # Depois de uma possível escrita, as leituras também ficam no primário
+    assert session.get_bind(clause=select(models.Book.id)) is primary
+
+
+def test_orm_query_reads_from_replica(engines, session):
+    _, replica = engines
+    with replica.begin() as connection:
+        connection.execute(insert(models.CatalogState).values(id=1, data_version=7))
+    assert session.query(models.CatalogState.data_version).scalar() == 7
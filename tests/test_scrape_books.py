@@ -0,0 +1,132 @@
+import csv
+import json
+
+import httpx
+import pytest
+
+from benchmarks.fixture_server import FixtureCatalogue, FixtureServer
+from scripts import request_scheduler, scrape_books
+from scripts.crawl_frontier import CrawlFrontier
+from scripts.request_scheduler import RequestScheduler, read_dead_letters
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(request_scheduler.time, "sleep", lambda seconds: None)
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    # O logging do pipeline grava em ./logs
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def write_dead_letters(path, urls):
+    with open(path, "w", encoding="utf-8") as f:
+        for url in urls:
+            f.write(json.dumps({"url": url, "page": 1, "reason": "HTTP 503"}) + "\n")
+
+
+def run_retry(workdir, dead_letters):
+    scrape_books.main(
+        "1",
+        False,
+        str(workdir / "books.csv"),
+        requests_per_second=1000.0,
+        max_retries=1,
+        dead_letter_file=str(dead_letters),
+        retry_failed=True,
+    )
+
+
+def test_retry_keeps_only_urls_that_still_fail(workdir, stub_server):
+    catalogue = FixtureCatalogue(pages=1)
+    stub_server.add(
+        "/catalogue/recovered/index.html",
+        (200, {}, catalogue.book_page(0).encode("utf-8")),
+    )
+    stub_server.add("/catalogue/broken/index.html", 503)
+    recovered = stub_server.url("/catalogue/recovered/index.html")
+    broken = stub_server.url("/catalogue/broken/index.html")
+    dead_letters = workdir / "dead.jsonl"
+    write_dead_letters(dead_letters, [recovered, broken])
+
+    run_retry(workdir, dead_letters)
+
+    assert [e["url"] for e in read_dead_letters(dead_letters)] == [broken]
+    assert not (workdir / "dead.jsonl.retry").exists()
+    with open(workdir / "books.csv", newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["upc"] for row in rows] == [catalogue.books[0]["upc"]]
+
+
+def test_retry_removes_file_when_everything_recovers(workdir, stub_server):
+    catalogue = FixtureCatalogue(pages=1)
+    stub_server.add(
+        "/catalogue/recovered/index.html",
+        (200, {}, catalogue.book_page(0).encode("utf-8")),
+    )
+    dead_letters = workdir / "dead.jsonl"
+    write_dead_letters(
+        dead_letters, [stub_server.url("/catalogue/recovered/index.html")]
+    )
+
+    run_retry(workdir, dead_letters)
+
+    assert not dead_letters.exists()
+
+
+def test_interrupted_retry_keeps_dead_letters(workdir, stub_server, monkeypatch):
+    dead_letters = workdir / "dead.jsonl"
+    urls = [stub_server.url("/catalogue/a/index.html")]
+    write_dead_letters(dead_letters, urls)
+
+    def crash(*args, **kwargs):
+        raise RuntimeError("interrompido")
+
+    monkeypatch.setattr(scrape_books, "retry_dead_letters", crash)
+    with pytest.raises(RuntimeError):
+        run_retry(workdir, dead_letters)
+
+    assert [e["url"] for e in read_dead_letters(dead_letters)] == urls
+
+
+@pytest.fixture
+def fixture_site(monkeypatch):
+    monkeypatch.setattr(scrape_books, "BASE_URL", scrape_books.BASE_URL)
+    monkeypatch.setattr(scrape_books, "CATALOGUE_URL", scrape_books.CATALOGUE_URL)
+    with FixtureServer(pages=2) as server:
+        scrape_books.configure_base_url(server.base_url)
+        yield server
+
+
+def crawl(frontier, writer, known_listings):
+    with httpx.Client(timeout=5.0) as client:
+        scheduler = RequestScheduler(client, requests_per_second=1000.0)
+        return scrape_books.run_scraper(
+            writer,
+            scheduler,
+            range(1, 3),
+            set(),
+            frontier=frontier,
+            known_listings=known_listings,
+        )
+
+
+def test_page_without_books_to_visit_is_marked_done(workdir, fixture_site):
+    frontier = CrawlFrontier(str(workdir / "books.frontier"))
+    with scrape_books.open_output(str(workdir / "books.csv"), False) as writer:
+        crawl(frontier, writer, {})
+    assert frontier.completed_pages() == {1, 2}
+
+    # Atualização em que nenhuma listagem mudou: nenhum livro é visitado,
+    # mas as páginas foram processadas e precisam ser concluídas
+    frontier.start_refresh()
+    with scrape_books.open_output(str(workdir / "delta.csv"), False) as writer:
+        outcomes = crawl(frontier, writer, frontier.listing_hashes())
+
+    assert outcomes == {"unchanged": 40}
+    assert frontier.completed_pages() == {1, 2}
+    assert frontier.first_incomplete_page() == 3
+    frontier.close()